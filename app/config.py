@@ -0,0 +1,99 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./alerting.db")
+APP_ENV = os.getenv("APP_ENV", "development")
+
+
+def _flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+# Engine / pool tuning; production defaults favour a larger pool and stale-connection checks.
+_PRODUCTION = APP_ENV == "production"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20" if _PRODUCTION else "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20" if _PRODUCTION else "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800" if _PRODUCTION else "-1"))
+DB_POOL_PRE_PING = _flag("DB_POOL_PRE_PING", _PRODUCTION)
+DB_ECHO = _flag("DB_ECHO", False)
+# SQLite connection pragmas
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Async engine (aiosqlite / asyncpg, both in requirements.txt) used by the hot user endpoints.
+DB_ASYNC_ENABLED = _flag("DB_ASYNC_ENABLED", True)
+
+# Number of deliveries written per bulk insert / commit during a reminder cycle.
+DELIVERY_CHUNK_SIZE = int(os.getenv("DELIVERY_CHUNK_SIZE", "1000"))
+# POST /admin/alerts/bulk: alerts per multi-row INSERT, and the most items accepted per request.
+ALERT_BULK_CHUNK_SIZE = int(os.getenv("ALERT_BULK_CHUNK_SIZE", "500"))
+ALERT_BULK_MAX_ITEMS = int(os.getenv("ALERT_BULK_MAX_ITEMS", "10000"))
+# Delivery retention (app.services.retention): rows older than this many days, other than the latest
+# per (alert, user, channel), move in batches to gzip NDJSON files under ARCHIVE_DIR.
+DELIVERY_RETENTION_DAYS = int(os.getenv("DELIVERY_RETENTION_DAYS", "30"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "5000"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+# Rows fetched per round trip by the streaming admin exports (app.services.export).
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Users per window when (re)building an alert's audience; bounds memory for org-wide alerts.
+AUDIENCE_CHUNK_SIZE = int(os.getenv("AUDIENCE_CHUNK_SIZE", "5000"))
+
+# Digest mode: a user due for several alerts in one cycle gets one combined message per channel
+# (DeliveryStrategy.send_digest); each alert still gets its own delivery row.
+REMINDER_DIGEST_ENABLED = _flag("REMINDER_DIGEST_ENABLED", False)
+
+# Per-channel admission control (app.services.delivery.limits), e.g. "webhook=20/200,email=5":
+# sends per second with an optional burst, and "webhook=1000": most sends in flight (for queued
+# channels, unfinished outbox jobs). Recipients over a limit stay due and are retried once tokens
+# are back, but not sooner than CHANNEL_DEFER_SECONDS.
+CHANNEL_RATE_LIMITS = os.getenv("CHANNEL_RATE_LIMITS", "")
+CHANNEL_MAX_IN_FLIGHT = os.getenv("CHANNEL_MAX_IN_FLIGHT", "")
+CHANNEL_DEFER_SECONDS = float(os.getenv("CHANNEL_DEFER_SECONDS", "5"))
+
+# In-process reminder scheduler (started from the FastAPI lifespan when enabled).
+REMINDER_SCHEDULER_ENABLED = _flag("REMINDER_SCHEDULER_ENABLED", False)
+# Upper bound on how long the scheduler sleeps, so changes made by other processes are picked up.
+REMINDER_SCHEDULER_MAX_SLEEP_SECONDS = float(os.getenv("REMINDER_SCHEDULER_MAX_SLEEP_SECONDS", "300"))
+# Lower bound after a cycle that skipped partitions leased by another worker (their rows stay due).
+REMINDER_SCHEDULER_MIN_SLEEP_SECONDS = float(os.getenv("REMINDER_SCHEDULER_MIN_SLEEP_SECONDS", "1"))
+
+# Reminder work is split into this many partitions (user_id % REMINDER_PARTITIONS);
+# each cycle claims a partition through a lease row before working it.
+REMINDER_PARTITIONS = max(1, int(os.getenv("REMINDER_PARTITIONS", "1")))
+REMINDER_LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", "60"))
+
+# Outbox drained by OutboxWorker for queued (external) channels.
+OUTBOX_WORKER_ENABLED = _flag("OUTBOX_WORKER_ENABLED", False)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "2"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "600"))
+# How long a claimed job stays locked before another worker may pick it up again.
+OUTBOX_LOCK_SECONDS = int(os.getenv("OUTBOX_LOCK_SECONDS", "120"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+
+# Webhook channel; disabled unless a URL is configured.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10"))
+WEBHOOK_CONCURRENCY = int(os.getenv("WEBHOOK_CONCURRENCY", "20"))
+
+# Real-time inbox stream (/user/{id}/stream).
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))
+# A connection that overflowed its queue this many times in a row is treated as a slow consumer and closed.
+STREAM_MAX_DROPS = int(os.getenv("STREAM_MAX_DROPS", "50"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+# In-process LRU of rendered inbox pages keyed by (user, inbox version, query); 0 disables it.
+INBOX_CACHE_SIZE = int(os.getenv("INBOX_CACHE_SIZE", "1024"))
+# In-process LRU of team / org member id arrays keyed by (membership generation, team); 0 disables it.
+MEMBERSHIP_CACHE_SIZE = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "256"))
+
+# Prime the connection pools and the hot read paths from the lifespan, before a worker takes traffic.
+STARTUP_WARMUP = _flag("STARTUP_WARMUP", _PRODUCTION)
+
+# Instrumentation: statements slower than this are logged by app.services.metrics (0 disables).
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
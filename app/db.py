@@ -1,19 +1,113 @@
-import os
-from sqlalchemy import create_engine
+import importlib.util
+import logging
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-from app.model import Base
+from app import config
+from app.config import DATABASE_URL
+from app.services.metrics import instrument_engine
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./alerting.db")
+# async driver per dialect for the optional async engine
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+
+def engine_options(url: str) -> dict:
+    """create_engine keyword arguments for a URL: pool sizing for servers, connect args for SQLite."""
+    parsed = make_url(url)
+    options = {"echo": config.DB_ECHO, "pool_pre_ping": config.DB_POOL_PRE_PING}
+    if parsed.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False, "timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000}
+        if parsed.database in (None, "", ":memory:"):
+            # in-memory databases use a single shared connection; pool sizing does not apply
+            return options
+    options.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def make_engine(url: str = DATABASE_URL, **overrides):
+    """
+    Engine factory: pooling from config (overridable per call), SQLite pragmas on every new
+    connection and statement instrumentation (app.services.metrics).
+    """
+    engine = create_engine(url, **{**engine_options(url), **overrides})
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _sqlite_pragmas)
+    instrument_engine(engine)
+    return engine
+
+
+def make_async_engine(url: str = DATABASE_URL, **overrides):
+    """
+    Async engine for the same database, or None when disabled or the async driver
+    (aiosqlite / asyncpg) is not installed.
+    """
+    if not config.DB_ASYNC_ENABLED:
+        return None
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None or importlib.util.find_spec(driver) is None:
+        if driver is not None:
+            logger.warning("DB_ASYNC_ENABLED but %s is not installed; the user inbox runs on the thread pool", driver)
+        return None
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    options = engine_options(url)
+    options.get("connect_args", {}).pop("check_same_thread", None)
+    async_engine = create_async_engine(parsed.set(drivername=f"{backend}+{driver}"), **{**options, **overrides})
+    if backend == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
+engine = make_engine()
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+async_engine = make_async_engine()
+AsyncSessionLocal = None
+if async_engine is not None:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """Create or upgrade the schema through the Alembic migrations (see app/migrate.py)."""
+    from app.migrate import upgrade
+
+    upgrade(engine)
+
+
+def dialect_insert(db):
+    """
+    INSERT construct for the session's dialect, giving access to ON CONFLICT upserts
+    (on_conflict_do_update / on_conflict_do_nothing) on SQLite and PostgreSQL.
+    """
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"upserts are not supported on {name}")
+    return insert
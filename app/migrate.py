@@ -0,0 +1,114 @@
+# app/migrate.py
+"""
+Schema migrations (Alembic, see migrations/).
+
+    python -m app.migrate              # upgrade to the latest revision
+    python -m app.migrate current      # print the database revision
+
+This is the only place the schema changes: the server only checks at startup that the
+database is at the head revision (check_schema) and refuses to start otherwise.
+
+upgrade() also handles the two kinds of database that predate a version table:
+an empty database is created from the models and stamped at head, and a database
+built by the old create_all() bootstrap is stamped at the baseline and then upgraded.
+Stamping and every migration run in one transaction, so a failed run leaves the database as it was.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+
+from app.model import Base
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# schema produced by create_all() before migrations existed
+BASELINE_REVISION = "0001"
+
+
+def alembic_config(connection=None) -> Config:
+    cfg = Config(os.path.join(ROOT, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    if connection is not None:
+        cfg.attributes["connection"] = connection
+    return cfg
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is not at the migrations' head revision."""
+
+
+@lru_cache(maxsize=1)
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(bind) -> str:
+    with bind.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def check_schema(bind) -> str:
+    """Compare the stored revision with head (one SELECT, no DDL); returns it or raises SchemaOutOfDate."""
+    current = current_revision(bind)
+    if current != head_revision():
+        raise SchemaOutOfDate(
+            f"database is at revision {current or 'none'}, code expects {head_revision()}; "
+            f"run `python -m app.migrate` first"
+        )
+    return current
+
+
+@contextmanager
+def _transaction(bind):
+    """
+    A connection inside one transaction that DDL takes part in too. pysqlite only opens a
+    transaction before DML and runs DDL in autocommit, so on SQLite the driver's implicit
+    transactions are switched off for this connection and BEGIN is issued explicitly.
+    """
+    with bind.connect() as conn:
+        if conn.dialect.name != "sqlite":
+            with conn.begin():
+                yield conn
+            return
+        dbapi_connection = conn.connection.dbapi_connection
+        isolation_level = dbapi_connection.isolation_level
+        dbapi_connection.isolation_level = None
+        try:
+            with conn.begin():
+                conn.exec_driver_sql("BEGIN")
+                yield conn
+        finally:
+            dbapi_connection.isolation_level = isolation_level
+
+
+def upgrade(bind, revision: str = "head"):
+    """Bring the database behind `bind` (an Engine) to `revision`."""
+    with _transaction(bind) as conn:
+        cfg = alembic_config(conn)
+        tables = set(inspect(conn).get_table_names())
+        if "alembic_version" not in tables:
+            if not tables & set(Base.metadata.tables):
+                Base.metadata.create_all(conn)
+                command.stamp(cfg, "head")
+                return
+            command.stamp(cfg, BASELINE_REVISION)
+        command.upgrade(cfg, revision)
+
+
+if __name__ == "__main__":
+    from app.db import engine
+
+    action = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if action == "upgrade":
+        upgrade(engine, sys.argv[2] if len(sys.argv) > 2 else "head")
+        print(f"database at {current_revision(engine)}")
+    elif action == "current":
+        print(f"database at {current_revision(engine)}, head is {head_revision()}")
+    else:
+        sys.exit(f"unknown command {action!r}; use 'upgrade' or 'current'")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Enum, Date
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Enum, Date, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship, declarative_base
 import enum
 from datetime import datetime
@@ -24,7 +24,7 @@ class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
     name = Column(String)
-    team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=True, index=True)
     team = relationship("Team", back_populates="users")
     is_admin = Column(Boolean, default=False)
 
@@ -42,6 +42,11 @@ class Alert(Base):
     reminder_frequency_minutes = Column(Integer, default=120)
     visibility = Column(JSON, default={"org": False, "teams": [], "users": []})
     status = Column(String, default="active")
+    __table_args__ = (
+        # partial: only active alerts are ever checked for expiry
+        Index("ix_alerts_active_expires_at", "expires_at",
+              sqlite_where=text("status = 'active'"), postgresql_where=text("status = 'active'")),
+    )
 
 
 class NotificationDelivery(Base):
@@ -53,6 +58,14 @@ class NotificationDelivery(Base):
     channel = Column(String)
     delivered = Column(Boolean, default=True)
     read = Column(Boolean, default=False)
+    __table_args__ = (
+        # latest delivery per (alert, user) is an index-only lookup
+        Index("ix_notification_deliveries_alert_user_sent", "alert_id", "user_id", sent_at.desc()),
+        # retention walks old rows in (sent_at, id) order
+        Index("ix_notification_deliveries_sent_at", "sent_at", "id"),
+        # admin listing / export of one alert's deliveries pages in id order
+        Index("ix_notification_deliveries_alert_id", "alert_id", "id"),
+    )
 
 
 class UserAlertPreference(Base):
@@ -61,4 +74,92 @@ class UserAlertPreference(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     alert_id = Column(Integer, ForeignKey("alerts.id"))
     snoozed_until = Column(Date, nullable=True)
-    read = Column(Boolean, default=False)
\ No newline at end of file
+    read = Column(Boolean, default=False)
+    read_at = Column(DateTime, nullable=True)
+    __table_args__ = (UniqueConstraint("user_id", "alert_id", name="uq_user_alert_preferences_user_alert"),)
+
+
+class AlertAudience(Base):
+    """
+    Materialized (alert, user) visibility pairs, derived from Alert.visibility.
+    Kept in sync by AudienceRepo so recipients and inboxes are an indexed join.
+    Also carries the per-pair reminder schedule used by ReminderEngine.
+    """
+    __tablename__ = "alert_audience"
+    alert_id = Column(Integer, ForeignKey("alerts.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    # when the next reminder is due for this pair; NULL when nothing is scheduled
+    next_due_at = Column(DateTime, nullable=True)
+    __table_args__ = (
+        Index("ix_alert_audience_user_alert", "user_id", "alert_id"),
+        Index("ix_alert_audience_next_due_at", "next_due_at"),
+    )
+
+
+class ReminderLease(Base):
+    """Time-limited claim on one reminder partition, so concurrent cycles never work the same rows."""
+    __tablename__ = "reminder_leases"
+    partition = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+
+
+class DeliveryJob(Base):
+    """
+    Outbox entry for one (alert, user, channel) delivery on a queued channel, or for one
+    per-user digest of several alerts.
+    Drained by OutboxWorker; status moves pending -> in_flight -> done, or -> dead after max attempts.
+    """
+    __tablename__ = "delivery_outbox"
+    id = Column(Integer, primary_key=True)
+    delivery_id = Column(Integer, ForeignKey("notification_deliveries.id"), index=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"))
+    user_id = Column(Integer, ForeignKey("users.id"))
+    channel = Column(String, nullable=False)
+    status = Column(String, default="pending")
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # digest jobs: every alert in the combined message, most severe first (alert_id is the first),
+    # and the ids of the deliveries written with the job, in the same order
+    alert_ids = Column(JSON, nullable=True)
+    delivery_ids = Column(JSON, nullable=True)
+    __table_args__ = (Index("ix_delivery_outbox_status_next_attempt", "status", "next_attempt_at"),)
+
+
+class AnalyticsRollup(Base):
+    """
+    Daily counters per alert / severity / channel, maintained in the same transaction as the
+    delivery and preference writes. Served by /admin/analytics; rebuilt from raw rows by
+    app.services.analytics.rebuild_rollups.
+    """
+    __tablename__ = "analytics_rollups"
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    alert_id = Column(Integer, ForeignKey("alerts.id"), nullable=False)
+    severity = Column(String, nullable=False)
+    channel = Column(String, nullable=False)
+    deliveries = Column(Integer, default=0, nullable=False)
+    reads = Column(Integer, default=0, nullable=False)
+    snoozes = Column(Integer, default=0, nullable=False)
+    __table_args__ = (
+        UniqueConstraint("day", "alert_id", "severity", "channel", name="uq_analytics_rollups_key"),
+        Index("ix_analytics_rollups_alert_day", "alert_id", "day"),
+    )
+
+
+
+class UserInboxVersion(Base):
+    """Per-user counter bumped whenever anything shown in the user's inbox may have changed; backs the inbox ETag."""
+    __tablename__ = "user_inbox_versions"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, autoincrement=False)
+    version = Column(Integer, default=0, nullable=False)
+
+
+class CacheGeneration(Base):
+    """Named counters bumped by writers; in-process caches key their entries by the current value."""
+    __tablename__ = "cache_generations"
+    name = Column(String, primary_key=True)
+    generation = Column(Integer, default=0, nullable=False)
@@ -1,7 +1,20 @@
+from app.config import ALERT_BULK_CHUNK_SIZE
 from app.db import SessionLocal
 from app.model import Alert, User, NotificationDelivery, UserAlertPreference
+from app.repositories.audience_repo import AudienceRepo
+from app.services import analytics, inbox_versions
+from app.services.lifecycle import ACTIVE, EXPIRED
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import datetime
+
+# Admin listing page sizes.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Alert fields that affect when reminders are due.
+SCHEDULING_FIELDS = {"start_at", "expires_at", "reminders_enabled", "reminder_frequency_minutes", "status"}
 
 
 class AlertRepo:
@@ -11,14 +24,59 @@ class AlertRepo:
     def create(self, **kwargs) -> Alert:
         alert = Alert(**kwargs)
         self.db.add(alert)
+        self.db.flush()
+        # everyone in a new alert's audience is bumped below in one statement
+        AudienceRepo(self.db).sync_alert(alert, bump_changed=False)
+        inbox_versions.bump_alert_audience(self.db, [alert.id])
         self.db.commit()
         self.db.refresh(alert)
         return alert
 
+    def create_many(self, items: List[dict], chunk_size: int = ALERT_BULK_CHUNK_SIZE) -> List[int]:
+        """
+        Insert a batch of alerts (AlertCreate dicts) with chunked multi-row INSERT ... RETURNING,
+        build all their audiences and inbox versions set-based, and commit once.
+        Returns the new ids in input order; on any error nothing is written.
+        """
+        now = datetime.utcnow()
+        ids: List[int] = []
+        try:
+            for start in range(0, len(items), chunk_size):
+                rows = [{**item, "start_at": item.get("start_at") or now, "status": ACTIVE}
+                        for item in items[start:start + chunk_size]]
+                # neither database promises RETURNING in VALUES order; sort_by_parameter_order makes
+                # SQLAlchemy correlate each returned id with its parameter set
+                ids.extend(self.db.execute(
+                    insert(Alert).returning(Alert.id, sort_by_parameter_order=True), rows
+                ).scalars())
+            alerts = self.db.query(Alert.id, Alert.visibility, Alert.start_at, Alert.reminders_enabled,
+                                   Alert.status).filter(Alert.id.in_(ids)).all()
+            AudienceRepo(self.db).add_alerts(alerts)
+            inbox_versions.bump_alert_audience(self.db, ids)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return ids
+
     def update(self, alert: Alert, **kwargs):
         for k, v in kwargs.items():
             setattr(alert, k, v)
+        # moving expires_at out revives an alert the lifecycle sweeper expired; its audience was dropped
+        revived = alert.status == EXPIRED and (alert.expires_at is None or alert.expires_at > datetime.utcnow())
+        if revived:
+            alert.status = ACTIVE
         self.db.add(alert)
+        self.db.flush()
+        if ("visibility" in kwargs or revived) and alert.status != EXPIRED:
+            # users who just lost the alert need a new inbox version too; expired alerts keep no
+            # audience (lifecycle.sweep_expired), so their visibility only applies once revived
+            AudienceRepo(self.db).sync_alert(alert)
+        if SCHEDULING_FIELDS.intersection(kwargs):
+            AudienceRepo(self.db).reschedule_alert(alert)
+        if "severity" in kwargs:
+            analytics.move_alert_severity(self.db, alert.id, alert.severity)
+        inbox_versions.bump_alert_audience(self.db, [alert.id])
         self.db.commit()
         self.db.refresh(alert)
         return alert
@@ -26,17 +84,25 @@ class AlertRepo:
     def get(self, alert_id: int):
         return self.db.query(Alert).filter(Alert.id == alert_id).first()
 
-    def list_all(self, filters: dict = None):
+    def list_page(self, filters: dict = None, limit: int = DEFAULT_PAGE_SIZE, after_id: int = 0):
+        """One keyset page of alerts in id order, starting after after_id."""
         q = self.db.query(Alert)
         if filters:
             if "severity" in filters:
                 q = q.filter(Alert.severity == filters["severity"])
             if "status" in filters:
                 q = q.filter(Alert.status == filters["status"])
-        return q.all()
+        return q.filter(Alert.id > after_id).order_by(Alert.id).limit(limit).all()
 
-    def deliveries_for(self, alert_id: int):
-        return self.db.query(NotificationDelivery).filter(NotificationDelivery.alert_id == alert_id).all()
+    def deliveries_for(self, alert_id: int, limit: int = DEFAULT_PAGE_SIZE, after_id: int = 0):
+        """One keyset page of an alert's deliveries in id order, starting after after_id."""
+        return (
+            self.db.query(NotificationDelivery)
+            .filter(NotificationDelivery.alert_id == alert_id, NotificationDelivery.id > after_id)
+            .order_by(NotificationDelivery.id)
+            .limit(limit)
+            .all()
+        )
 
     def get_or_create_pref(self, user_id: int, alert_id: int):
         pref = self.db.query(UserAlertPreference).filter_by(user_id=user_id, alert_id=alert_id).first()
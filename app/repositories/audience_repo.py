@@ -0,0 +1,194 @@
+from app.model import Alert, User, AlertAudience, NotificationDelivery
+from app.services import inbox_versions, membership
+from app.services.lifecycle import EXPIRED, unexpired
+from app.services.visibilty import VisibilityResolver
+from app.config import AUDIENCE_CHUNK_SIZE
+from sqlalchemy import Row, and_, case, delete, func, insert, or_, select, true, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import List, Set
+
+
+def initial_due_at(start_at, reminders_enabled, status):
+    """First reminder time for a new audience row: the alert's start, unless it is not schedulable."""
+    if reminders_enabled is False or (status and status != "active"):
+        return None
+    return start_at or datetime.utcnow()
+
+
+class AudienceRepo:
+    """
+    Maintains the alert_audience table. Methods only stage changes;
+    the caller owns the transaction and commits.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def sync_alert(self, alert: Alert, bump_changed: bool = True, chunk_size: int = AUDIENCE_CHUNK_SIZE) -> int:
+        """
+        Bring an alert's audience rows in line with its visibility and return how many rows were
+        added or removed. Walks the targeted users (cached team arrays, or the users table for
+        org-wide alerts; see app.services.membership) and the existing rows side by side in id
+        order, one window of at most chunk_size ids at a time, so memory stays bounded by the
+        chunk and the cached teams.
+        With bump_changed, the inbox version of every added or removed user is bumped.
+        """
+        targets = membership.TargetedUsers(self.db, alert.visibility)
+        due = initial_due_at(alert.start_at, alert.reminders_enabled, alert.status)
+        changed = 0
+        after = 0
+        while True:
+            desired = targets.window(after, chunk_size)
+            existing = list(self.db.execute(
+                select(AlertAudience.user_id)
+                .where(AlertAudience.alert_id == alert.id, AlertAudience.user_id > after)
+                .order_by(AlertAudience.user_id)
+                .limit(chunk_size)
+            ).scalars())
+            if not desired and not existing:
+                break
+            # the window ends where the shorter-reaching full chunk ends; an exhausted side is unbounded
+            ends = [ids[-1] for ids in (desired, existing) if len(ids) == chunk_size]
+            until = min(ends) if ends else None
+            if until is not None:
+                desired = [uid for uid in desired if uid <= until]
+                existing = [uid for uid in existing if uid <= until]
+            removed = set(existing).difference(desired)
+            added = set(desired).difference(existing)
+            if removed:
+                self.db.execute(
+                    delete(AlertAudience).where(AlertAudience.alert_id == alert.id, AlertAudience.user_id.in_(list(removed)))
+                )
+            if added:
+                self.db.execute(
+                    insert(AlertAudience), [{"alert_id": alert.id, "user_id": uid, "next_due_at": due} for uid in added]
+                )
+            if bump_changed:
+                inbox_versions.bump_users(self.db, removed | added)
+            changed += len(removed) + len(added)
+            if until is None:
+                break
+            after = until
+        return changed
+
+    def add_alerts(self, alerts: List[Row], chunk_size: int = AUDIENCE_CHUNK_SIZE) -> int:
+        """
+        Build the audience of freshly inserted alerts (rows with id, visibility, start_at,
+        reminders_enabled and status; no audience yet) for a whole batch at once:
+        one INSERT ... SELECT for every org-wide alert, and one (cached) membership lookup shared by
+        all team / user targets whose pairs are inserted chunk_size at a time. Returns the rows added.
+        """
+        org_ids = [a.id for a in alerts if (a.visibility or {}).get("org")]
+        targeted = [a for a in alerts if not (a.visibility or {}).get("org")]
+        added = 0
+        if org_ids:
+            due = case((Alert.reminders_enabled == False, None), (Alert.status != "active", None), else_=Alert.start_at)
+            added += self.db.execute(
+                insert(AlertAudience).from_select(
+                    ["alert_id", "user_id", "next_due_at"],
+                    select(Alert.id, User.id, due).join(User, true()).where(Alert.id.in_(org_ids)),
+                )
+            ).rowcount
+        teams = {t for a in targeted for t in (a.visibility or {}).get("teams") or []}
+        listed = {u for a in targeted for u in (a.visibility or {}).get("users") or []}
+        if not teams and not listed:
+            return added
+        members = membership.team_members(self.db, teams)
+        known: Set[int] = set()
+        if listed:
+            known.update(self.db.execute(select(User.id).where(User.id.in_(listed))).scalars())
+        # Core table insert: skips the ORM bulk-insert bookkeeping, which dominates at this row count
+        rows = []
+        for alert in targeted:
+            vis = alert.visibility or {}
+            due = initial_due_at(alert.start_at, alert.reminders_enabled, alert.status)
+            user_ids = {u for t in vis.get("teams") or [] for u in members.get(t, ())}
+            user_ids.update(u for u in vis.get("users") or [] if u in known)
+            for uid in user_ids:
+                rows.append({"alert_id": alert.id, "user_id": uid, "next_due_at": due})
+                if len(rows) == chunk_size:
+                    self.db.execute(insert(AlertAudience.__table__), rows)
+                    added += len(rows)
+                    rows = []
+        if rows:
+            self.db.execute(insert(AlertAudience.__table__), rows)
+            added += len(rows)
+        return added
+
+    def reschedule_alert(self, alert: Alert, chunk_size: int = AUDIENCE_CHUNK_SIZE):
+        """
+        Re-apply an alert's scheduling fields to its audience rows: clear them when reminders
+        are off, otherwise make sure every row is scheduled no earlier than start_at, and move
+        every user who was already sent the alert to their last send plus the current
+        reminder_frequency_minutes (so a shorter frequency takes effect before the old due time).
+        Users are walked chunk_size at a time.
+        """
+        due = initial_due_at(alert.start_at, alert.reminders_enabled, alert.status)
+        q = update(AlertAudience).where(AlertAudience.alert_id == alert.id)
+        if due is None:
+            self.db.execute(q.values(next_due_at=None).execution_options(synchronize_session=False))
+            return
+        q = q.where(or_(AlertAudience.next_due_at == None, AlertAudience.next_due_at < due)).values(next_due_at=due)
+        self.db.execute(q.execution_options(synchronize_session=False))
+        freq_delta = timedelta(minutes=alert.reminder_frequency_minutes or 120)
+        nd = NotificationDelivery
+        after = 0
+        while True:
+            last_sent = self.db.execute(
+                select(AlertAudience.user_id, func.max(nd.sent_at))
+                .join(nd, and_(nd.alert_id == AlertAudience.alert_id, nd.user_id == AlertAudience.user_id))
+                .where(AlertAudience.alert_id == alert.id, AlertAudience.user_id > after)
+                .group_by(AlertAudience.user_id)
+                .order_by(AlertAudience.user_id)
+                .limit(chunk_size)
+            ).all()
+            if last_sent:
+                self.db.execute(update(AlertAudience), [
+                    {"alert_id": alert.id, "user_id": user_id, "next_due_at": max(last + freq_delta, due)}
+                    for user_id, last in last_sent
+                ])
+            if len(last_sent) < chunk_size:
+                return
+            after = last_sent[-1][0]
+
+    def sync_user(self, user: User):
+        """
+        Recompute which alerts a user belongs to, e.g. after their team_id changed. Expired alerts
+        are left out, as lifecycle.sweep_expired drops their audience.
+        """
+        alerts = {
+            alert_id: initial_due_at(start_at, reminders_enabled, status)
+            for alert_id, visibility, start_at, reminders_enabled, status in self.db.query(
+                Alert.id, Alert.visibility, Alert.start_at, Alert.reminders_enabled, Alert.status
+            ).filter(*unexpired(datetime.utcnow()))
+            if VisibilityResolver.matches(visibility, user)
+        }
+        desired = set(alerts)
+        existing = {
+            aid for (aid,) in self.db.query(AlertAudience.alert_id).filter(AlertAudience.user_id == user.id)
+        }
+        removed = existing - desired
+        added = desired - existing
+        if removed:
+            self.db.execute(
+                delete(AlertAudience).where(AlertAudience.user_id == user.id, AlertAudience.alert_id.in_(list(removed)))
+            )
+        if added:
+            self.db.execute(
+                insert(AlertAudience),
+                [{"alert_id": aid, "user_id": user.id, "next_due_at": alerts[aid]} for aid in added],
+            )
+
+    def rebuild_all(self) -> int:
+        """
+        Backfill / repair: resync every alert that has not expired, and drop rows left behind by
+        expired ones. Returns the number of alerts synced.
+        """
+        self.db.execute(delete(AlertAudience).where(
+            AlertAudience.alert_id.in_(select(Alert.id).where(Alert.status == EXPIRED))
+        ))
+        alerts = self.db.query(Alert).filter(*unexpired(datetime.utcnow())).all()
+        for alert in alerts:
+            self.sync_alert(alert)
+        return len(alerts)
@@ -0,0 +1,36 @@
+from app.model import User
+from app.repositories.audience_repo import AudienceRepo
+from app.services import inbox_versions, membership
+from sqlalchemy.orm import Session
+
+
+class UserRepo:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, user_id: int):
+        return self.db.query(User).filter(User.id == user_id).first()
+
+    def create(self, **kwargs) -> User:
+        user = User(**kwargs)
+        self.db.add(user)
+        self.db.flush()
+        AudienceRepo(self.db).sync_user(user)
+        inbox_versions.bump_users(self.db, [user.id])
+        membership.bump(self.db)
+        self.db.commit()
+        self.db.refresh(user)
+        return user
+
+    def update(self, user: User, **kwargs) -> User:
+        for k, v in kwargs.items():
+            setattr(user, k, v)
+        self.db.add(user)
+        if "team_id" in kwargs:
+            self.db.flush()
+            AudienceRepo(self.db).sync_user(user)
+            inbox_versions.bump_users(self.db, [user.id])
+            membership.bump(self.db)
+        self.db.commit()
+        self.db.refresh(user)
+        return user
@@ -1,13 +1,27 @@
 # app/routers/admin.py
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from app.config import ALERT_BULK_MAX_ITEMS
 from app.db import SessionLocal
+from app.repositories import alert_repo
 from app.repositories.alert_repo import AlertRepo
-from app.schemas import AlertCreate, AlertUpdate
+from app.repositories.audience_repo import AudienceRepo
+from app.repositories.user_repo import UserRepo
+from app.schemas import AlertCreate, AlertUpdate, UserUpdate
+from app.services import analytics as analytics_service
+from app.services import export
+from app.services import metrics
+from app.services import retention
+from app.services.membership import membership_cache
 from app.services.reminder_engine import ReminderEngine
-from app.model import User, Alert, NotificationDelivery, UserAlertPreference
-from sqlalchemy import func
+from app.services.scheduler import reminder_scheduler
+from app.model import Alert, DeliveryJob
+from sqlalchemy import func, update
+from datetime import date, datetime
 from typing import Optional
+import json
 
 router = APIRouter()
 
@@ -25,11 +39,78 @@ def create_alert(payload: AlertCreate, is_admin: bool = Depends(require_admin)):
     try:
         repo = AlertRepo(db)
         alert = repo.create(**payload.dict(exclude_unset=True))
+        reminder_scheduler.wake()
         return {"alert_id": alert.id}
     finally:
         db.close()
 
 
+# placeholder for an NDJSON line that is not JSON; reported as that item's error
+_INVALID_JSON = object()
+
+
+async def _bulk_items(request: Request) -> list:
+    """Raw items of a bulk body: NDJSON (parsed line by line as it streams in) or a JSON array."""
+    if "ndjson" not in request.headers.get("content-type", ""):
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(400, "body is not valid JSON")
+        if not isinstance(items, list):
+            raise HTTPException(400, "expected a JSON array of alerts")
+        return items
+    items, pending = [], b""
+    async for chunk in request.stream():
+        *lines, pending = (pending + chunk).split(b"\n")
+        items.extend(_ndjson_item(line) for line in lines if line.strip())
+        if len(items) > ALERT_BULK_MAX_ITEMS:
+            break
+    if pending.strip():
+        items.append(_ndjson_item(pending))
+    return items
+
+
+def _ndjson_item(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return _INVALID_JSON
+
+
+@router.post("/alerts/bulk")
+async def create_alerts_bulk(request: Request, is_admin: bool = Depends(require_admin)):
+    """
+    Create many alerts in one transaction. Each item is validated against AlertCreate; valid
+    items are inserted and the response lists {"index", "alert_id"} or {"index", "errors"} per item.
+    """
+    items = await _bulk_items(request)
+    if len(items) > ALERT_BULK_MAX_ITEMS:
+        raise HTTPException(413, f"at most {ALERT_BULK_MAX_ITEMS} alerts per request")
+    results, valid = [], []
+    for index, item in enumerate(items):
+        if item is _INVALID_JSON:
+            results.append({"index": index, "errors": [{"loc": [], "msg": "invalid JSON", "type": "value_error.json"}]})
+            continue
+        try:
+            valid.append((index, AlertCreate.parse_obj(item).dict()))
+        except ValidationError as ex:
+            results.append({"index": index, "errors": ex.errors()})
+    if valid:
+        ids = await run_in_threadpool(_create_many, [payload for _, payload in valid])
+        results.extend({"index": index, "alert_id": alert_id} for (index, _), alert_id in zip(valid, ids))
+        reminder_scheduler.wake()
+    results.sort(key=lambda r: r["index"])
+    return {"created": len(valid), "failed": len(items) - len(valid), "results": results}
+
+
+def _create_many(payloads: list) -> list:
+    db = SessionLocal()
+    try:
+        return AlertRepo(db).create_many(payloads)
+    finally:
+        db.close()
+
+
 @router.put("/alerts/{alert_id}")
 def update_alert(alert_id: int, payload: AlertUpdate, is_admin: bool = Depends(require_admin)):
     db = SessionLocal()
@@ -39,13 +120,21 @@ def update_alert(alert_id: int, payload: AlertUpdate, is_admin: bool = Depends(r
         if not a:
             raise HTTPException(404, "Not found")
         updated = repo.update(a, **payload.dict(exclude_unset=True))
+        reminder_scheduler.wake()
         return {"alert_id": updated.id}
     finally:
         db.close()
 
 
 @router.get("/alerts")
-def list_alerts(is_admin: bool = Depends(require_admin), severity: Optional[str] = None, status: Optional[str] = None):
+def list_alerts(
+    is_admin: bool = Depends(require_admin),
+    severity: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(alert_repo.DEFAULT_PAGE_SIZE, ge=1, le=alert_repo.MAX_PAGE_SIZE),
+    cursor: Optional[int] = None,
+):
+    """Keyset-paginated by id; pass next_cursor back as cursor for the following page."""
     db = SessionLocal()
     try:
         repo = AlertRepo(db)
@@ -54,8 +143,76 @@ def list_alerts(is_admin: bool = Depends(require_admin), severity: Optional[str]
             filters["severity"] = severity
         if status:
             filters["status"] = status
-        alerts = repo.list_all(filters)
-        return {"alerts": [{"id": a.id, "title": a.title, "severity": a.severity, "status": a.status} for a in alerts]}
+        alerts = repo.list_page(filters, limit=limit, after_id=cursor or 0)
+        return {
+            "alerts": [{"id": a.id, "title": a.title, "severity": a.severity, "status": a.status} for a in alerts],
+            "next_cursor": alerts[-1].id if len(alerts) == limit else None,
+        }
+    finally:
+        db.close()
+
+
+@router.get("/alerts/{alert_id}/deliveries")
+def list_deliveries(
+    alert_id: int,
+    is_admin: bool = Depends(require_admin),
+    limit: int = Query(alert_repo.DEFAULT_PAGE_SIZE, ge=1, le=alert_repo.MAX_PAGE_SIZE),
+    cursor: Optional[int] = None,
+):
+    db = SessionLocal()
+    try:
+        deliveries = AlertRepo(db).deliveries_for(alert_id, limit=limit, after_id=cursor or 0)
+        return {
+            "deliveries": [
+                {"id": d.id, "user_id": d.user_id, "sent_at": d.sent_at, "channel": d.channel,
+                 "delivered": d.delivered, "read": d.read}
+                for d in deliveries
+            ],
+            "next_cursor": deliveries[-1].id if len(deliveries) == limit else None,
+        }
+    finally:
+        db.close()
+
+
+@router.get("/export/{dataset}")
+def export_dataset(
+    dataset: str,
+    is_admin: bool = Depends(require_admin),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    alert_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+):
+    """Stream a whole dataset (alerts, deliveries, preferences) in id order as NDJSON or CSV."""
+    if dataset not in export.DATASETS:
+        raise HTTPException(404, f"unknown dataset {dataset!r}")
+    lines = export.stream(SessionLocal(), dataset, format, alert_id=alert_id, user_id=user_id, since=since, until=until)
+    return StreamingResponse(lines, media_type=export.FORMATS[format],
+                             headers={"Content-Disposition": f'attachment; filename="{dataset}.{format}"'})
+
+
+@router.put("/users/{user_id}")
+def update_user(user_id: int, payload: UserUpdate, is_admin: bool = Depends(require_admin)):
+    db = SessionLocal()
+    try:
+        repo = UserRepo(db)
+        u = repo.get(user_id)
+        if not u:
+            raise HTTPException(404, "Not found")
+        updated = repo.update(u, **payload.dict(exclude_unset=True))
+        return {"user_id": updated.id, "team_id": updated.team_id}
+    finally:
+        db.close()
+
+
+@router.post("/audience/rebuild")
+def rebuild_audience(is_admin: bool = Depends(require_admin)):
+    db = SessionLocal()
+    try:
+        alerts = AudienceRepo(db).rebuild_all()
+        db.commit()
+        return {"detail": "audience rebuilt", "alerts": alerts, "membership_cache": membership_cache.stats()}
     finally:
         db.close()
 
@@ -67,24 +224,114 @@ def trigger_reminders(is_admin: bool = Depends(require_admin)):
     return {"detail": "reminder cycle executed", "stats": stats}
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint(is_admin: bool = Depends(require_admin)):
+    """Request, SQL and reminder-cycle histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.post("/retention/run")
+def run_retention(is_admin: bool = Depends(require_admin), dry_run: bool = False):
+    db = SessionLocal()
+    try:
+        stats = retention.archive_deliveries(db, dry_run=dry_run)
+        return {"detail": "retention run complete", "stats": stats}
+    except retention.RetentionLocked as exc:
+        raise HTTPException(409, str(exc))
+    finally:
+        db.close()
+
+
+@router.get("/archive/deliveries")
+def archived_deliveries(
+    is_admin: bool = Depends(require_admin),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    alert_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    channel: Optional[str] = None,
+):
+    """Archived delivery history as NDJSON, streamed file by file (sent day ascending)."""
+    records = retention.iter_archived(since=since, until=until, alert_id=alert_id, user_id=user_id, channel=channel)
+    return StreamingResponse((json.dumps(record) + "\n" for record in records), media_type="application/x-ndjson")
+
+
+@router.get("/outbox")
+def outbox_status(is_admin: bool = Depends(require_admin)):
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(DeliveryJob.channel, DeliveryJob.status, func.count(DeliveryJob.id))
+            .group_by(DeliveryJob.channel, DeliveryJob.status)
+            .all()
+        )
+        outbox = {}
+        for channel, status, count in rows:
+            outbox.setdefault(channel, {})[status] = count
+        return {"outbox": outbox}
+    finally:
+        db.close()
+
+
+@router.post("/outbox/requeue_dead")
+def requeue_dead(is_admin: bool = Depends(require_admin), channel: Optional[str] = None):
+    db = SessionLocal()
+    try:
+        q = update(DeliveryJob).where(DeliveryJob.status == "dead")
+        if channel:
+            q = q.where(DeliveryJob.channel == channel)
+        result = db.execute(q.values(status="pending", attempts=0, next_attempt_at=datetime.utcnow()))
+        db.commit()
+        return {"detail": "dead jobs requeued", "requeued": result.rowcount}
+    finally:
+        db.close()
+
+
 @router.get("/analytics")
-def analytics(is_admin: bool = Depends(require_admin)):
+def analytics(
+    is_admin: bool = Depends(require_admin),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    alert_id: Optional[int] = None,
+    by_alert: bool = False,
+):
     db = SessionLocal()
     try:
         total_alerts = db.query(func.count(Alert.id)).scalar() or 0
-        deliveries_total = db.query(func.count(NotificationDelivery.id)).scalar() or 0
-        reads_total = db.query(func.count(NotificationDelivery.id)).filter(NotificationDelivery.read == True).scalar() or 0
-        snoozes = db.query(func.count(UserAlertPreference.id)).filter(UserAlertPreference.snoozed_until != None).scalar() or 0
-
         by_severity = db.query(Alert.severity, func.count(Alert.id)).group_by(Alert.severity).all()
         severity_breakdown = {s.value if hasattr(s, "value") else s: c for s, c in by_severity}
 
+        # delivery / read / snooze counts come from the incrementally maintained rollups
+        rollups = analytics_service.summary(db, since=since, until=until, alert_id=alert_id, by_alert=by_alert)
+        totals = rollups["totals"]
+
         return {
             "total_alerts": total_alerts,
-            "deliveries_total": deliveries_total,
-            "reads_total": reads_total,
-            "snoozes_total": snoozes,
+            "deliveries_total": totals["deliveries"],
+            "reads_total": totals["reads"],
+            "snoozes_total": totals["snoozes"],
             "by_severity": severity_breakdown,
+            "breakdown": {k: v for k, v in rollups.items() if k != "totals"},
         }
     finally:
         db.close()
+
+
+@router.post("/analytics/rebuild")
+def rebuild_analytics(is_admin: bool = Depends(require_admin)):
+    db = SessionLocal()
+    try:
+        rows = analytics_service.rebuild_rollups(db)
+        return {"detail": "analytics rollups rebuilt", "rows": rows}
+    finally:
+        db.close()
+
+
+@router.get("/analytics/verify")
+def verify_analytics(is_admin: bool = Depends(require_admin)):
+    db = SessionLocal()
+    try:
+        mismatches = analytics_service.verify_rollups(db)
+        return {"consistent": not mismatches, "mismatches": mismatches}
+    finally:
+        db.close()
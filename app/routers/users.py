@@ -1,49 +1,86 @@
 # app/routers/user.py
-from fastapi import APIRouter, HTTPException
-from app.db import SessionLocal
-from app.model import User, Alert, NotificationDelivery, UserAlertPreference
+from fastapi import APIRouter, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.config import STREAM_HEARTBEAT_SECONDS
+from app.db import AsyncSessionLocal, SessionLocal
+from app.model import User, UserAlertPreference
+from app.schemas import BulkAlertAction, Severity
+from app.services import inbox, inbox_versions
+from app.services.inbox_cache import inbox_cache
 from app.services.preference_service import PreferenceService
-from datetime import date
+from app.services.inbox_hub import inbox_hub
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+from typing import Optional
+import asyncio
+import json
 
 router = APIRouter()
 
 
-@router.get("/{user_id}/alerts")
-def get_user_alerts(user_id: int):
+def _render_inbox(db: Session, response: Response, if_none_match: Optional[str], user_id: int, limit: int,
+                  cursor: Optional[str], unread: Optional[bool], snoozed: Optional[bool],
+                  severity: Optional[str], include_body: bool):
+    now = datetime.utcnow()
+    today = date.today()
+    key = inbox_versions.params_key(limit=limit, cursor=cursor, unread=unread, snoozed=snoozed,
+                                    severity=severity, include_body=include_body)
+    # conditional GET: a single primary-key lookup (user and version) when the client is up to date
+    version = inbox_versions.current_version(db, user_id)
+    if version is None:
+        raise HTTPException(404, "user not found")
+    etag = inbox_versions.matching_etag(if_none_match, version, key, today, now)
+    if etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    cache_key = (user_id, version, key, today)
+    cached = inbox_cache.get(cache_key)
+    if cached is not None and (cached[1] is None or now < cached[1]):
+        page, valid_until = cached
+    else:
+        try:
+            page = inbox.fetch_page(
+                db, user_id, limit=limit, cursor=cursor, include_body=include_body,
+                unread=unread, snoozed=snoozed, severity=severity,
+            )
+        except ValueError:
+            raise HTTPException(400, "invalid cursor")
+        valid_until = inbox_versions.next_transition(db, user_id, now)
+        inbox_cache.put(cache_key, (page, valid_until))
+    response.headers["ETag"] = inbox_versions.make_etag(version, key, today, valid_until)
+    return page
+
+
+def _render_inbox_sync(*args):
     db = SessionLocal()
     try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise HTTPException(404, "user not found")
-        # compute active alerts for user
-        alerts = db.query(Alert).filter(Alert.status == "active").all()
-        user_alerts = []
-        for a in alerts:
-            vis = a.visibility or {}
-            send = False
-            if vis.get("org"):
-                send = True
-            if user.id in (vis.get("users") or []):
-                send = True
-            if user.team_id and user.team_id in (vis.get("teams") or []):
-                send = True
-            if not send:
-                continue
-            pref = db.query(UserAlertPreference).filter_by(user_id=user.id, alert_id=a.id).first()
-            snoozed = pref.snoozed_until == date.today() if pref and pref.snoozed_until else False
-            user_alerts.append({
-                "id": a.id,
-                "title": a.title,
-                "body": a.body,
-                "severity": a.severity,
-                "snoozed": snoozed,
-                "read": pref.read if pref else False
-            })
-        return {"alerts": user_alerts}
+        return _render_inbox(db, *args)
     finally:
         db.close()
 
 
+@router.get("/{user_id}/alerts")
+async def get_user_alerts(
+    request: Request,
+    response: Response,
+    user_id: int,
+    limit: int = Query(inbox.DEFAULT_PAGE_SIZE, ge=1, le=inbox.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    unread: Optional[bool] = None,
+    snoozed: Optional[bool] = None,
+    severity: Optional[Severity] = None,
+    include_body: bool = True,
+):
+    args = (response, request.headers.get("if-none-match"), user_id, limit, cursor, unread, snoozed,
+            severity.value if severity else None, include_body)
+    if AsyncSessionLocal is not None:
+        # async driver available: run on the event loop without occupying a worker thread
+        async with AsyncSessionLocal() as adb:
+            return await adb.run_sync(_render_inbox, *args)
+    return await run_in_threadpool(_render_inbox_sync, *args)
+
+
 @router.post("/{user_id}/alerts/{alert_id}/snooze")
 def snooze(user_id: int, alert_id: int):
     svc = PreferenceService()
@@ -65,6 +102,35 @@ def mark_unread(user_id: int, alert_id: int):
     return {"detail": "marked unread"}
 
 
+def _bulk_target(payload: BulkAlertAction):
+    if payload.all:
+        return None
+    if payload.alert_ids is None:
+        raise HTTPException(400, "pass alert_ids or all=true")
+    return payload.alert_ids
+
+
+@router.post("/{user_id}/alerts/snooze")
+def snooze_many(user_id: int, payload: BulkAlertAction):
+    svc = PreferenceService()
+    changed = svc.snooze_many_for_today(user_id, _bulk_target(payload))
+    return {"detail": "snoozed", "alert_ids": changed}
+
+
+@router.post("/{user_id}/alerts/read")
+def mark_read_many(user_id: int, payload: BulkAlertAction):
+    svc = PreferenceService()
+    changed = svc.mark_read_many(user_id, _bulk_target(payload))
+    return {"detail": "marked read", "alert_ids": changed}
+
+
+@router.post("/{user_id}/alerts/unread")
+def mark_unread_many(user_id: int, payload: BulkAlertAction):
+    svc = PreferenceService()
+    changed = svc.mark_unread_many(user_id, _bulk_target(payload))
+    return {"detail": "marked unread", "alert_ids": changed}
+
+
 @router.get("/{user_id}/alerts/snooze_history")
 def snooze_history(user_id: int):
     db = SessionLocal()
@@ -73,3 +139,69 @@ def snooze_history(user_id: int):
         return {"history": [{"alert_id": p.alert_id, "snoozed_until": p.snoozed_until, "read": p.read} for p in prefs]}
     finally:
         db.close()
+
+
+def _user_exists(user_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return db.query(User.id).filter(User.id == user_id).first() is not None
+    finally:
+        db.close()
+
+
+@router.websocket("/{user_id}/stream")
+async def stream_ws(websocket: WebSocket, user_id: int):
+    if not await run_in_threadpool(_user_exists, user_id):
+        await websocket.close(code=1008, reason="user not found")
+        return
+    await websocket.accept()
+    sub = inbox_hub.subscribe(user_id)
+    # watch the receive side too, so a client that goes away is noticed without waiting for a message
+    receiver = asyncio.ensure_future(websocket.receive())
+    try:
+        while True:
+            getter = asyncio.ensure_future(sub.queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                if receiver.result()["type"] == "websocket.disconnect":
+                    return
+                receiver = asyncio.ensure_future(websocket.receive())
+                continue
+            payload = getter.result()
+            if payload is None:
+                await websocket.close(code=1013, reason="slow consumer")
+                return
+            await websocket.send_json(payload)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        inbox_hub.unsubscribe(sub)
+
+
+@router.get("/{user_id}/stream")
+async def stream_sse(request: Request, user_id: int):
+    """Server-Sent Events fallback for clients that cannot use WebSockets."""
+    if not await run_in_threadpool(_user_exists, user_id):
+        raise HTTPException(404, "user not found")
+    sub = inbox_hub.subscribe(user_id)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    payload = await asyncio.wait_for(sub.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload is None:
+                    yield "event: close\ndata: slow consumer\n\n"
+                    return
+                yield f"event: alert\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            inbox_hub.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -33,6 +33,15 @@ class AlertUpdate(BaseModel):
     visibility: Optional[Dict]
 
 
+class UserUpdate(BaseModel):
+    team_id: Optional[int]
+
+
+class BulkAlertAction(BaseModel):
+    alert_ids: Optional[List[int]]
+    all: bool = False
+
+
 class UserActionResponse(BaseModel):
     success: bool
     detail: Optional[str]
\ No newline at end of file
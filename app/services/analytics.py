@@ -0,0 +1,213 @@
+# app/services/analytics.py
+"""
+Incrementally maintained analytics counters (analytics_rollups).
+
+Write paths call record_* inside their own transaction, so counters commit or roll back
+together with the rows they describe. rebuild_rollups() recomputes everything from raw rows
+for backfill; verify_rollups() reports drift without writing.
+
+    python -m app.services.analytics rebuild
+    python -m app.services.analytics verify
+"""
+import sys
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.model import Alert, AnalyticsRollup, NotificationDelivery, UserAlertPreference
+from app.services import retention
+
+COUNTERS = ("deliveries", "reads", "snoozes")
+# reads and snoozes happen in the in-app inbox
+INBOX_CHANNEL = "inapp"
+
+RollupKey = Tuple[date, int, str, str]
+
+
+def _severity(value) -> str:
+    return value.value if hasattr(value, "value") else (value or "info")
+
+
+def _as_date(value) -> date:
+    # func.date() returns a string on SQLite and a date on PostgreSQL
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _bump(db: Session, rows: list):
+    """Upsert counter increments; rows are dicts with the key columns plus any of COUNTERS."""
+    if not rows:
+        return
+    insert_ = dialect_insert(db)
+    stmt = insert_(AnalyticsRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "alert_id", "severity", "channel"],
+        set_={c: getattr(AnalyticsRollup, c) + getattr(stmt.excluded, c) for c in COUNTERS},
+    )
+    db.execute(stmt, [{**{c: 0 for c in COUNTERS}, **row} for row in rows])
+
+
+def record_deliveries(db: Session, alert, channel: str, count: int, when: Optional[datetime] = None):
+    if count:
+        day = (when or datetime.utcnow()).date()
+        _bump(db, [{"day": day, "alert_id": alert.id, "severity": _severity(alert.severity), "channel": channel,
+                    "deliveries": count}])
+
+
+def record_inbox_events(db: Session, counter: str, alert_counts: Dict[int, int], day: Optional[date] = None):
+    """Add read or snooze events for one or more alerts (alert_id -> count)."""
+    alert_counts = {aid: n for aid, n in alert_counts.items() if n}
+    if not alert_counts:
+        return
+    day = day or date.today()
+    severities = dict(db.query(Alert.id, Alert.severity).filter(Alert.id.in_(list(alert_counts))))
+    _bump(db, [
+        {"day": day, "alert_id": aid, "severity": _severity(severities[aid]), "channel": INBOX_CHANNEL, counter: n}
+        for aid, n in alert_counts.items()
+        if aid in severities
+    ])
+
+
+def move_alert_severity(db: Session, alert_id: int, severity):
+    """
+    Re-bucket an alert's rollups under its new severity: compute_from_raw keys every event on
+    the alert's current severity, so the counters follow it (merged into any rows already there).
+    """
+    severity = _severity(severity)
+    counters = [getattr(AnalyticsRollup, c) for c in COUNTERS]
+    stale = db.execute(
+        select(AnalyticsRollup.id, AnalyticsRollup.day, AnalyticsRollup.channel, *counters)
+        .where(AnalyticsRollup.alert_id == alert_id, AnalyticsRollup.severity != severity)
+    ).all()
+    if not stale:
+        return
+    db.execute(delete(AnalyticsRollup).where(AnalyticsRollup.id.in_([r.id for r in stale])))
+    _bump(db, [
+        {"day": r.day, "alert_id": alert_id, "severity": severity, "channel": r.channel,
+         **{c: getattr(r, c) for c in COUNTERS}}
+        for r in stale
+    ])
+
+
+def compute_from_raw(db: Session) -> Dict[RollupKey, Dict[str, int]]:
+    """
+    Recompute rollups from notification_deliveries (plus the rows retention moved to the archive)
+    and user_alert_preferences. Preference rows only keep their latest state, so reads/snoozes are counted on the day of the
+    current read_at / snoozed_until; PreferenceService keeps the rollups to the same definition.
+    """
+    totals: Dict[RollupKey, Dict[str, int]] = defaultdict(lambda: {c: 0 for c in COUNTERS})
+    severities = {aid: _severity(sev) for aid, sev in db.query(Alert.id, Alert.severity)}
+
+    day = func.date(NotificationDelivery.sent_at)
+    for d, alert_id, channel, n in (
+        db.query(day, NotificationDelivery.alert_id, NotificationDelivery.channel, func.count(NotificationDelivery.id))
+        .group_by(day, NotificationDelivery.alert_id, NotificationDelivery.channel)
+    ):
+        if alert_id in severities and d is not None:
+            totals[(_as_date(d), alert_id, severities[alert_id], channel)]["deliveries"] += n
+    for record in retention.iter_archived():
+        if record["alert_id"] in severities:
+            key = (date.fromisoformat(record["sent_at"][:10]), record["alert_id"], severities[record["alert_id"]],
+                   record["channel"])
+            totals[key]["deliveries"] += 1
+
+    read_day = func.date(UserAlertPreference.read_at)
+    for d, alert_id, n in (
+        db.query(read_day, UserAlertPreference.alert_id, func.count(UserAlertPreference.id))
+        .filter(UserAlertPreference.read == True, UserAlertPreference.read_at != None)
+        .group_by(read_day, UserAlertPreference.alert_id)
+    ):
+        if alert_id in severities:
+            totals[(_as_date(d), alert_id, severities[alert_id], INBOX_CHANNEL)]["reads"] += n
+
+    for d, alert_id, n in (
+        db.query(UserAlertPreference.snoozed_until, UserAlertPreference.alert_id, func.count(UserAlertPreference.id))
+        .filter(UserAlertPreference.snoozed_until != None)
+        .group_by(UserAlertPreference.snoozed_until, UserAlertPreference.alert_id)
+    ):
+        if alert_id in severities:
+            totals[(d, alert_id, severities[alert_id], INBOX_CHANNEL)]["snoozes"] += n
+    return totals
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Replace all rollups with values recomputed from raw rows. Returns the number of rollup rows."""
+    totals = compute_from_raw(db)
+    db.execute(delete(AnalyticsRollup))
+    rows = [
+        {"day": d, "alert_id": alert_id, "severity": severity, "channel": channel, **counts}
+        for (d, alert_id, severity, channel), counts in totals.items()
+    ]
+    if rows:
+        db.execute(insert(AnalyticsRollup), rows)
+    db.commit()
+    return len(rows)
+
+
+def verify_rollups(db: Session) -> Dict[str, dict]:
+    """Compare stored rollups with a fresh recomputation; returns {key: {"stored", "raw"}} for mismatches."""
+    raw = compute_from_raw(db)
+    stored = {
+        (r.day, r.alert_id, r.severity, r.channel): {c: getattr(r, c) for c in COUNTERS}
+        for r in db.query(AnalyticsRollup)
+    }
+    zero = {c: 0 for c in COUNTERS}
+    return {
+        "|".join(map(str, key)): {"stored": stored.get(key, zero), "raw": raw.get(key, zero)}
+        for key in set(raw) | set(stored)
+        if stored.get(key, zero) != raw.get(key, zero)
+    }
+
+
+def summary(db: Session, since: Optional[date] = None, until: Optional[date] = None,
+            alert_id: Optional[int] = None, by_alert: bool = False) -> dict:
+    """Totals and breakdowns read from rollups only; cost depends on the range, not on delivery history."""
+    filters = []
+    if since:
+        filters.append(AnalyticsRollup.day >= since)
+    if until:
+        filters.append(AnalyticsRollup.day <= until)
+    if alert_id is not None:
+        filters.append(AnalyticsRollup.alert_id == alert_id)
+    sums = [func.coalesce(func.sum(getattr(AnalyticsRollup, c)), 0) for c in COUNTERS]
+
+    def grouped(column):
+        return {
+            (key.isoformat() if isinstance(key, date) else key): dict(zip(COUNTERS, values))
+            for key, *values in db.query(column, *sums).filter(*filters).group_by(column).order_by(column)
+        }
+
+    totals = dict(zip(COUNTERS, db.query(*sums).filter(*filters).one()))
+    result = {
+        "totals": totals,
+        "by_day": grouped(AnalyticsRollup.day),
+        "by_severity": grouped(AnalyticsRollup.severity),
+        "by_channel": grouped(AnalyticsRollup.channel),
+    }
+    if by_alert:
+        result["by_alert"] = grouped(AnalyticsRollup.alert_id)
+    return result
+
+
+if __name__ == "__main__":
+    from app.db import SessionLocal, init_db
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    init_db()
+    session = SessionLocal()
+    try:
+        if command == "rebuild":
+            print(f"rebuilt {rebuild_rollups(session)} rollup rows")
+        elif command == "verify":
+            mismatches = verify_rollups(session)
+            for key, values in sorted(mismatches.items()):
+                print(key, values)
+            print(f"{len(mismatches)} mismatching rollup rows")
+            sys.exit(1 if mismatches else 0)
+        else:
+            sys.exit(f"unknown command {command!r}; use 'rebuild' or 'verify'")
+    finally:
+        session.close()
@@ -1,17 +1,82 @@
 from app.services.delivery.strategy import DeliveryStrategy
-from app.db import SessionLocal
 from app.model import NotificationDelivery
+from app.services import inbox_versions
+from app.services.analytics import record_deliveries
+from app.services.inbox_hub import inbox_hub
+from sqlalchemy import insert
 from datetime import datetime
+from collections import Counter
 
 
 class InAppStrategy(DeliveryStrategy):
-    def __init__(self, db):
+    combines_digests = True
+
+    def __init__(self, db, hub=inbox_hub):
         self.db = db
+        self.hub = hub
+
+    @staticmethod
+    def payload(alert, sent_at: datetime) -> dict:
+        severity = alert.severity.value if hasattr(alert.severity, "value") else alert.severity
+        return {
+            "type": "alert",
+            "alert_id": alert.id,
+            "title": alert.title,
+            "body": alert.body,
+            "severity": severity,
+            "sent_at": sent_at.isoformat(),
+        }
+
+    def send(self, alert, user):
+        nd = NotificationDelivery(alert_id=alert.id, user_id=user.id, sent_at=datetime.utcnow(), channel="inapp")
+        self.db.add(nd)
+        record_deliveries(self.db, alert, "inapp", 1, nd.sent_at)
+        inbox_versions.bump_users(self.db, [user.id])
+        self.db.commit()
+        # push to connected /stream clients
+        self.hub.publish([user.id], self.payload(alert, nd.sent_at))
+        return nd
 
+    def send_batch(self, alert, users) -> int:
+        """
+        Record deliveries for all users with one multi-row INSERT and a single commit
+        (the analytics rollup is bumped in the same transaction).
+        """
+        now = datetime.utcnow()
+        rows = [
+            {"alert_id": alert.id, "user_id": user.id, "sent_at": now, "channel": "inapp", "delivered": True, "read": False}
+            for user in users
+        ]
+        if not rows:
+            return 0
+        self.db.execute(insert(NotificationDelivery), rows)
+        record_deliveries(self.db, alert, "inapp", len(rows), now)
+        inbox_versions.bump_users(self.db, [user.id for user in users])
+        self.db.commit()
+        self.hub.publish([user.id for user in users], self.payload(alert, now))
+        return len(rows)
 
-def send(self, alert, user):
-    nd = NotificationDelivery(alert_id=alert.id, user_id=user.id, sent_at=datetime.utcnow(), channel="inapp")
-    self.db.add(nd)
-    self.db.commit()
-    # In a real app, you would publish to a websocket or push channel here
-    return nd
\ No newline at end of file
+    def send_digest(self, digests) -> int:
+        """
+        One delivery row per (alert, user), written with one multi-row INSERT and one commit;
+        each user gets a single "digest" message on their stream.
+        """
+        now = datetime.utcnow()
+        rows = [
+            {"alert_id": alert.id, "user_id": user.id, "sent_at": now, "channel": "inapp", "delivered": True, "read": False}
+            for user, alerts in digests
+            for alert in alerts
+        ]
+        if not rows:
+            return 0
+        self.db.execute(insert(NotificationDelivery), rows)
+        per_alert = Counter(row["alert_id"] for row in rows)
+        alerts = {alert.id: alert for _, user_alerts in digests for alert in user_alerts}
+        for alert_id, count in per_alert.items():
+            record_deliveries(self.db, alerts[alert_id], "inapp", count, now)
+        inbox_versions.bump_users(self.db, [user.id for user, _ in digests])
+        self.db.commit()
+        for user, user_alerts in digests:
+            self.hub.publish([user.id], {"type": "digest", "sent_at": now.isoformat(),
+                                         "alerts": [self.payload(alert, now) for alert in user_alerts]})
+        return len(rows)
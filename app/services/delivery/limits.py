@@ -0,0 +1,178 @@
+# app/services/delivery/limits.py
+"""
+Per-channel admission control for the reminder engine.
+
+A limited channel has a token bucket (sustained sends per second plus a burst) and / or a cap
+on sends in flight; for queued channels those are the outbox jobs not finished yet. Before a
+chunk is claimed the engine asks for room on every channel of the alert; recipients that do
+not fit are not claimed and stay due, rescheduled to when tokens should be back. Buckets live
+in the process, so every process that runs reminder cycles gets the configured rate;
+ReminderEngine.run_parallel splits it across its workers (ChannelLimit.split).
+
+    CHANNEL_RATE_LIMITS="webhook=20/200,email=5"   # per second [/ burst, defaults to the rate]
+    CHANNEL_MAX_IN_FLIGHT="webhook=1000"
+"""
+import math
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from app.config import CHANNEL_DEFER_SECONDS, CHANNEL_MAX_IN_FLIGHT, CHANNEL_RATE_LIMITS
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst or rate
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> int:
+        with self._lock:
+            self._refill()
+            return int(self._tokens)
+
+    def take(self, n: int) -> int:
+        """Take up to n whole tokens; returns how many were granted."""
+        with self._lock:
+            self._refill()
+            granted = max(0, min(n, int(self._tokens)))
+            self._tokens -= granted
+            return granted
+
+    def wait_seconds(self, n: int = 1) -> float:
+        """Time until n tokens are available."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (min(n, self.burst) - self._tokens) / self.rate)
+
+
+class ChannelLimit:
+    def __init__(self, channel: str, rate: Optional[float] = None, burst: Optional[float] = None,
+                 max_in_flight: Optional[int] = None):
+        self.channel = channel
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.max_in_flight = max_in_flight
+
+    def split(self, workers: int) -> "ChannelLimit":
+        """
+        This limit's share for one of `workers` processes: rate and burst divided between them
+        (at least one token of burst each). The in-flight cap is left whole, as every process
+        counts the same outbox jobs.
+        """
+        if self.bucket is None:
+            return ChannelLimit(self.channel, max_in_flight=self.max_in_flight)
+        workers = max(1, workers)
+        return ChannelLimit(self.channel, self.bucket.rate / workers, max(1.0, self.bucket.burst / workers),
+                            self.max_in_flight)
+
+    def __reduce__(self):
+        # pickled by settings (e.g. for ReminderEngine.run_parallel); the copy starts with a full bucket
+        rate, burst = (self.bucket.rate, self.bucket.burst) if self.bucket is not None else (None, None)
+        return ChannelLimit, (self.channel, rate, burst, self.max_in_flight)
+
+
+def parse_limits(rates: str = CHANNEL_RATE_LIMITS, in_flight: str = CHANNEL_MAX_IN_FLIGHT) -> Dict[str, ChannelLimit]:
+    """Build the limits from the "channel=value,..." settings; raises ValueError on a malformed entry."""
+    def entries(raw: str):
+        for item in filter(None, (part.strip() for part in raw.split(","))):
+            channel, _, value = item.partition("=")
+            if not value:
+                raise ValueError(f"expected channel=value, got {item!r}")
+            yield channel.strip(), value.strip()
+
+    settings: Dict[str, dict] = {}
+    for channel, value in entries(rates):
+        rate, _, burst = value.partition("/")
+        settings.setdefault(channel, {}).update(rate=float(rate), burst=float(burst) if burst else None)
+    for channel, value in entries(in_flight):
+        settings.setdefault(channel, {})["max_in_flight"] = int(value)
+    return {channel: ChannelLimit(channel, **kwargs) for channel, kwargs in settings.items()}
+
+
+channel_limits = parse_limits()
+
+
+class Admission:
+    """
+    One reminder cycle's view of the channel limits: grants chunks against the buckets and the
+    in-flight caps, and counts what was deferred. Channels without a limit always admit everything.
+    """
+
+    def __init__(self, limits: Dict[str, ChannelLimit], strategies: Dict[str, object]):
+        self.limits = {channel: limit for channel, limit in limits.items() if channel in strategies}
+        self.strategies = strategies
+        # in-flight work is read once per cycle and then tracked locally
+        self.in_flight = {channel: strategies[channel].in_flight() for channel in strategies}
+        self.deferred: Counter = Counter()
+
+    def _room(self, channel: str) -> float:
+        limit = self.limits.get(channel)
+        if limit is None:
+            return math.inf
+        room = math.inf
+        if limit.bucket is not None:
+            room = limit.bucket.available()
+        if limit.max_in_flight is not None:
+            room = min(room, max(0, limit.max_in_flight - self.in_flight[channel]))
+        return room
+
+    def admit(self, channels: Iterable[str], n: int) -> int:
+        """How many of n recipients may be sent on all of `channels` now; their tokens are taken."""
+        channels = [c for c in set(channels) if c in self.strategies]
+        for channel in channels:
+            n = min(n, self._room(channel))
+        n = int(n)
+        for channel in channels:
+            limit = self.limits.get(channel)
+            if limit is not None and limit.bucket is not None:
+                limit.bucket.take(n)
+            self.in_flight[channel] += n
+        return n
+
+    def exhausted(self, channels: Iterable[str]) -> bool:
+        return any(self._room(c) < 1 for c in channels if c in self.strategies)
+
+    def sent(self, channel: str, n: int):
+        """Sends on a synchronous channel are finished once send returns; queued ones stay in flight."""
+        if not getattr(self.strategies[channel], "queued", False):
+            self.in_flight[channel] -= n
+
+    def defer(self, channels: Iterable[str], n: int):
+        for channel in set(channels):
+            if channel in self.strategies:
+                self.deferred[channel] += n
+
+    def retry_at(self, channels: Iterable[str], now: datetime) -> datetime:
+        """When deferred recipients of these channels are due again."""
+        wait = CHANNEL_DEFER_SECONDS
+        for channel in channels:
+            limit = self.limits.get(channel)
+            if limit is not None and limit.bucket is not None:
+                wait = max(wait, limit.bucket.wait_seconds())
+        return now + timedelta(seconds=wait)
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Per channel: sends deferred this cycle (recipients, or users in digest mode), in flight,
+        tokens left and queue depth (in flight + deferred).
+        """
+        out = {}
+        for channel in self.strategies:
+            limit = self.limits.get(channel)
+            out[channel] = {
+                "deferred": self.deferred[channel],
+                "in_flight": self.in_flight[channel],
+                "tokens": limit.bucket.available() if limit is not None and limit.bucket is not None else None,
+                "queue_depth": self.in_flight[channel] + self.deferred[channel],
+            }
+        return out
@@ -0,0 +1,286 @@
+# app/services/delivery/outbox.py
+import asyncio
+import logging
+import random
+from collections import Counter
+from abc import abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import (
+    OUTBOX_BACKOFF_BASE_SECONDS,
+    OUTBOX_BACKOFF_MAX_SECONDS,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_LOCK_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_SECONDS,
+)
+from app.db import SessionLocal
+from app.model import Alert, DeliveryJob, NotificationDelivery
+from app.services.analytics import record_deliveries
+from app.services.delivery.strategy import DeliveryStrategy
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedDeliveryStrategy(DeliveryStrategy):
+    """
+    Base for slow / external channels (email, webhook, push).
+    The reminder engine only enqueues: send_batch records undelivered NotificationDelivery rows
+    plus matching outbox jobs in one transaction. OutboxWorker later calls deliver() and
+    flips NotificationDelivery.delivered to the real outcome.
+    """
+    channel: str = ""
+    max_concurrency: int = 10
+    queued = True
+    combines_digests = True
+
+    def __init__(self, db: Optional[Session] = None):
+        self.db = db
+
+    def in_flight(self) -> int:
+        """Outbox jobs of this channel not finished yet."""
+        return self.db.execute(
+            select(func.count()).select_from(DeliveryJob)
+            .where(DeliveryJob.status.in_(("pending", "in_flight")), DeliveryJob.channel == self.channel)
+        ).scalar()
+
+    def send(self, alert, user):
+        return self.send_batch(alert, [user])
+
+    def send_batch(self, alert, users) -> int:
+        now = datetime.utcnow()
+        rows = [
+            {"alert_id": alert.id, "user_id": user.id, "sent_at": now, "channel": self.channel, "delivered": False, "read": False}
+            for user in users
+        ]
+        if not rows:
+            return 0
+        deliveries = self.db.execute(
+            insert(NotificationDelivery).returning(NotificationDelivery.id, NotificationDelivery.user_id,
+                                                   sort_by_parameter_order=True),
+            rows,
+        ).all()
+        self.db.execute(
+            insert(DeliveryJob),
+            [
+                {"delivery_id": delivery_id, "alert_id": alert.id, "user_id": user_id, "channel": self.channel,
+                 "status": "pending", "attempts": 0, "next_attempt_at": now, "created_at": now}
+                for delivery_id, user_id in deliveries
+            ],
+        )
+        record_deliveries(self.db, alert, self.channel, len(rows), now)
+        self.db.commit()
+        return len(rows)
+
+    def send_digest(self, digests) -> int:
+        """
+        Record one undelivered NotificationDelivery per (alert, user) and a single outbox job per
+        user whose alert_ids lists the whole digest and delivery_ids the rows just written;
+        OutboxWorker sends it with deliver_digest.
+        """
+        now = datetime.utcnow()
+        rows = [
+            {"alert_id": alert.id, "user_id": user.id, "sent_at": now, "channel": self.channel, "delivered": False, "read": False}
+            for user, alerts in digests
+            for alert in alerts
+        ]
+        if not rows:
+            return 0
+        delivery_ids = iter(self.db.execute(
+            insert(NotificationDelivery).returning(NotificationDelivery.id, sort_by_parameter_order=True), rows
+        ).scalars().all())
+        jobs = []
+        for user, alerts in digests:
+            if alerts:
+                jobs.append({
+                    "delivery_id": None, "alert_id": alerts[0].id, "alert_ids": [alert.id for alert in alerts],
+                    "delivery_ids": [next(delivery_ids) for _ in alerts], "user_id": user.id, "channel": self.channel,
+                    "status": "pending", "attempts": 0, "next_attempt_at": now, "created_at": now,
+                })
+        self.db.execute(insert(DeliveryJob), jobs)
+        alerts = {alert.id: alert for _, user_alerts in digests for alert in user_alerts}
+        for alert_id, count in Counter(row["alert_id"] for row in rows).items():
+            record_deliveries(self.db, alerts[alert_id], self.channel, count, now)
+        self.db.commit()
+        return len(rows)
+
+    @abstractmethod
+    async def deliver(self, alert: Alert, user_id: int):
+        """Perform the external call; raise on failure so the job is retried."""
+        raise NotImplementedError
+
+    async def deliver_digest(self, alerts: List[Alert], user_id: int):
+        """Send a digest (alerts most severe first) as one call. Default: one deliver per alert."""
+        for alert in alerts:
+            await self.deliver(alert, user_id)
+
+
+class OutboxWorker:
+    """
+    Drains delivery_outbox with asyncio: claims ready jobs in batches, runs them concurrently
+    under a per-channel semaphore (strategy.max_concurrency), and records the outcome.
+    Failures are retried with exponential backoff and jitter; after max_attempts a job is
+    moved to the "dead" state and its delivery stays undelivered.
+    """
+
+    def __init__(
+        self,
+        strategies: Dict[str, QueuedDeliveryStrategy],
+        db_session_factory=SessionLocal,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        backoff_base: float = OUTBOX_BACKOFF_BASE_SECONDS,
+        backoff_max: float = OUTBOX_BACKOFF_MAX_SECONDS,
+        lock_seconds: int = OUTBOX_LOCK_SECONDS,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+    ):
+        self.strategies = strategies
+        self.db_session_factory = db_session_factory
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock_seconds = lock_seconds
+        self.poll_seconds = poll_seconds
+        self._semaphores = {channel: asyncio.Semaphore(max(1, s.max_concurrency)) for channel, s in strategies.items()}
+        self._task: Optional[asyncio.Task] = None
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_base * (2 ** max(attempts - 1, 0)), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _claim(self) -> List[dict]:
+        """Lock a batch of ready jobs (pending, or in flight with an expired lock) for this worker."""
+        db = self.db_session_factory()
+        try:
+            now = datetime.utcnow()
+            ready = or_(
+                (DeliveryJob.status == "pending") & (DeliveryJob.next_attempt_at <= now),
+                (DeliveryJob.status == "in_flight") & (DeliveryJob.locked_until < now),
+            )
+            ids = [
+                job_id
+                for (job_id,) in db.execute(
+                    select(DeliveryJob.id)
+                    .where(ready, DeliveryJob.channel.in_(list(self.strategies)))
+                    .order_by(DeliveryJob.next_attempt_at)
+                    .limit(self.batch_size)
+                )
+            ]
+            if not ids:
+                return []
+            # re-check readiness in the UPDATE so a concurrent worker cannot claim the same job
+            claimed = db.execute(
+                update(DeliveryJob)
+                .where(DeliveryJob.id.in_(ids), ready)
+                .values(status="in_flight", locked_until=now + timedelta(seconds=self.lock_seconds))
+                .returning(DeliveryJob.id, DeliveryJob.delivery_id, DeliveryJob.alert_id, DeliveryJob.user_id,
+                           DeliveryJob.channel, DeliveryJob.attempts, DeliveryJob.alert_ids, DeliveryJob.delivery_ids)
+                .execution_options(synchronize_session=False)
+            ).mappings().all()
+            db.commit()
+            jobs = [dict(job) for job in claimed]
+            alert_ids = {j["alert_id"] for j in jobs}.union(*(j["alert_ids"] or () for j in jobs))
+            alerts = {a.id: a for a in db.query(Alert).filter(Alert.id.in_(alert_ids))}
+            for job in jobs:
+                job["alert"] = alerts.get(job["alert_id"])
+                if job["alert_ids"]:
+                    job["alerts"] = [alerts[i] for i in job["alert_ids"] if i in alerts]
+            db.expunge_all()
+            return jobs
+        finally:
+            db.close()
+
+    async def _attempt(self, job: dict) -> Optional[str]:
+        """Run one job; returns None on success or the error text."""
+        strategy = self.strategies[job["channel"]]
+        async with self._semaphores[job["channel"]]:
+            try:
+                if job["alert_ids"]:
+                    if not job["alerts"]:
+                        raise LookupError(f"alerts {job['alert_ids']} no longer exist")
+                    await strategy.deliver_digest(job["alerts"], job["user_id"])
+                    return None
+                if job["alert"] is None:
+                    raise LookupError(f"alert {job['alert_id']} no longer exists")
+                await strategy.deliver(job["alert"], job["user_id"])
+                return None
+            except Exception as ex:
+                return f"{type(ex).__name__}: {ex}"
+
+    def _record(self, jobs: List[dict], errors: List[Optional[str]]) -> dict:
+        db = self.db_session_factory()
+        try:
+            now = datetime.utcnow()
+            outcome = {"done": 0, "retried": 0, "dead": 0}
+            job_rows, delivered_rows = [], []
+            for job, error in zip(jobs, errors):
+                attempts = job["attempts"] + 1
+                if error is None:
+                    outcome["done"] += 1
+                    job_rows.append({"id": job["id"], "status": "done", "attempts": attempts, "locked_until": None,
+                                     "last_error": None})
+                    if job["alert_ids"]:
+                        delivered_rows.extend({"id": i, "delivered": True} for i in job["delivery_ids"] or ())
+                    elif job["delivery_id"] is not None:
+                        delivered_rows.append({"id": job["delivery_id"], "delivered": True})
+                elif attempts >= self.max_attempts:
+                    outcome["dead"] += 1
+                    logger.warning("Outbox job %s dead after %d attempts: %s", job["id"], attempts, error)
+                    job_rows.append({"id": job["id"], "status": "dead", "attempts": attempts, "locked_until": None,
+                                     "last_error": error})
+                else:
+                    outcome["retried"] += 1
+                    job_rows.append({"id": job["id"], "status": "pending", "attempts": attempts, "locked_until": None,
+                                     "last_error": error,
+                                     "next_attempt_at": now + timedelta(seconds=self.backoff(attempts))})
+            # bulk UPDATE by primary key; split by key set since rows must share the same columns
+            for keys in ({"id", "status", "attempts", "locked_until", "last_error"},
+                         {"id", "status", "attempts", "locked_until", "last_error", "next_attempt_at"}):
+                rows = [r for r in job_rows if set(r) == keys]
+                if rows:
+                    db.execute(update(DeliveryJob), rows)
+            if delivered_rows:
+                db.execute(update(NotificationDelivery), delivered_rows)
+            db.commit()
+            return outcome
+        finally:
+            db.close()
+
+    async def drain(self) -> dict:
+        """Process ready jobs until none are left; returns outcome counters."""
+        totals = {"done": 0, "retried": 0, "dead": 0}
+        while True:
+            jobs = await asyncio.to_thread(self._claim)
+            if not jobs:
+                return totals
+            errors = await asyncio.gather(*(self._attempt(job) for job in jobs))
+            outcome = await asyncio.to_thread(self._record, jobs, list(errors))
+            for key, value in outcome.items():
+                totals[key] += value
+
+    async def _run(self):
+        while True:
+            try:
+                await self.drain()
+            except Exception:
+                logger.exception("Outbox drain failed")
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
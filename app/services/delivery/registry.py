@@ -0,0 +1,20 @@
+from typing import Dict
+
+from app.config import WEBHOOK_URL
+from app.services.delivery.inapp import InAppStrategy
+from app.services.delivery.outbox import QueuedDeliveryStrategy
+from app.services.delivery.strategy import DeliveryStrategy
+from app.services.delivery.webhook import WebhookStrategy
+
+
+def make_strategies(db) -> Dict[str, DeliveryStrategy]:
+    """Channels enabled by configuration, keyed by the names used in Alert.delivery_types."""
+    strategies: Dict[str, DeliveryStrategy] = {"inapp": InAppStrategy(db)}
+    if WEBHOOK_URL:
+        strategies["webhook"] = WebhookStrategy(db)
+    return strategies
+
+
+def queued_strategies() -> Dict[str, QueuedDeliveryStrategy]:
+    """The subset of channels delivered through the outbox, for OutboxWorker."""
+    return {channel: s for channel, s in make_strategies(None).items() if isinstance(s, QueuedDeliveryStrategy)}
@@ -1,7 +1,47 @@
 from abc import ABC, abstractmethod
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class DeliveryStrategy(ABC):
     @abstractmethod
     def send(self, alert, user):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def send_batch(self, alert, users) -> int:
+        """
+        Deliver one alert to many users and return how many deliveries succeeded.
+        Default falls back to per-user send; strategies that can write in bulk should override.
+        """
+        sent = 0
+        for user in users:
+            try:
+                self.send(alert, user)
+                sent += 1
+            except Exception as ex:
+                logger.exception("Failed to send alert %s to user %s: %s", alert.id, user.id, ex)
+        return sent
+
+    # True for channels whose send only enqueues; their sends stay in flight until the outbox finishes them
+    queued = False
+
+    def in_flight(self) -> int:
+        """Sends started but not finished yet; synchronous strategies finish inside send."""
+        return 0
+
+    # True when send_digest really combines a user's alerts into one message
+    combines_digests = False
+
+    def send_digest(self, digests) -> int:
+        """
+        Deliver several alerts per user as one combined message. `digests` is a list of
+        (user, alerts) pairs with alerts ordered most severe first; returns how many (alert, user)
+        deliveries succeeded. Default: no combining, one send_batch per alert.
+        """
+        users_by_alert, alerts = {}, {}
+        for user, user_alerts in digests:
+            for alert in user_alerts:
+                alerts[alert.id] = alert
+                users_by_alert.setdefault(alert.id, []).append(user)
+        return sum(self.send_batch(alerts[alert_id], users) for alert_id, users in users_by_alert.items())
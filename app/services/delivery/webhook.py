@@ -0,0 +1,51 @@
+import asyncio
+import json
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import WEBHOOK_CONCURRENCY, WEBHOOK_TIMEOUT_SECONDS, WEBHOOK_URL
+from app.services.delivery.outbox import QueuedDeliveryStrategy
+
+
+class WebhookError(Exception):
+    pass
+
+
+class WebhookStrategy(QueuedDeliveryStrategy):
+    """POSTs the alert as JSON to a configured URL. Queued: delivered by OutboxWorker."""
+    channel = "webhook"
+
+    def __init__(self, db=None, url: Optional[str] = None, timeout: float = WEBHOOK_TIMEOUT_SECONDS,
+                 max_concurrency: int = WEBHOOK_CONCURRENCY):
+        super().__init__(db)
+        self.url = url or WEBHOOK_URL
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        # urllib is blocking: give the strategy its own threads, one per allowed in-flight request
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="webhook")
+
+    def payload(self, alert, user_id: int) -> dict:
+        severity = alert.severity.value if hasattr(alert.severity, "value") else alert.severity
+        return {"alert_id": alert.id, "user_id": user_id, "title": alert.title, "body": alert.body, "severity": severity}
+
+    def _post(self, body: bytes):
+        req = urllib.request.Request(self.url, data=body, method="POST", headers={"Content-Type": "application/json"})
+        # urlopen raises HTTPError for 4xx/5xx responses
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            if not 200 <= resp.status < 300:
+                raise WebhookError(f"webhook returned {resp.status}")
+
+    async def deliver(self, alert, user_id: int):
+        body = json.dumps(self.payload(alert, user_id)).encode()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._post, body)
+
+    async def deliver_digest(self, alerts, user_id: int):
+        """One POST for the whole digest: {"type": "digest", "user_id", "alerts": [...]}, most severe first."""
+        alert_payloads = []
+        for alert in alerts:
+            payload = self.payload(alert, user_id)
+            del payload["user_id"]
+            alert_payloads.append(payload)
+        body = json.dumps({"type": "digest", "user_id": user_id, "alerts": alert_payloads}).encode()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._post, body)
@@ -0,0 +1,102 @@
+# app/services/export.py
+"""
+Streaming audit exports of alerts, deliveries and preferences as NDJSON or CSV.
+
+Each export is one id-ordered SELECT executed with yield_per: a server-side cursor where the
+driver has one (psycopg2) and fetchmany batches otherwise, so memory is bounded by the batch
+and the first line goes out before the query has finished.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import EXPORT_BATCH_SIZE
+from app.model import Alert, NotificationDelivery, UserAlertPreference
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# dataset -> (model, exported columns, column used by since / until)
+DATASETS = {
+    "alerts": (Alert, ("id", "title", "severity", "status", "start_at", "expires_at", "reminders_enabled",
+                       "reminder_frequency_minutes", "delivery_types", "visibility"), "start_at"),
+    "deliveries": (NotificationDelivery, ("id", "alert_id", "user_id", "sent_at", "channel", "delivered", "read"),
+                   "sent_at"),
+    "preferences": (UserAlertPreference, ("id", "user_id", "alert_id", "read", "read_at", "snoozed_until"), "read_at"),
+}
+
+
+def export_query(dataset: str, alert_id: Optional[int] = None, user_id: Optional[int] = None,
+                 since: Optional[date] = None, until: Optional[date] = None):
+    """SELECT for a dataset; alert_id on alerts selects that alert, user_id is ignored there."""
+    model, columns, time_column = DATASETS[dataset]
+    q = select(*(getattr(model, c) for c in columns)).order_by(model.id)
+    if alert_id is not None:
+        q = q.where((model.id if model is Alert else model.alert_id) == alert_id)
+    if user_id is not None and model is not Alert:
+        q = q.where(model.user_id == user_id)
+    # since / until are inclusive days
+    if since:
+        q = q.where(getattr(model, time_column) >= datetime.combine(since, time.min))
+    if until:
+        q = q.where(getattr(model, time_column) < datetime.combine(until + timedelta(days=1), time.min))
+    return q
+
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def ndjson_lines(columns: Sequence[str], rows, flush_every: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """One JSON object per row, yielded in blocks of flush_every rows."""
+    block = []
+    for row in rows:
+        block.append(json.dumps({c: _value(v) for c, v in zip(columns, row)}))
+        if len(block) == flush_every:
+            yield "\n".join(block) + "\n"
+            block = []
+    if block:
+        yield "\n".join(block) + "\n"
+
+
+def csv_lines(columns: Sequence[str], rows, flush_every: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Header first, then rows in blocks of flush_every; JSON columns are written as JSON text."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    pending = 0
+    for row in rows:
+        writer.writerow([json.dumps(v) if isinstance(v, (dict, list)) else _value(v) for v in row])
+        pending += 1
+        if pending == flush_every:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def stream(db: Session, dataset: str, fmt: str = "ndjson", batch_size: int = EXPORT_BATCH_SIZE,
+           **filters) -> Iterator[str]:
+    """Encoded export lines; the session is closed once the stream is exhausted or abandoned."""
+    try:
+        columns = DATASETS[dataset][1]
+        rows = db.execute(export_query(dataset, **filters).execution_options(yield_per=batch_size))
+        encode = csv_lines if fmt == "csv" else ndjson_lines
+        # one yielded block per fetched batch keeps the per-chunk overhead of the response small
+        yield from encode(columns, rows, flush_every=batch_size)
+    finally:
+        db.close()
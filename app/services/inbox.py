@@ -0,0 +1,131 @@
+# app/services/inbox.py
+"""
+User inbox query: one SELECT over the user's alert_audience rows, joined to alerts and
+LEFT JOINed to preferences, ordered by (severity, start_at, id) descending and paginated
+with an opaque keyset cursor.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, case, or_, select
+from sqlalchemy.orm import Session
+
+from app.model import Alert, AlertAudience, Severity, UserAlertPreference
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_INTEGER = 2 ** 63 - 1
+
+severity_rank = case(
+    (Alert.severity == Severity.critical, 3),
+    (Alert.severity == Severity.warning, 2),
+    else_=1,
+).label("severity_rank")
+
+Cursor = Tuple[int, datetime, int]
+
+
+def encode_cursor(rank: int, start_at: datetime, alert_id: int) -> str:
+    raw = json.dumps([rank, start_at.isoformat(), alert_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Raises ValueError for anything that is not a cursor produced by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        rank, start_at, alert_id = json.loads(raw)
+        decoded = int(rank), datetime.fromisoformat(start_at), int(alert_id)
+    except (binascii.Error, OverflowError, TypeError, ValueError) as ex:
+        raise ValueError("invalid cursor") from ex
+    # the database rejects integers wider than 64 bits at execution time
+    if not all(-MAX_INTEGER <= n <= MAX_INTEGER for n in (decoded[0], decoded[2])):
+        raise ValueError("invalid cursor")
+    return decoded
+
+
+def inbox_query(
+    user_id: int,
+    now: datetime,
+    today: date,
+    cursor: Optional[Cursor] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    unread: Optional[bool] = None,
+    snoozed: Optional[bool] = None,
+    severity: Optional[str] = None,
+    include_body: bool = True,
+):
+    """Build the page SELECT; fetches limit + 1 rows so the caller can tell whether another page exists."""
+    pref = UserAlertPreference
+    columns = [Alert.id, Alert.title, Alert.severity, Alert.start_at, Alert.expires_at,
+               pref.snoozed_until, pref.read, severity_rank]
+    if include_body:
+        columns.insert(2, Alert.body)
+    q = (
+        select(*columns)
+        .select_from(AlertAudience)
+        .join(Alert, Alert.id == AlertAudience.alert_id)
+        .outerjoin(pref, and_(pref.user_id == AlertAudience.user_id, pref.alert_id == AlertAudience.alert_id))
+        .where(
+            AlertAudience.user_id == user_id,
+            Alert.status == "active",
+            Alert.start_at <= now,
+            or_(Alert.expires_at == None, Alert.expires_at > now),
+        )
+    )
+    if unread is True:
+        q = q.where(or_(pref.read == None, pref.read == False))
+    elif unread is False:
+        q = q.where(pref.read == True)
+    if snoozed is True:
+        q = q.where(pref.snoozed_until == today)
+    elif snoozed is False:
+        q = q.where(or_(pref.snoozed_until == None, pref.snoozed_until != today))
+    if severity:
+        q = q.where(Alert.severity == Severity(severity))
+    if cursor:
+        rank, start_at, alert_id = cursor
+        q = q.where(or_(
+            severity_rank < rank,
+            and_(severity_rank == rank, Alert.start_at < start_at),
+            and_(severity_rank == rank, Alert.start_at == start_at, Alert.id < alert_id),
+        ))
+    return q.order_by(severity_rank.desc(), Alert.start_at.desc(), Alert.id.desc()).limit(limit + 1)
+
+
+def render_page(rows, limit: int, today: date, include_body: bool = True) -> dict:
+    """Turn fetched rows into the API payload: {"alerts": [...], "next_cursor": str | None}."""
+    rows = list(rows)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    alerts = []
+    for r in rows:
+        item = {
+            "id": r.id,
+            "title": r.title,
+            "severity": r.severity,
+            "start_at": r.start_at,
+            "expires_at": r.expires_at,
+            "snoozed": r.snoozed_until == today if r.snoozed_until else False,
+            "read": bool(r.read),
+        }
+        if include_body:
+            item["body"] = r.body
+        alerts.append(item)
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.severity_rank, last.start_at, last.id)
+    return {"alerts": alerts, "next_cursor": next_cursor}
+
+
+def fetch_page(db: Session, user_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+               include_body: bool = True, **filters) -> dict:
+    now = datetime.utcnow()
+    today = date.today()
+    q = inbox_query(user_id, now, today, decode_cursor(cursor) if cursor else None, limit,
+                    include_body=include_body, **filters)
+    return render_page(db.execute(q), limit, today, include_body)
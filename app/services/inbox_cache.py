@@ -0,0 +1,6 @@
+# app/services/inbox_cache.py
+from app.config import INBOX_CACHE_SIZE
+from app.services.lru_cache import LRUCache
+
+# rendered inbox pages keyed by (user, inbox version, query)
+inbox_cache = LRUCache(INBOX_CACHE_SIZE)
@@ -0,0 +1,98 @@
+# app/services/inbox_hub.py
+import asyncio
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from app.config import STREAM_MAX_DROPS, STREAM_QUEUE_SIZE
+
+
+class Subscription:
+    """One connected client: a bounded queue of payloads. A None item means the hub closed it."""
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.consecutive_drops = 0
+        self.closed = False
+
+
+class InboxHub:
+    """
+    In-process pub/sub for in-app deliveries.
+    publish() is thread-safe (delivery runs in worker threads); fan-out happens on the event loop.
+    When a client's queue is full the oldest message is dropped; after max_drops consecutive
+    overflows the subscription is closed so a slow consumer cannot hold memory indefinitely.
+    """
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE, max_drops: int = STREAM_MAX_DROPS):
+        self.queue_size = queue_size
+        self.max_drops = max_drops
+        self._subs: Dict[int, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Must be called from the event loop serving the connection."""
+        self._loop = asyncio.get_running_loop()
+        sub = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._subs.setdefault(user_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        sub.closed = True
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.user_id]
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subs.values())
+
+    def publish(self, user_ids: Iterable[int], payload: dict):
+        """Queue payload for every connected client of the given users. Cheap no-op when nobody is connected."""
+        if self._loop is None or not self._subs:
+            return
+        user_ids = list(user_ids)
+        try:
+            self._loop.call_soon_threadsafe(self._fanout, user_ids, payload)
+        except RuntimeError:
+            # loop already closed (shutdown)
+            pass
+
+    def _fanout(self, user_ids: list, payload: dict):
+        with self._lock:
+            if len(user_ids) > len(self._subs):
+                targets = set(user_ids)
+                subs = [s for uid, group in self._subs.items() if uid in targets for s in group]
+            else:
+                subs = [s for uid in user_ids for s in self._subs.get(uid, ())]
+        for sub in subs:
+            self._offer(sub, payload)
+
+    def _offer(self, sub: Subscription, payload: dict):
+        if sub.closed:
+            return
+        try:
+            sub.queue.put_nowait(payload)
+            sub.consecutive_drops = 0
+            return
+        except asyncio.QueueFull:
+            pass
+        sub.queue.get_nowait()  # drop oldest
+        sub.queue.put_nowait(payload)
+        sub.dropped += 1
+        sub.consecutive_drops += 1
+        if sub.consecutive_drops >= self.max_drops:
+            # slow consumer: discard its backlog and signal the connection to close
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            sub.queue.put_nowait(None)
+            self.unsubscribe(sub)
+
+
+inbox_hub = InboxHub()
@@ -0,0 +1,118 @@
+# app/services/inbox_versions.py
+"""
+Per-user inbox versions and the ETags built from them.
+
+Writers bump the version of every user whose inbox they may change, inside their own
+transaction. A conditional GET then only needs the version row (a primary-key lookup)
+to answer 304 Not Modified.
+"""
+import hashlib
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import func, literal, select, true
+from sqlalchemy.orm import Session
+
+from app.db import dialect_insert
+from app.model import Alert, AlertAudience, User, UserInboxVersion
+
+
+def _upsert(db: Session):
+    insert_ = dialect_insert(db)
+    stmt = insert_(UserInboxVersion)
+    return stmt, {"version": UserInboxVersion.version + 1}
+
+
+def bump_users(db: Session, user_ids: Iterable[int]):
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    stmt, changes = _upsert(db)
+    db.execute(
+        stmt.on_conflict_do_update(index_elements=["user_id"], set_=changes),
+        [{"user_id": uid, "version": 1} for uid in user_ids],
+    )
+
+
+def bump_alert_audience(db: Session, alert_ids: Iterable[int]):
+    """Bump every user in the audience of the given alerts, in one INSERT ... SELECT."""
+    alert_ids = list(alert_ids)
+    if not alert_ids:
+        return
+    stmt, changes = _upsert(db)
+    source = (
+        select(AlertAudience.user_id, literal(1))
+        .where(AlertAudience.alert_id.in_(alert_ids), true())
+        .distinct()
+    )
+    db.execute(stmt.from_select(["user_id", "version"], source).on_conflict_do_update(
+        index_elements=["user_id"], set_=changes
+    ))
+
+
+def current_version(db: Session, user_id: int) -> Optional[int]:
+    """The user's inbox version (0 before the first bump), or None when the user does not exist."""
+    row = db.execute(
+        select(func.coalesce(UserInboxVersion.version, 0))
+        .select_from(User)
+        .outerjoin(UserInboxVersion, UserInboxVersion.user_id == User.id)
+        .where(User.id == user_id)
+    ).first()
+    return row[0] if row else None
+
+
+def next_transition(db: Session, user_id: int, now: datetime) -> Optional[datetime]:
+    """
+    Earliest future start_at / expires_at among the user's active alerts: the inbox changes then
+    even though nothing was written, so an ETag must not outlive it.
+    """
+    starts = (
+        select(func.min(Alert.start_at))
+        .join(AlertAudience, AlertAudience.alert_id == Alert.id)
+        .where(AlertAudience.user_id == user_id, Alert.status == "active", Alert.start_at > now)
+    )
+    expiries = (
+        select(func.min(Alert.expires_at))
+        .join(AlertAudience, AlertAudience.alert_id == Alert.id)
+        .where(AlertAudience.user_id == user_id, Alert.status == "active", Alert.expires_at > now)
+    )
+    candidates = [t for t in db.execute(select(starts.scalar_subquery(), expiries.scalar_subquery())).one() if t]
+    return min(candidates) if candidates else None
+
+
+def params_key(**params) -> str:
+    """Stable short hash of the query parameters a page was rendered for."""
+    raw = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def make_etag(version: int, key: str, today: date, valid_until: Optional[datetime]) -> str:
+    until = int(valid_until.timestamp()) if valid_until else 0
+    return f'W/"{version}-{key}-{today.toordinal()}-{until}"'
+
+
+def matching_etag(header: Optional[str], version: int, key: str, today: date, now: datetime) -> Optional[str]:
+    """
+    The current ETag if any tag in an If-None-Match header is still current for this version and
+    query, else None. The header may list several tags or weak ones; the tag returned is rebuilt
+    with make_etag, never copied from the request.
+    """
+    if not header:
+        return None
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        parts = tag.strip('"').split("-")
+        if len(parts) != 4:
+            continue
+        tag_version, tag_key, tag_day, tag_until = parts
+        if tag_version != str(version) or tag_key != key or tag_day != str(today.toordinal()):
+            continue
+        if not tag_until.isdigit():
+            continue
+        if tag_until == "0":
+            return make_etag(version, key, today, None)
+        if now.timestamp() < int(tag_until):
+            return make_etag(version, key, today, datetime.fromtimestamp(int(tag_until)))
+    return None
@@ -0,0 +1,72 @@
+# app/services/leases.py
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.model import ReminderLease
+
+
+def make_owner_id() -> str:
+    """Identity of a worker holding leases: host, pid and a random suffix."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseManager:
+    """
+    Claims, renews and releases reminder partitions through rows in reminder_leases.
+    Every operation is a single conditional UPDATE committed right away, so the
+    database arbitrates between concurrent workers.
+    """
+
+    def __init__(self, db: Session, owner: str, ttl_seconds: int):
+        self.db = db
+        self.owner = owner
+        self.ttl = timedelta(seconds=ttl_seconds)
+
+    def ensure_partitions(self, partitions: int):
+        existing = {p for (p,) in self.db.execute(select(ReminderLease.partition))}
+        missing = [{"partition": p} for p in range(partitions) if p not in existing]
+        if not missing:
+            return
+        try:
+            self.db.execute(insert(ReminderLease), missing)
+            self.db.commit()
+        except IntegrityError:
+            # another worker created them first
+            self.db.rollback()
+
+    def claim(self, partition: int) -> bool:
+        now = datetime.utcnow()
+        result = self.db.execute(
+            update(ReminderLease)
+            .where(
+                ReminderLease.partition == partition,
+                or_(ReminderLease.owner == None, ReminderLease.expires_at < now, ReminderLease.owner == self.owner),
+            )
+            .values(owner=self.owner, expires_at=now + self.ttl)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def renew(self, partition: int) -> bool:
+        """Extend a held lease; False means it expired and was taken over, so work must stop."""
+        result = self.db.execute(
+            update(ReminderLease)
+            .where(ReminderLease.partition == partition, ReminderLease.owner == self.owner)
+            .values(expires_at=datetime.utcnow() + self.ttl)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def release(self, partition: int):
+        self.db.execute(
+            update(ReminderLease)
+            .where(ReminderLease.partition == partition, ReminderLease.owner == self.owner)
+            .values(owner=None, expires_at=None)
+        )
+        self.db.commit()
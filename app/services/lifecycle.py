@@ -0,0 +1,57 @@
+# app/services/lifecycle.py
+"""
+Alert lifecycle sweeper. Active alerts past expires_at move to status "expired" in one bulk
+UPDATE and lose their alert_audience rows (the per-user reminder schedule), so the audience
+table, the active-alert index and every query joining them track live alerts only.
+
+Runs at the start of every reminder cycle; also standalone:
+
+    python -m app.services.lifecycle
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.model import Alert, AlertAudience
+
+ACTIVE = "active"
+EXPIRED = "expired"
+
+
+def unexpired(now: datetime):
+    """Criteria for alerts the sweep keeps an audience for: not expired and not past expires_at."""
+    return Alert.status != EXPIRED, or_(Alert.expires_at == None, Alert.expires_at > now)
+
+
+def sweep_expired(db: Session, now: Optional[datetime] = None) -> List[int]:
+    """Expire every active alert whose expires_at has passed and commit. Returns the expired alert ids."""
+    now = now or datetime.utcnow()
+    expired_ids = list(db.execute(
+        update(Alert)
+        .where(Alert.status == ACTIVE, Alert.expires_at <= now)
+        .values(status=EXPIRED)
+        .returning(Alert.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    if expired_ids:
+        db.execute(delete(AlertAudience).where(AlertAudience.alert_id.in_(expired_ids)))
+    db.commit()
+    return expired_ids
+
+
+def next_expiry(db: Session) -> Optional[datetime]:
+    """Earliest expires_at among active alerts (served by the partial active-alert index)."""
+    return db.execute(select(func.min(Alert.expires_at)).where(Alert.status == ACTIVE)).scalar()
+
+
+if __name__ == "__main__":
+    from app.db import SessionLocal, init_db
+
+    init_db()
+    session = SessionLocal()
+    try:
+        print(f"expired {len(sweep_expired(session))} alerts")
+    finally:
+        session.close()
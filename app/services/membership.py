@@ -0,0 +1,111 @@
+# app/services/membership.py
+"""
+Cached team membership for audience materialization.
+
+Resolving a visibility blob reads users by team, and many alerts target the same few teams. Each
+team's member ids are kept as a sorted integer array in a process-wide LRU, keyed by the
+membership generation: a counter row that every writer of users or teams bumps inside its own
+transaction (bump()). Reading it is one primary-key lookup, so a committed write in any process
+makes older entries unreachable; they simply age out. Org-wide targets are not cached: they are
+read from users one window at a time (TargetedUsers), so memory does not grow with the org.
+"""
+import heapq
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import MEMBERSHIP_CACHE_SIZE
+from app.db import dialect_insert
+from app.model import CacheGeneration, User
+from app.services.lru_cache import LRUCache
+
+GENERATION = "membership"
+
+# (generation, team_id) -> sorted member ids
+membership_cache = LRUCache(MEMBERSHIP_CACHE_SIZE)
+
+
+def bump(db: Session):
+    """Invalidate cached membership; call in the transaction that writes users or teams."""
+    stmt = dialect_insert(db)(CacheGeneration)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["name"], set_={"generation": CacheGeneration.generation + 1}
+    ), {"name": GENERATION, "generation": 1})
+
+
+def current_generation(db: Session) -> int:
+    generation = db.execute(select(CacheGeneration.generation).where(CacheGeneration.name == GENERATION)).scalar()
+    return generation or 0
+
+
+def team_members(db: Session, team_ids: Iterable[int], generation: Optional[int] = None) -> Dict[int, array]:
+    """Sorted member ids per team; the teams not cached are read with one query."""
+    if generation is None:
+        generation = current_generation(db)
+    members: Dict[int, array] = {}
+    missing = []
+    for team_id in set(team_ids):
+        cached = membership_cache.get((generation, team_id))
+        if cached is None:
+            missing.append(team_id)
+        else:
+            members[team_id] = cached
+    if missing:
+        loaded = {team_id: array("q") for team_id in missing}
+        for user_id, team_id in db.execute(
+            select(User.id, User.team_id).where(User.team_id.in_(missing)).order_by(User.id)
+        ):
+            loaded[team_id].append(user_id)
+        for team_id, ids in loaded.items():
+            membership_cache.put((generation, team_id), ids)
+        members.update(loaded)
+    return members
+
+
+def _tail(ids: Sequence[int], start: int) -> Iterator[int]:
+    for i in range(start, len(ids)):
+        yield ids[i]
+
+
+class TargetedUsers:
+    """
+    The users a visibility blob ({"org", "teams", "users"}) targets, read in ascending id windows.
+    Team members come from the cache and listed users are checked once; org-wide targets are
+    read from users window by window.
+    """
+
+    def __init__(self, db: Session, visibility: dict, generation: Optional[int] = None):
+        vis = visibility or {}
+        self.db = db
+        self.org = bool(vis.get("org"))
+        self.sources: List[Sequence[int]] = []
+        if self.org:
+            return
+        self.sources.extend(team_members(db, vis.get("teams") or [], generation).values())
+        listed = vis.get("users") or []
+        if listed:
+            # listed users are per alert; only their existence is checked
+            self.sources.append(sorted(db.execute(select(User.id).where(User.id.in_(listed))).scalars()))
+
+    def window(self, after: int, limit: int) -> List[int]:
+        """Up to `limit` targeted ids greater than `after`, ascending and without duplicates."""
+        if self.org:
+            return list(self.db.execute(
+                select(User.id).where(User.id > after).order_by(User.id).limit(limit)
+            ).scalars())
+        tails = [_tail(ids, bisect_right(ids, after)) for ids in self.sources]
+        out: List[int] = []
+        for uid in heapq.merge(*tails):
+            if not out or out[-1] != uid:
+                out.append(uid)
+                if len(out) == limit:
+                    break
+        return out
+
+    def all(self) -> Set[int]:
+        if self.org:
+            return set(self.db.execute(select(User.id)).scalars())
+        return set().union(*self.sources)
@@ -0,0 +1,215 @@
+# app/services/metrics.py
+"""
+In-process metrics: histograms rendered in the Prometheus text format (/admin/metrics),
+SQL statement tracking via engine cursor hooks, and an ASGI middleware that attributes
+statement count and DB time to each request.
+
+track_queries() opens a scope that counts every statement executed while it is active, in
+the current thread or in anything the context is copied into (threadpool endpoints,
+asyncio.to_thread). Scopes nest, so a reminder phase inside a request counts toward both.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Sequence, Tuple
+
+from sqlalchemy import event
+
+from app.config import SLOW_QUERY_MS
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels; thread-safe."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                 labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (+Inf last), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in sorted(snapshot):
+            base = [f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key)]
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = ",".join(base + ['le="%s"' % le])
+                yield f"{self.name}_bucket{{{labels}}} {cumulative}"
+            suffix = f"{{{','.join(base)}}}" if base else ""
+            yield f"{self.name}_sum{suffix} {total}"
+            yield f"{self.name}_count{suffix} {count}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                  labels: Sequence[str] = ()) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help_text, buckets, labels)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+DB_STATEMENT_SECONDS = registry.histogram(
+    "db_statement_duration_seconds", "Duration of single SQL statements.", labels=("operation",))
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency.", labels=("method", "route", "status"))
+HTTP_REQUEST_STATEMENTS = registry.histogram(
+    "http_request_db_statements", "SQL statements per HTTP request.", COUNT_BUCKETS, labels=("method", "route"))
+HTTP_REQUEST_DB_SECONDS = registry.histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL per HTTP request.", labels=("method", "route"))
+REMINDER_CYCLE_SECONDS = registry.histogram(
+    "reminder_cycle_duration_seconds", "Duration of a reminder cycle.")
+REMINDER_PHASE_SECONDS = registry.histogram(
+    "reminder_phase_duration_seconds", "Time per reminder cycle phase.", labels=("phase",))
+REMINDER_PHASE_STATEMENTS = registry.histogram(
+    "reminder_phase_db_statements", "SQL statements per reminder cycle phase.", COUNT_BUCKETS, labels=("phase",))
+
+
+class QueryStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_scopes: ContextVar[Tuple[QueryStats, ...]] = ContextVar("query_scopes", default=())
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count statements and DB time executed inside the block."""
+    stats = QueryStats()
+    token = _scopes.set(_scopes.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _scopes.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    for stats in _scopes.get():
+        stats.statements += 1
+        stats.db_seconds += elapsed
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    DB_STATEMENT_SECONDS.observe(elapsed, operation=operation)
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_query_logger.warning("slow query (%.1f ms%s): %s", elapsed * 1000,
+                                  ", executemany" if executemany else "", " ".join(statement.split())[:1000])
+
+
+def _handle_error(exception_context):
+    # the statement failed, so after_cursor_execute will not run for it
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine):
+    """Attach statement timing / counting hooks to a (sync) Engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def phase(phases: Dict[str, dict], name: str):
+    """Accumulate wall time, statements and DB time of the block into phases[name]."""
+    started = time.perf_counter()
+    with track_queries() as queries:
+        try:
+            yield
+        finally:
+            entry = phases.setdefault(name, {"ms": 0.0, "statements": 0, "db_ms": 0.0})
+            entry["ms"] = round(entry["ms"] + (time.perf_counter() - started) * 1000, 3)
+            entry["statements"] += queries.statements
+            entry["db_ms"] = round(entry["db_ms"] + queries.db_seconds * 1000, 3)
+
+
+def observe_cycle(seconds: float, phases: Dict[str, dict]):
+    REMINDER_CYCLE_SECONDS.observe(seconds)
+    for name, entry in phases.items():
+        REMINDER_PHASE_SECONDS.observe(entry["ms"] / 1000, phase=name)
+        REMINDER_PHASE_STATEMENTS.observe(entry["statements"], phase=name)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, statement count and DB time per HTTP request,
+    labelled by route template (e.g. /user/{user_id}/alerts) rather than the raw path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                path = getattr(route, "path", None) or "unmatched"
+                method = scope.get("method", "")
+                HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, route=path,
+                                             status=status["code"])
+                HTTP_REQUEST_STATEMENTS.observe(queries.statements, method=method, route=path)
+                HTTP_REQUEST_DB_SECONDS.observe(queries.db_seconds, method=method, route=path)
+
+
+def render() -> str:
+    return registry.render()
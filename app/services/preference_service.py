@@ -1,53 +1,204 @@
 # app/services/preference_service.py
-from app.db import SessionLocal
-from app.model import UserAlertPreference
-from datetime import date
+from app.db import SessionLocal, dialect_insert
+from app.model import AlertAudience, UserAlertPreference
+from app.services import inbox_versions
+from app.services.analytics import record_inbox_events
+from datetime import date, datetime
+from sqlalchemy import DateTime, Date, literal, or_, select, true, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
+
+# columns returned by the upserts below
+PREF_COLUMNS = (
+    UserAlertPreference.user_id,
+    UserAlertPreference.alert_id,
+    UserAlertPreference.snoozed_until,
+    UserAlertPreference.read,
+    UserAlertPreference.read_at,
+)
 
 
 class PreferenceService:
+    """
+    Read / unread / snooze state per (user, alert).
+    Every action is a single upsert or UPDATE (ON CONFLICT on the unique (user_id, alert_id)),
+    so concurrent clicks cannot create duplicate rows. A conditional WHERE makes repeated
+    actions no-ops, which is how the analytics rollups count each transition once.
+    Rollups count the current state, like analytics.compute_from_raw: unread takes a read back
+    out, and snoozing again on a later day moves the snooze from the old snoozed_until day.
+    """
+
     def __init__(self, db_session_factory=SessionLocal):
         self.db_session_factory = db_session_factory
 
-    def snooze_for_today(self, user_id: int, alert_id: int) -> UserAlertPreference:
+    @staticmethod
+    def _upsert(db: Session, values: dict, changes: dict, changed_when):
+        insert_ = dialect_insert(db)
+        stmt = insert_(UserAlertPreference).values(**values)
+        return stmt.on_conflict_do_update(
+            index_elements=["user_id", "alert_id"], set_=changes, where=changed_when
+        )
+
+    @staticmethod
+    def _previous_snoozes(db: Session, user_id: int, alert_ids, today: date) -> dict:
+        """alert_id -> snoozed_until for the user's rows snoozed on another day (alert_ids: ids or a SELECT)."""
+        q = select(UserAlertPreference.alert_id, UserAlertPreference.snoozed_until).where(
+            UserAlertPreference.user_id == user_id,
+            UserAlertPreference.alert_id.in_(alert_ids),
+            UserAlertPreference.snoozed_until != None,
+            UserAlertPreference.snoozed_until != today,
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            q = q.with_for_update()
+        return dict(db.execute(q).all())
+
+    @staticmethod
+    def _retract_snoozes(db: Session, previous: dict, changed):
+        """Take re-snoozed alerts out of the rollup of the day they were snoozed until before."""
+        by_day = {}
+        for alert_id in changed:
+            if alert_id in previous:
+                by_day.setdefault(previous[alert_id], {})[alert_id] = -1
+        for day, counts in by_day.items():
+            record_inbox_events(db, "snoozes", counts, day=day)
+
+    def snooze_for_today(self, user_id: int, alert_id: int) -> Row:
         db: Session = self.db_session_factory()
         try:
-            pref = db.query(UserAlertPreference).filter_by(user_id=user_id, alert_id=alert_id).first()
-            if not pref:
-                pref = UserAlertPreference(user_id=user_id, alert_id=alert_id, snoozed_until=date.today())
-                db.add(pref)
-            else:
-                pref.snoozed_until = date.today()
+            today = date.today()
+            previous = self._previous_snoozes(db, user_id, [alert_id], today)
+            stmt = self._upsert(
+                db,
+                {"user_id": user_id, "alert_id": alert_id, "snoozed_until": today, "read": False},
+                {"snoozed_until": today},
+                or_(UserAlertPreference.snoozed_until == None, UserAlertPreference.snoozed_until != today),
+            )
+            pref = db.execute(stmt.returning(*PREF_COLUMNS)).first()
+            if pref is not None:
+                self._retract_snoozes(db, previous, [alert_id])
+                record_inbox_events(db, "snoozes", {alert_id: 1})
+                inbox_versions.bump_users(db, [user_id])
+                db.commit()
+                return pref
+            # already snoozed today: nothing changed
             db.commit()
-            db.refresh(pref)
-            return pref
+            return db.execute(select(*PREF_COLUMNS).filter_by(user_id=user_id, alert_id=alert_id)).first()
         finally:
             db.close()
 
-    def mark_read(self, user_id: int, alert_id: int) -> UserAlertPreference:
+    def mark_read(self, user_id: int, alert_id: int) -> Optional[Row]:
+        """Returns the updated preference, or None if the alert was already read."""
         db: Session = self.db_session_factory()
         try:
-            pref = db.query(UserAlertPreference).filter_by(user_id=user_id, alert_id=alert_id).first()
-            if not pref:
-                pref = UserAlertPreference(user_id=user_id, alert_id=alert_id, read=True)
-                db.add(pref)
-            else:
-                pref.read = True
+            now = datetime.utcnow()
+            stmt = self._upsert(
+                db,
+                {"user_id": user_id, "alert_id": alert_id, "read": True, "read_at": now},
+                {"read": True, "read_at": now},
+                or_(UserAlertPreference.read == None, UserAlertPreference.read == False),
+            )
+            pref = db.execute(stmt.returning(*PREF_COLUMNS)).first()
+            if pref is not None:
+                record_inbox_events(db, "reads", {alert_id: 1})
+                inbox_versions.bump_users(db, [user_id])
             db.commit()
-            db.refresh(pref)
             return pref
         finally:
             db.close()
 
-    def mark_unread(self, user_id: int, alert_id: int) -> Optional[UserAlertPreference]:
+    @staticmethod
+    def _unread(db: Session, user_id: int, alert_ids: Optional[List[int]]) -> List[int]:
+        """
+        Flip read alerts back to unread in one UPDATE. read_at is kept, so the read is taken back
+        out of the rollup for the day it was counted on.
+        """
+        q = update(UserAlertPreference).where(UserAlertPreference.user_id == user_id, UserAlertPreference.read == True)
+        if alert_ids is not None:
+            q = q.where(UserAlertPreference.alert_id.in_(alert_ids))
+        rows = db.execute(
+            q.values(read=False).returning(UserAlertPreference.alert_id, UserAlertPreference.read_at)
+        ).all()
+        by_day = {}
+        for alert_id, read_at in rows:
+            if read_at is not None:
+                by_day.setdefault(read_at.date(), {})[alert_id] = -1
+        for day, counts in by_day.items():
+            record_inbox_events(db, "reads", counts, day=day)
+        if rows:
+            inbox_versions.bump_users(db, [user_id])
+        return [alert_id for alert_id, _ in rows]
+
+    def mark_unread(self, user_id: int, alert_id: int) -> bool:
+        """Returns True if the alert was read before."""
         db: Session = self.db_session_factory()
         try:
-            pref = db.query(UserAlertPreference).filter_by(user_id=user_id, alert_id=alert_id).first()
-            if pref:
-                pref.read = False
-                db.commit()
-                db.refresh(pref)
-            return pref
+            changed = self._unread(db, user_id, [alert_id])
+            db.commit()
+            return bool(changed)
+        finally:
+            db.close()
+
+    # --- bulk actions: one statement regardless of how many alerts are affected ---
+
+    @staticmethod
+    def _audience(user_id: int, alert_ids: Optional[List[int]]):
+        """Alert ids visible to the user (optionally restricted to alert_ids), as a SELECT to insert from."""
+        q = select(AlertAudience.alert_id).where(AlertAudience.user_id == user_id)
+        if alert_ids is not None:
+            q = q.where(AlertAudience.alert_id.in_(alert_ids))
+        return q
+
+    def _bulk_upsert(self, user_id: int, alert_ids: Optional[List[int]], extra: dict, changed_when, counter: str) -> List[int]:
+        db: Session = self.db_session_factory()
+        try:
+            previous = {}
+            if counter == "snoozes":
+                previous = self._previous_snoozes(db, user_id, self._audience(user_id, alert_ids), extra["snoozed_until"][0])
+            audience = self._audience(user_id, alert_ids).subquery()
+            columns = ["user_id", "alert_id", *extra]
+            source = select(
+                literal(user_id).label("user_id"),
+                audience.c.alert_id,
+                *(literal(v, type_).label(k) for k, (v, type_) in extra.items()),
+            ).where(true())  # SQLite needs a WHERE to parse INSERT ... SELECT ... ON CONFLICT
+            insert_ = dialect_insert(db)
+            stmt = insert_(UserAlertPreference).from_select(columns, source)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "alert_id"],
+                set_={k: getattr(stmt.excluded, k) for k in extra},
+                where=changed_when,
+            ).returning(UserAlertPreference.alert_id)
+            changed = [alert_id for (alert_id,) in db.execute(stmt)]
+            self._retract_snoozes(db, previous, changed)
+            record_inbox_events(db, counter, {alert_id: 1 for alert_id in changed})
+            if changed:
+                inbox_versions.bump_users(db, [user_id])
+            db.commit()
+            return changed
+        finally:
+            db.close()
+
+    def mark_read_many(self, user_id: int, alert_ids: Optional[List[int]] = None) -> List[int]:
+        """Mark the given alerts (or, with None, every alert visible to the user) read; returns the ids that changed."""
+        now = datetime.utcnow()
+        return self._bulk_upsert(
+            user_id, alert_ids, {"read": (True, None), "read_at": (now, DateTime())},
+            or_(UserAlertPreference.read == None, UserAlertPreference.read == False), "reads",
+        )
+
+    def snooze_many_for_today(self, user_id: int, alert_ids: Optional[List[int]] = None) -> List[int]:
+        today = date.today()
+        return self._bulk_upsert(
+            user_id, alert_ids, {"snoozed_until": (today, Date())},
+            or_(UserAlertPreference.snoozed_until == None, UserAlertPreference.snoozed_until != today), "snoozes",
+        )
+
+    def mark_unread_many(self, user_id: int, alert_ids: Optional[List[int]] = None) -> List[int]:
+        db: Session = self.db_session_factory()
+        try:
+            changed = self._unread(db, user_id, alert_ids)
+            db.commit()
+            return changed
         finally:
             db.close()
@@ -1,13 +1,23 @@
 # app/services/reminder_engine.py
 from datetime import datetime, timedelta, date
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
-from app.services.visibilty import VisibilityResolver
-from app.services.delivery.inapp import InAppStrategy
+from app.services.delivery.limits import Admission, ChannelLimit, channel_limits
+from app.services.delivery.registry import make_strategies
+from app.config import DELIVERY_CHUNK_SIZE, REMINDER_DIGEST_ENABLED, REMINDER_LEASE_SECONDS, REMINDER_PARTITIONS
 from app.db import SessionLocal
-from app.model import Alert, NotificationDelivery, UserAlertPreference
+from app.services.leases import LeaseManager, make_owner_id
+from app.services.lifecycle import sweep_expired
+from app.services.membership import membership_cache
+from app.services.metrics import observe_cycle, phase
+from app.services.visibilty import VisibilityResolver
+from app.model import Alert, AlertAudience, NotificationDelivery, Severity, UserAlertPreference
+from sqlalchemy import func, or_, select, update
 from sqlalchemy.orm import Session
+from concurrent.futures import ProcessPoolExecutor
 import logging
+import time
+import zlib
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +25,54 @@ logger = logging.getLogger(__name__)
 class ReminderEngine:
     """
     ReminderEngine is responsible for one "cycle" of reminder delivery.
-    - Finds active alerts with reminders enabled and within start/expiry window.
-    - Resolves recipients via VisibilityResolver.
-    - Skips users who snoozed that alert for *today* (snooze stored as date).
+    - Pulls only the (alert, user) pairs whose alert_audience.next_due_at has passed,
+      for active alerts with reminders enabled and within start/expiry window.
+    - Sweeps alerts past expires_at to status "expired" (app.services.lifecycle) and defers pairs
+      the user snoozed for *today* (snooze stored as date) to tomorrow, each set-based.
     - Sends reminders only if no previous send exists within the reminder frequency window (idempotent).
-    - Uses pluggable delivery strategies (default: in-app).
+      Each chunk is claimed first by atomically advancing next_due_at by reminder_frequency_minutes,
+      so overlapping cycles cannot deliver the same reminder twice.
+    - Work is split into user_id partitions claimed through lease rows, so cycles can run
+      concurrently across processes or nodes (see run_parallel).
+    - Snooze and last-delivery state is handled in bulk, so the query count does not
+      depend on the number of recipients.
+    - Uses pluggable delivery strategies (default: in-app); recipients are streamed as
+      lightweight rows (`.id` only) and handed to DeliveryStrategy.send_batch in chunks of
+      `chunk_size`, one transaction per chunk, so memory stays flat for org-wide alerts.
+    - Digest mode walks the due rows user by user instead and sends each user one combined
+      message per channel through DeliveryStrategy.send_digest (still one delivery row per alert).
+    - Channels may be rate limited (app.services.delivery.limits). Alerts are worked most severe
+      first; recipients a channel has no room for are not claimed but rescheduled to when it has,
+      so they are carried over to a later cycle instead of dropped.
     """
 
-    def __init__(self, db_session_factory=SessionLocal, strategies: Optional[Dict[str, object]] = None):
+    def __init__(
+        self,
+        db_session_factory=SessionLocal,
+        strategies: Optional[Dict[str, object]] = None,
+        chunk_size: Optional[int] = None,
+        partitions: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        digest: Optional[bool] = None,
+        limits: Optional[Dict[str, ChannelLimit]] = None,
+    ):
         """
         :param db_session_factory: callable returning DB Session (SessionLocal)
         :param strategies: optional mapping like {"inapp": InAppStrategy(...), "email": EmailStrategy(...)}
+        :param chunk_size: recipients per send_batch call (defaults to DELIVERY_CHUNK_SIZE)
+        :param partitions: number of user_id partitions (defaults to REMINDER_PARTITIONS)
+        :param lease_seconds: partition lease lifetime, renewed per chunk (defaults to REMINDER_LEASE_SECONDS)
+        :param digest: combine each user's due alerts into one message per channel (defaults to REMINDER_DIGEST_ENABLED)
+        :param limits: per-channel rate / in-flight limits (defaults to the configured channel_limits)
         """
         self.db_session_factory = db_session_factory
         self._strategies_override = strategies or {}
+        self.chunk_size = max(1, chunk_size or DELIVERY_CHUNK_SIZE)
+        self.partitions = max(1, partitions or REMINDER_PARTITIONS)
+        self.lease_seconds = lease_seconds or REMINDER_LEASE_SECONDS
+        self.digest = REMINDER_DIGEST_ENABLED if digest is None else digest
+        self.limits = channel_limits if limits is None else limits
+        self.owner = make_owner_id()
 
     def _make_strategies(self, db: Session) -> Dict[str, object]:
         """
@@ -37,82 +81,479 @@ class ReminderEngine:
         """
         if self._strategies_override:
             return self._strategies_override
-        return {"inapp": InAppStrategy(db)}
+        return make_strategies(db)
 
-    def run_cycle(self) -> dict:
+    @staticmethod
+    def _defer_snoozed(db: Session, now: datetime) -> int:
         """
-        Run one reminder cycle. Meant to be called by a scheduler or the trigger endpoint.
-        Returns a dict with simple statistics for testing / logs.
+        Push due rows that the user snoozed for today to the start of tomorrow, in one UPDATE.
+        Returns the number of rows deferred.
         """
-        db = self.db_session_factory()
-        sent_count = 0
-        skipped_snoozed = 0
-        skipped_recent = 0
-        skipped_expired = 0
-        try:
-            now = datetime.utcnow()
-            # Query candidate alerts: active, reminders enabled, started.
-            alerts: List[Alert] = (
-                db.query(Alert)
-                .filter(Alert.status == "active", Alert.reminders_enabled == True, Alert.start_at <= now)
-                .all()
+        today = date.today()
+        snoozed = (
+            db.query(UserAlertPreference.id)
+            .filter(
+                UserAlertPreference.alert_id == AlertAudience.alert_id,
+                UserAlertPreference.user_id == AlertAudience.user_id,
+                UserAlertPreference.snoozed_until == today,
             )
+            .exists()
+        )
+        result = db.execute(
+            update(AlertAudience)
+            .where(AlertAudience.next_due_at <= now, snoozed)
+            .values(next_due_at=datetime.combine(today + timedelta(days=1), datetime.min.time()))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
 
-            strategies = self._make_strategies(db)
+    @staticmethod
+    def _reschedule(db: Session, rows: List[dict]):
+        """Bulk-update next_due_at for (alert_id, user_id) pairs; rows are {"alert_id", "user_id", "next_due_at"}."""
+        if rows:
+            db.execute(update(AlertAudience), rows)
 
-            for alert in alerts:
-                # Skip expired alerts
-                if alert.expires_at and alert.expires_at < now:
-                    skipped_expired += 1
-                    continue
+    @staticmethod
+    def _defer(db: Session, retry_at: datetime, *criteria) -> int:
+        """Move the still-due rows matching criteria to retry_at; returns how many were deferred."""
+        result = db.execute(
+            update(AlertAudience).where(*criteria).values(next_due_at=retry_at)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
 
-                # Resolve recipients (list[User])
-                recipients = VisibilityResolver.resolve(alert, db)
-                for user in recipients:
-                    # Check snooze: if snoozed_until == today, skip
-                    pref: UserAlertPreference = (
-                        db.query(UserAlertPreference)
-                        .filter_by(user_id=user.id, alert_id=alert.id)
-                        .first()
-                    )
-                    if pref and pref.snoozed_until == date.today():
-                        skipped_snoozed += 1
-                        continue
+    @staticmethod
+    def _last_sent(db: Session, alert_id: int, user_ids: List[int]) -> Dict[int, datetime]:
+        """
+        Return the latest sent_at per user for one alert and one chunk of users, in a single grouped
+        query served by the (alert_id, user_id, sent_at) index.
+        """
+        if not user_ids:
+            return {}
+        rows = (
+            db.query(NotificationDelivery.user_id, func.max(NotificationDelivery.sent_at))
+            .filter(NotificationDelivery.alert_id == alert_id, NotificationDelivery.user_id.in_(user_ids))
+            .group_by(NotificationDelivery.user_id)
+            .all()
+        )
+        return {user_id: sent_at for user_id, sent_at in rows}
 
-                    # Check last delivery time to avoid spamming: need to be older than freq
-                    last: NotificationDelivery = (
-                        db.query(NotificationDelivery)
-                        .filter_by(alert_id=alert.id, user_id=user.id)
-                        .order_by(NotificationDelivery.sent_at.desc())
-                        .first()
-                    )
+    def _deliver(self, strat, alert: Alert, channel: str, users: list, chunks: List[dict]) -> int:
+        """
+        Send an alert to one chunk of users through one strategy.
+        Uses send_batch when the strategy provides it, otherwise falls back to per-user send.
+        Appends a timing entry to `chunks` and returns the number of sends.
+        """
+        send_batch = getattr(strat, "send_batch", None)
+        started = time.perf_counter()
+        sent = 0
+        if send_batch is not None:
+            try:
+                sent = send_batch(alert, users)
+            except Exception as ex:
+                logger.exception("Failed to send alert %s to %d users via %s: %s", alert.id, len(users), channel, ex)
+        else:
+            for user in users:
+                try:
+                    strat.send(alert, user)
+                    sent += 1
+                except Exception as ex:
+                    logger.exception("Failed to send alert %s to user %s via %s: %s", alert.id, user.id, channel, ex)
+        chunks.append({
+            "alert_id": alert.id,
+            "channel": channel,
+            "size": len(users),
+            "sent": sent,
+            "ms": round((time.perf_counter() - started) * 1000, 3),
+        })
+        return sent
 
-                    freq_minutes = alert.reminder_frequency_minutes or 120
-                    freq_delta = timedelta(minutes=freq_minutes)
+    @staticmethod
+    def _claim(db: Session, alert_id: int, user_ids: List[int], now: datetime, next_due_at: datetime) -> set:
+        """
+        Atomically advance next_due_at for the pairs that are still due and return the user ids
+        this worker won. A concurrent worker that raced on the same rows gets an empty set,
+        which keeps delivery exactly-once per frequency window.
+        """
+        result = db.execute(
+            update(AlertAudience)
+            .where(
+                AlertAudience.alert_id == alert_id,
+                AlertAudience.user_id.in_(user_ids),
+                AlertAudience.next_due_at <= now,
+            )
+            .values(next_due_at=next_due_at)
+            .returning(AlertAudience.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = {uid for (uid,) in result}
+        db.commit()
+        return claimed
 
-                    if last and (last.sent_at + freq_delta) > now:
-                        skipped_recent += 1
-                        continue
+    @staticmethod
+    def _last_sent_pairs(db: Session, alert_ids: List[int], user_ids: List[int]) -> Dict[Tuple[int, int], datetime]:
+        """Latest sent_at per (alert, user) for a chunk of users across several alerts, in one grouped query."""
+        rows = (
+            db.query(NotificationDelivery.alert_id, NotificationDelivery.user_id, func.max(NotificationDelivery.sent_at))
+            .filter(NotificationDelivery.alert_id.in_(alert_ids), NotificationDelivery.user_id.in_(user_ids))
+            .group_by(NotificationDelivery.alert_id, NotificationDelivery.user_id)
+            .all()
+        )
+        return {(alert_id, user_id): sent_at for alert_id, user_id, sent_at in rows}
 
-                    # Send on each configured channel (strategy must exist)
-                    for channel in (alert.delivery_types or []):
+    @staticmethod
+    def _claim_pairs(db: Session, alerts_by_freq: Dict[int, List[int]], user_ids: List[int],
+                     now: datetime) -> Set[Tuple[int, int]]:
+        """
+        _claim for a chunk of users across several alerts: one conditional UPDATE ... RETURNING per
+        reminder frequency, returning the (alert_id, user_id) pairs this worker won.
+        """
+        claimed = set()
+        for freq_minutes, alert_ids in alerts_by_freq.items():
+            result = db.execute(
+                update(AlertAudience)
+                .where(
+                    AlertAudience.alert_id.in_(alert_ids),
+                    AlertAudience.user_id.in_(user_ids),
+                    AlertAudience.next_due_at <= now,
+                )
+                .values(next_due_at=now + timedelta(minutes=freq_minutes))
+                .returning(AlertAudience.alert_id, AlertAudience.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            claimed.update((alert_id, user_id) for alert_id, user_id in result)
+        db.commit()
+        return claimed
+
+    def _candidate_alerts(self, db: Session, now: datetime, due_rows: list) -> List[Alert]:
+        """Active, started, unexpired alerts with reminders on that have due rows, detached from the session."""
+        alert_ids = select(AlertAudience.alert_id).where(*due_rows)
+        alerts = db.query(Alert).filter(
+            Alert.id.in_(alert_ids),
+            Alert.status == "active",
+            Alert.reminders_enabled == True,
+            Alert.start_at <= now,
+            or_(Alert.expires_at == None, Alert.expires_at > now),
+        ).all()
+        # Detach the alerts: the per-chunk commits below would otherwise expire them and
+        # reload each one with its own SELECT.
+        db.expunge_all()
+        return alerts
+
+    def _run_partition(self, db: Session, now: datetime, strategies: Dict[str, object], partition: int,
+                       leases: LeaseManager, stats: dict, admission: Admission) -> bool:
+        """
+        Deliver everything due in one partition (user_id % partitions == partition).
+        Returns False if the lease was lost midway, in which case the remaining work is left for its new owner.
+        """
+        phases = stats["phases"]
+        due_rows = [AlertAudience.next_due_at <= now]
+        if self.partitions > 1:
+            due_rows.append(AlertAudience.user_id % self.partitions == partition)
+        # Only the alerts with due rows are loaded up front; their recipients are streamed below.
+        with phase(phases, "candidates"):
+            alerts = self._candidate_alerts(db, now, due_rows)
+        stats["alerts_checked"] += len(alerts)
+        if self.digest:
+            return self._run_partition_digest(db, now, strategies, partition, leases, stats, admission,
+                                              alerts, due_rows)
+
+        # most severe first, so limited channels spend their budget on the alerts that matter most
+        for alert in sorted(alerts, key=_severity_order, reverse=True):
+            freq_minutes = alert.reminder_frequency_minutes or 120
+            freq_delta = timedelta(minutes=freq_minutes)
+            channels = alert.delivery_types or []
+            if admission.exhausted(channels):
+                with phase(phases, "claim"):
+                    deferred = self._defer(db, admission.retry_at(channels, now), AlertAudience.alert_id == alert.id,
+                                           *due_rows)
+                stats["deferred"] += deferred
+                admission.defer(channels, deferred)
+                continue
+            # Due recipients arrive as fixed-size chunks of (id,) rows from alert_audience (visibility
+            # is materialized there); each chunk is throttled, claimed and sent before the next is read,
+            # so memory stays flat regardless of the audience size.
+            recipients = VisibilityResolver.resolve(alert, db, self.chunk_size, *due_rows)
+            while True:
+                with phase(phases, "candidates"):
+                    chunk = next(recipients, None)
+                if chunk is None:
+                    break
+
+                # Guard against deliveries made outside the schedule (e.g. before it existed);
+                # one grouped query per chunk, so the query count does not depend on the number of recipients.
+                with phase(phases, "throttle"):
+                    last_sent = self._last_sent(db, alert.id, [user.id for user in chunk])
+                    due = []
+                    throttled = []
+                    for user in chunk:
+                        # Check last delivery time to avoid spamming: need to be older than freq
+                        last = last_sent.get(user.id)
+                        if last and (last + freq_delta) > now:
+                            stats["skipped_recent"] += 1
+                            throttled.append({"alert_id": alert.id, "user_id": user.id, "next_due_at": last + freq_delta})
+                            continue
+                        due.append(user)
+                    self._reschedule(db, throttled)
+                    db.commit()
+                if not due:
+                    continue
+                admitted = admission.admit(channels, len(due))
+                blocked = admitted < len(due)
+                due = due[:admitted]
+
+                with phase(phases, "claim"):
+                    if not leases.renew(partition):
+                        logger.warning("Lost lease on reminder partition %s, stopping", partition)
+                        return False
+                    # Claim the chunk by advancing its schedule one reminder period; only claimed users are sent to.
+                    claimed = self._claim(db, alert.id, [user.id for user in due], now, now + freq_delta)
+                stats["skipped_claimed"] += len(due) - len(claimed)
+                due = [user for user in due if user.id in claimed]
+                # Send on each configured channel (strategy must exist)
+                with phase(phases, "send"):
+                    for channel in (channels if due else []):
                         strat = strategies.get(channel)
                         if not strat:
                             logger.warning("No strategy for channel '%s', skipping", channel)
                             continue
-                        try:
-                            strat.send(alert, user)
-                            sent_count += 1
-                        except Exception as ex:
-                            logger.exception("Failed to send alert %s to user %s via %s: %s", alert.id, user.id, channel, ex)
-
-            return {
-                "now": now.isoformat(),
-                "alerts_checked": len(alerts),
-                "sent_count": sent_count,
-                "skipped_snoozed": skipped_snoozed,
-                "skipped_recent": skipped_recent,
-                "skipped_expired": skipped_expired,
-            }
+                        sent = self._deliver(strat, alert, channel, due, stats["chunks"])
+                        admission.sent(channel, len(due))
+                        stats["sent_count"] += sent
+                        stats["messages_sent"] += sent
+                if blocked:
+                    # the rest of this alert's due recipients, including chunks not read yet
+                    with phase(phases, "claim"):
+                        deferred = self._defer(db, admission.retry_at(channels, now),
+                                               AlertAudience.alert_id == alert.id, *due_rows)
+                    stats["deferred"] += deferred
+                    admission.defer(channels, deferred)
+                    break
+        return True
+
+    def _run_partition_digest(self, db: Session, now: datetime, strategies: Dict[str, object], partition: int,
+                              leases: LeaseManager, stats: dict, admission: Admission, alerts: List[Alert],
+                              due_rows: list) -> bool:
+        """
+        Digest mode of _run_partition: due rows are read in chunks of chunk_size users (keyset on
+        user_id) across all candidate alerts, throttled and claimed per chunk, and every user of
+        the chunk gets one send_digest message per channel with their alerts, most severe first.
+        Channel limits count messages, so users are admitted one by one on the channels of their
+        digest; users that do not fit have all their due rows deferred.
+        """
+        phases = stats["phases"]
+        if not alerts:
+            return True
+        by_id = {alert.id: alert for alert in alerts}
+        alerts_by_freq: Dict[int, List[int]] = {}
+        for alert in alerts:
+            alerts_by_freq.setdefault(alert.reminder_frequency_minutes or 120, []).append(alert.id)
+        due_rows = [*due_rows, AlertAudience.alert_id.in_(list(by_id))]
+        after = 0
+        while True:
+            with phase(phases, "candidates"):
+                user_ids = list(db.execute(
+                    select(AlertAudience.user_id)
+                    .where(*due_rows, AlertAudience.user_id > after)
+                    .group_by(AlertAudience.user_id)
+                    .order_by(AlertAudience.user_id)
+                    .limit(self.chunk_size)
+                ).scalars())
+                if not user_ids:
+                    return True
+                after = user_ids[-1]
+                pairs = db.execute(
+                    select(AlertAudience.alert_id, AlertAudience.user_id)
+                    .where(*due_rows, AlertAudience.user_id.in_(user_ids))
+                ).all()
+
+            with phase(phases, "throttle"):
+                last_sent = self._last_sent_pairs(db, list({alert_id for alert_id, _ in pairs}), user_ids)
+                throttled = []
+                for alert_id, user_id in pairs:
+                    last = last_sent.get((alert_id, user_id))
+                    freq_delta = timedelta(minutes=by_id[alert_id].reminder_frequency_minutes or 120)
+                    if last and (last + freq_delta) > now:
+                        stats["skipped_recent"] += 1
+                        throttled.append({"alert_id": alert_id, "user_id": user_id, "next_due_at": last + freq_delta})
+                self._reschedule(db, throttled)
+                db.commit()
+            if len(throttled) == len(pairs):
+                continue
+            held = {(row["alert_id"], row["user_id"]) for row in throttled}
+            pending = [pair for pair in pairs if pair not in held]
+            # a digest is one message per user and channel: admit user by user on their own channels
+            user_channels: Dict[int, Set[str]] = {}
+            for alert_id, user_id in pending:
+                user_channels.setdefault(user_id, set()).update(by_id[alert_id].delivery_types or [])
+            due_users, held_back = [], []
+            for user_id in sorted(user_channels):
+                (due_users if admission.admit(user_channels[user_id], 1) else held_back).append(user_id)
+            admitted_users = set(due_users)
+            pending = [pair for pair in pending if pair[1] in admitted_users]
+
+            with phase(phases, "claim"):
+                if not leases.renew(partition):
+                    logger.warning("Lost lease on reminder partition %s, stopping", partition)
+                    return False
+                claimed = self._claim_pairs(db, alerts_by_freq, due_users, now) if due_users else set()
+            stats["skipped_claimed"] += len(pending) - len(claimed)
+
+            with phase(phases, "send"):
+                by_channel: Dict[str, Dict[int, List[Alert]]] = {}
+                for alert_id, user_id in claimed:
+                    alert = by_id[alert_id]
+                    for channel in (alert.delivery_types or []):
+                        by_channel.setdefault(channel, {}).setdefault(user_id, []).append(alert)
+                for channel, user_alerts in by_channel.items():
+                    strat = strategies.get(channel)
+                    if not strat:
+                        logger.warning("No strategy for channel '%s', skipping", channel)
+                        continue
+                    digests = [(_Recipient(user_id), sorted(items, key=_severity_order, reverse=True))
+                               for user_id, items in sorted(user_alerts.items())]
+                    started = time.perf_counter()
+                    try:
+                        sent = strat.send_digest(digests)
+                    except Exception as ex:
+                        logger.exception("Failed to send digests to %d users via %s: %s", len(digests), channel, ex)
+                        sent = 0
+                    messages = len(digests) if getattr(strat, "combines_digests", False) else sent
+                    stats["sent_count"] += sent
+                    stats["messages_sent"] += messages if sent else 0
+                    admission.sent(channel, len(digests))
+                    stats["chunks"].append({
+                        "alert_id": None,
+                        "channel": channel,
+                        "size": len(digests),
+                        "sent": sent,
+                        "ms": round((time.perf_counter() - started) * 1000, 3),
+                    })
+            if held_back:
+                channels = set().union(*(user_channels[user_id] for user_id in held_back))
+                with phase(phases, "claim"):
+                    stats["deferred"] += self._defer(db, admission.retry_at(channels, now),
+                                                     AlertAudience.user_id.in_(held_back), *due_rows)
+                for user_id in held_back:
+                    admission.defer(user_channels[user_id], 1)
+
+    def run_cycle(self, partitions: Optional[List[int]] = None) -> dict:
+        """
+        Run one reminder cycle. Meant to be called by a scheduler or the trigger endpoint.
+        Works every partition whose lease it can claim (or only `partitions`, if given);
+        partitions held by a concurrent cycle are skipped.
+        Returns a dict with simple statistics for testing / logs; "phases" breaks the cycle down
+        into expire / snooze / candidates / throttle / claim / send with wall time, statement
+        count and DB time for each, and "channels" gives per channel what channel limits deferred
+        and the queue depth left behind.
+        """
+        db = self.db_session_factory()
+        now = datetime.utcnow()
+        stats = {
+            "now": now.isoformat(),
+            "alerts_checked": 0,
+            "sent_count": 0,
+            "skipped_snoozed": 0,
+            "skipped_recent": 0,
+            "skipped_expired": 0,
+            "skipped_claimed": 0,
+            # due (alert, user) rows left for a later cycle by channel limits
+            "deferred": 0,
+            "digest": self.digest,
+            # messages actually sent; below sent_count when digests combined several alerts per user
+            "messages_sent": 0,
+            "partitions_worked": [],
+            "partitions_skipped": [],
+            "chunk_size": self.chunk_size,
+            "chunks": [],
+            "phases": {},
+        }
+        started = time.perf_counter()
+        try:
+            with phase(stats["phases"], "expire"):
+                stats["skipped_expired"] = len(sweep_expired(db, now))
+            with phase(stats["phases"], "snooze"):
+                stats["skipped_snoozed"] = self._defer_snoozed(db, now)
+
+            strategies = self._make_strategies(db)
+            admission = Admission(self.limits, strategies)
+            leases = LeaseManager(db, self.owner, self.lease_seconds)
+            leases.ensure_partitions(self.partitions)
+
+            if partitions is None:
+                # start at a worker-specific offset so concurrent workers spread over partitions
+                offset = zlib.crc32(self.owner.encode()) % self.partitions
+                partitions = [(offset + i) % self.partitions for i in range(self.partitions)]
+            for partition in partitions:
+                if not leases.claim(partition):
+                    stats["partitions_skipped"].append(partition)
+                    continue
+                try:
+                    if self._run_partition(db, now, strategies, partition, leases, stats, admission):
+                        stats["partitions_worked"].append(partition)
+                    else:
+                        stats["partitions_skipped"].append(partition)
+                finally:
+                    leases.release(partition)
+            stats["messages_saved"] = stats["sent_count"] - stats["messages_sent"]
+            stats["channels"] = admission.stats()
+            # process totals: audiences are materialized on alert / user writes, which share the cache
+            stats["membership_cache"] = membership_cache.stats()
+            return stats
         finally:
             db.close()
+            observe_cycle(time.perf_counter() - started, stats["phases"])
+
+    def run_parallel(self, workers: int) -> dict:
+        """
+        Run `workers` cycles in separate processes against the shared database. Each worker
+        claims partitions through leases, so together they cover every partition exactly once.
+        The children get this engine's chunk size, partitioning, lease lifetime, digest mode and
+        channel limits (each rate and burst split between them, so together they keep to it), but
+        use the default session factory and strategies.
+        """
+        settings = {
+            "chunk_size": self.chunk_size,
+            "partitions": self.partitions,
+            "lease_seconds": self.lease_seconds,
+            "digest": self.digest,
+            "limits": {channel: limit.split(workers) for channel, limit in self.limits.items()},
+        }
+        with ProcessPoolExecutor(max_workers=workers, initializer=_reset_worker_pool) as pool:
+            results = list(pool.map(_run_worker_cycle, [settings] * workers))
+        combined = {key: 0 for key in ("alerts_checked", "sent_count", "messages_sent", "messages_saved", "deferred",
+                                       "skipped_snoozed", "skipped_recent", "skipped_expired", "skipped_claimed")}
+        for result in results:
+            for key in combined:
+                combined[key] += result[key]
+        combined["workers"] = results
+        return combined
+
+
+def _reset_worker_pool():
+    """Forked children must not reuse the parent's pooled connections; drop them without closing."""
+    from app.db import engine
+
+    engine.dispose(close=False)
+
+
+def _run_worker_cycle(settings: dict) -> dict:
+    return ReminderEngine(**settings).run_cycle()
+
+
+class _Recipient:
+    """Lightweight user handle for send_digest; strategies only read `.id`."""
+    __slots__ = ("id",)
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+_SEVERITY_RANK = {Severity.critical: 3, Severity.warning: 2, Severity.info: 1}
+
+
+def _severity_order(alert: Alert):
+    """Digest order key: severity, then newest start_at, then id (as in the inbox)."""
+    return _SEVERITY_RANK.get(alert.severity, 1), alert.start_at or datetime.min, alert.id
@@ -0,0 +1,264 @@
+# app/services/retention.py
+"""
+Retention for notification_deliveries.
+
+The hot table keeps, per (alert, user, channel), the latest delivery (the reminder throttle reads
+it) plus everything sent within DELIVERY_RETENTION_DAYS. Older rows are moved out in keyset
+batches to gzip-compressed NDJSON files, partitioned by the day they were sent:
+
+    <ARCHIVE_DIR>/notification_deliveries/2026-09-14/<first id>-<last id>.ndjson.gz
+
+Rows still referenced by an unfinished outbox job (its delivery_id, or a digest job's delivery_ids)
+are never archived. A batch is written as
+"*.pending" files, its rows are deleted and committed, and only then are the files renamed into
+place; recover() settles pending files left by a crash (published if their rows are gone,
+dropped otherwise), so every row lives in exactly one place. One run at a time per archive dir.
+
+    python -m app.services.retention [--dry-run]
+"""
+import gzip
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import and_, delete, exists, func, or_, select, tuple_, update
+from sqlalchemy.orm import Session, aliased
+
+from app.config import ARCHIVE_DIR, DELIVERY_RETENTION_DAYS, RETENTION_BATCH_SIZE
+from app.model import DeliveryJob, NotificationDelivery
+
+TABLE = "notification_deliveries"
+SUFFIX = ".ndjson.gz"
+PENDING = ".pending"
+COLUMNS = ("id", "alert_id", "user_id", "sent_at", "channel", "delivered", "read")
+UNFINISHED = ("pending", "in_flight", "dead")
+
+
+class RetentionLocked(RuntimeError):
+    """Another retention run holds the archive directory."""
+
+
+@contextmanager
+def _exclusive(archive_dir: str):
+    """
+    Non-blocking OS lock on <archive_dir>/.lock (flock on POSIX, msvcrt.locking on Windows).
+    The OS drops it when the process dies, so a crashed run never leaves a stale lock.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    with open(os.path.join(archive_dir, ".lock"), "w") as lock:
+        if os.name == "nt":
+            import msvcrt
+
+            def acquire():
+                msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+
+            def release():
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            def acquire():
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+            def release():
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        try:
+            acquire()
+        except OSError:
+            raise RetentionLocked(f"retention is already running for {archive_dir}")
+        try:
+            yield
+        finally:
+            release()
+
+
+def _table_dir(archive_dir: str) -> str:
+    return os.path.join(archive_dir, TABLE)
+
+
+def archivable(cutoff: datetime):
+    """Deliveries older than cutoff that are superseded for their (alert, user, channel) and not pinned by the outbox."""
+    nd = NotificationDelivery
+    newer = aliased(NotificationDelivery)
+    superseded = exists().where(
+        newer.alert_id == nd.alert_id,
+        newer.user_id == nd.user_id,
+        newer.channel == nd.channel,
+        or_(newer.sent_at > nd.sent_at, and_(newer.sent_at == nd.sent_at, newer.id > nd.id)),
+    )
+    # digest jobs list their rows in delivery_ids instead; see _digest_pinned
+    pinned = exists().where(DeliveryJob.delivery_id == nd.id, DeliveryJob.status != "done")
+    return (
+        select(*(getattr(nd, c) for c in COLUMNS))
+        .where(nd.sent_at < cutoff, superseded, ~pinned)
+        .order_by(nd.sent_at, nd.id)
+    )
+
+
+def _digest_pinned(db: Session) -> Set[int]:
+    """
+    Deliveries listed by unfinished digest jobs. Read once per run: jobs enqueued later only
+    reference new rows, which are never old enough to archive.
+    """
+    pinned: Set[int] = set()
+    for (ids,) in db.execute(
+        select(DeliveryJob.delivery_ids)
+        .where(DeliveryJob.status.in_(UNFINISHED), DeliveryJob.delivery_ids != None)
+    ):
+        pinned.update(ids)
+    return pinned
+
+
+def _record(row) -> dict:
+    record = dict(zip(COLUMNS, row))
+    record["sent_at"] = record["sent_at"].isoformat()
+    return record
+
+
+def _write_pending(rows, archive_dir: str) -> List[str]:
+    """Write one pending file per sent day; returns their paths."""
+    by_day: Dict[date, list] = {}
+    for row in rows:
+        by_day.setdefault(row.sent_at.date(), []).append(row)
+    paths = []
+    for day, day_rows in by_day.items():
+        folder = os.path.join(_table_dir(archive_dir), day.isoformat())
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{day_rows[0].id}-{day_rows[-1].id}{SUFFIX}{PENDING}")
+        with open(path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                for row in day_rows:
+                    gz.write((json.dumps(_record(row)) + "\n").encode())
+            raw.flush()
+            os.fsync(raw.fileno())
+        paths.append(path)
+    return paths
+
+
+def _publish(paths: List[str]):
+    for path in paths:
+        os.replace(path, path[:-len(PENDING)])
+
+
+def _discard(paths: List[str]):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _read(path: str) -> Iterator[dict]:
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def recover(db: Session, archive_dir: str = ARCHIVE_DIR) -> int:
+    """Settle pending files of an interrupted run. Returns how many were published."""
+    published = 0
+    root = _table_dir(archive_dir)
+    if not os.path.isdir(root):
+        return 0
+    for day in sorted(os.listdir(root)):
+        for name in sorted(os.listdir(os.path.join(root, day))):
+            if not name.endswith(PENDING):
+                continue
+            path = os.path.join(root, day, name)
+            ids = [record["id"] for record in _read(path)]
+            remaining = db.execute(
+                select(func.count()).select_from(NotificationDelivery).where(NotificationDelivery.id.in_(ids))
+            ).scalar()
+            if remaining:
+                _discard([path])
+            else:
+                _publish([path])
+                published += 1
+    return published
+
+
+def archive_deliveries(db: Session, now: Optional[datetime] = None, retention_days: int = DELIVERY_RETENTION_DAYS,
+                       batch_size: int = RETENTION_BATCH_SIZE, archive_dir: str = ARCHIVE_DIR,
+                       dry_run: bool = False) -> dict:
+    """
+    Move archivable deliveries to the archive, one committed batch at a time.
+    Returns counts; with dry_run nothing is written and "archived" is what would move.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    stats = {"cutoff": cutoff.isoformat(), "archived": 0, "batches": 0, "files": 0, "recovered": 0}
+    nd = NotificationDelivery
+    with _exclusive(archive_dir):
+        if not dry_run:
+            stats["recovered"] = recover(db, archive_dir)
+        pinned = _digest_pinned(db)
+        after = None
+        while True:
+            q = archivable(cutoff)
+            if after is not None:
+                # rows kept by an earlier batch's checks are not re-read
+                q = q.where(tuple_(nd.sent_at, nd.id) > tuple_(*after))
+            fetched = db.execute(q.limit(batch_size)).all()
+            if not fetched:
+                break
+            after = (fetched[-1].sent_at, fetched[-1].id)
+            rows = [row for row in fetched if row.id not in pinned]
+            stats["archived"] += len(rows)
+            stats["batches"] += 1
+            if dry_run or not rows:
+                continue
+            ids = [row.id for row in rows]
+            paths = _write_pending(rows, archive_dir)
+            try:
+                # finished outbox jobs may still point at the rows
+                db.execute(update(DeliveryJob).where(DeliveryJob.delivery_id.in_(ids)).values(delivery_id=None)
+                           .execution_options(synchronize_session=False))
+                db.execute(delete(nd).where(nd.id.in_(ids)).execution_options(synchronize_session=False))
+                db.commit()
+            except Exception:
+                db.rollback()
+                _discard(paths)
+                raise
+            _publish(paths)
+            stats["files"] += len(paths)
+            if len(fetched) < batch_size:
+                break
+    return stats
+
+
+def iter_archived(since: Optional[date] = None, until: Optional[date] = None, alert_id: Optional[int] = None,
+                  user_id: Optional[int] = None, channel: Optional[str] = None,
+                  archive_dir: str = ARCHIVE_DIR) -> Iterator[dict]:
+    """
+    Archived deliveries in sent-day order, one decoded record at a time. The day range picks
+    partitions; the other filters are applied while reading.
+    """
+    root = _table_dir(archive_dir)
+    if not os.path.isdir(root):
+        return
+    for day in sorted(os.listdir(root)):
+        if (since and day < since.isoformat()) or (until and day > until.isoformat()):
+            continue
+        names = [n for n in os.listdir(os.path.join(root, day)) if n.endswith(SUFFIX)]
+        for name in sorted(names, key=lambda n: int(n.split("-", 1)[0])):
+            for record in _read(os.path.join(root, day, name)):
+                if alert_id is not None and record["alert_id"] != alert_id:
+                    continue
+                if user_id is not None and record["user_id"] != user_id:
+                    continue
+                if channel is not None and record["channel"] != channel:
+                    continue
+                yield record
+
+
+if __name__ == "__main__":
+    from app.db import SessionLocal, init_db
+
+    init_db()
+    session = SessionLocal()
+    try:
+        result = archive_deliveries(session, dry_run="--dry-run" in sys.argv[1:])
+        print(json.dumps(result))
+    finally:
+        session.close()
@@ -0,0 +1,100 @@
+# app/services/scheduler.py
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func
+
+from app.config import REMINDER_SCHEDULER_MAX_SLEEP_SECONDS, REMINDER_SCHEDULER_MIN_SLEEP_SECONDS
+from app.db import SessionLocal
+from app.model import Alert, AlertAudience
+from app.services.lifecycle import next_expiry
+from app.services.reminder_engine import ReminderEngine
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderScheduler:
+    """
+    In-process asyncio runner for ReminderEngine.
+    Runs a cycle, then sleeps until the earliest alert_audience.next_due_at or active-alert
+    expires_at (capped by max_sleep_seconds) instead of polling, so expiries are swept promptly. wake() cuts the sleep short, e.g. after an alert is created.
+    When a cycle had to skip partitions leased by another worker, their rows stay due, so it
+    sleeps at least min_sleep_seconds rather than retrying in a tight loop until the lease expires.
+    Cycles run in a worker thread so the event loop keeps serving requests.
+    """
+
+    def __init__(self, db_session_factory=SessionLocal, engine: Optional[ReminderEngine] = None,
+                 max_sleep_seconds: float = REMINDER_SCHEDULER_MAX_SLEEP_SECONDS,
+                 min_sleep_seconds: float = REMINDER_SCHEDULER_MIN_SLEEP_SECONDS):
+        self.db_session_factory = db_session_factory
+        self.engine = engine or ReminderEngine(db_session_factory=db_session_factory)
+        self.max_sleep_seconds = max_sleep_seconds
+        self.min_sleep_seconds = min_sleep_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def next_due_at(self) -> Optional[datetime]:
+        db = self.db_session_factory()
+        try:
+            due = (
+                db.query(func.min(AlertAudience.next_due_at))
+                .join(Alert, Alert.id == AlertAudience.alert_id)
+                .filter(AlertAudience.next_due_at != None, Alert.status == "active", Alert.reminders_enabled == True)
+                .scalar()
+            )
+            expiry = next_expiry(db)
+            return min(t for t in (due, expiry) if t is not None) if due or expiry else None
+        finally:
+            db.close()
+
+    def _sleep_seconds(self, next_due: Optional[datetime], contended: bool = False) -> float:
+        if next_due is None:
+            return self.max_sleep_seconds
+        delay = (next_due - datetime.utcnow()).total_seconds()
+        floor = self.min_sleep_seconds if contended else 0.0
+        return min(max(delay, floor), self.max_sleep_seconds)
+
+    async def _run(self):
+        while True:
+            try:
+                stats = await asyncio.to_thread(self.engine.run_cycle)
+                logger.info("Reminder cycle: sent=%s", stats.get("sent_count"))
+                # due rows in partitions another worker holds stay in the past until it is done
+                contended = bool(stats.get("partitions_skipped"))
+                next_due = await asyncio.to_thread(self.next_due_at)
+            except Exception:
+                logger.exception("Reminder cycle failed")
+                next_due, contended = None, False
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._sleep_seconds(next_due, contended))
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def wake(self):
+        """Thread-safe: ask a running scheduler to re-check due times now. No-op when not started."""
+        if self._task is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+
+reminder_scheduler = ReminderScheduler()
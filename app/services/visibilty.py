@@ -1,21 +1,47 @@
-from app.model import User, Team, Alert
+from app.model import User, Alert, AlertAudience
+from app.services import membership
+from sqlalchemy import Row, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Iterator, List, Set
 
 
 class VisibilityResolver:
     @staticmethod
-    def resolve(alert: Alert, db: Session) -> List[User]:
-        vis = alert.visibility or {}
+    def resolve(alert: Alert, db: Session, chunk_size: int, *criteria) -> Iterator[List[Row]]:
+        """
+        Recipients of an alert, read from the materialized alert_audience table and streamed in
+        ascending user id order as lists of at most chunk_size lightweight rows (row.id is the
+        user id). Each chunk is its own keyset query, so only the current chunk is in memory and
+        callers may write and commit between chunks. Extra criteria narrow the audience rows.
+        """
+        after = 0
+        while True:
+            rows = db.execute(
+                select(AlertAudience.user_id.label("id"))
+                .where(AlertAudience.alert_id == alert.id, AlertAudience.user_id > after, *criteria)
+                .order_by(AlertAudience.user_id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            after = rows[-1].id
+
+    @staticmethod
+    def resolve_user_ids(visibility: dict, db: Session) -> Set[int]:
+        """
+        Expand a visibility blob ({"org", "teams", "users"}) into the set of user ids it targets,
+        from the cached team membership (app.services.membership).
+        """
+        return membership.TargetedUsers(db, visibility).all()
+
+    @staticmethod
+    def matches(visibility: dict, user: User) -> bool:
+        vis = visibility or {}
         if vis.get("org"):
-            return db.query(User).all()
-        user_ids = set(vis.get("users", []) or [])
-        team_ids = vis.get("teams", []) or []
-        if team_ids:
-            users_in_teams = db.query(User).filter(User.team_id.in_(team_ids)).all()
-            for u in users_in_teams:
-                user_ids.add(u.id)
-        # fetch users by ids (avoid duplicates)
-        if user_ids:
-            return db.query(User).filter(User.id.in_(list(user_ids))).all()
-        return []
\ No newline at end of file
+            return True
+        if user.id in (vis.get("users") or []):
+            return True
+        return bool(user.team_id and user.team_id in (vis.get("teams") or []))
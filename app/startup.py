@@ -0,0 +1,107 @@
+# app/startup.py
+"""
+Per-worker startup, run from the FastAPI lifespan before the worker accepts traffic.
+
+Nothing here changes the schema: check_schema compares the stored revision with the head of
+the migrations (one SELECT) so that every worker of a multi-worker server can start at once
+without racing on DDL; `python -m app.migrate` is the explicit step that upgrades. With
+STARTUP_WARMUP the worker then opens its pool connections, loads the team membership cache and
+runs the inbox read statements once for an existing user, so the first requests do not pay for
+connecting, statement compilation and a cold membership cache. Rendered inbox pages are per
+user and are not prefilled.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.config import DB_POOL_SIZE
+from app.db import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.migrate import check_schema
+from app.model import Team, User
+from app.services import inbox, inbox_versions, membership
+
+logger = logging.getLogger(__name__)
+
+
+def _prime_pool(bind, connections: int):
+    held = []
+    try:
+        for _ in range(connections):
+            conn = bind.connect()
+            conn.execute(text("SELECT 1"))
+            held.append(conn)
+    finally:
+        for conn in held:
+            conn.close()
+
+
+async def _prime_async_pool(bind, connections: int):
+    held = []
+    try:
+        for _ in range(connections):
+            conn = await bind.connect()
+            await conn.execute(text("SELECT 1"))
+            held.append(conn)
+    finally:
+        for conn in held:
+            await conn.close()
+
+
+def _warm_reads(db: Session) -> bool:
+    """
+    The statements of GET /user/{id}/alerts, as _render_inbox issues them, for the lowest user id
+    (bypassing the page cache); False on an empty database, where there is nothing to read.
+    """
+    user_id = db.execute(select(User.id).order_by(User.id).limit(1)).scalar()
+    if user_id is None:
+        return False
+    inbox_versions.current_version(db, user_id)
+    inbox.fetch_page(db, user_id)
+    inbox_versions.next_transition(db, user_id, datetime.utcnow())
+    return True
+
+
+def _warm_membership(db: Session) -> int:
+    """Load every team's member ids into the membership cache; returns the number of teams."""
+    return len(membership.team_members(db, db.execute(select(Team.id)).scalars()))
+
+
+def _warm_sync() -> dict:
+    _prime_pool(engine, DB_POOL_SIZE)
+    db = SessionLocal()
+    try:
+        return {"teams": _warm_membership(db), "reads": _warm_reads(db)}
+    finally:
+        db.close()
+
+
+async def warm_up() -> dict:
+    """Open DB_POOL_SIZE connections per engine, load team membership and run the hot reads once."""
+    started = time.perf_counter()
+    info = await asyncio.to_thread(_warm_sync)
+    if async_engine is not None:
+        await _prime_async_pool(async_engine, DB_POOL_SIZE)
+        async with AsyncSessionLocal() as adb:
+            await adb.run_sync(_warm_reads)
+    info.update(ms=round((time.perf_counter() - started) * 1000, 1), connections=DB_POOL_SIZE)
+    return info
+
+
+async def startup(warm: bool) -> dict:
+    """Check the schema (raises app.migrate.SchemaOutOfDate), then optionally warm up."""
+    info = {"revision": check_schema(engine)}
+    if warm:
+        info["warmup"] = await warm_up()
+    logger.info("worker ready: %s", info)
+    return info
+
+
+async def shutdown():
+    """Close pooled connections; aiosqlite runs each connection on its own thread, which would keep the worker alive."""
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
@@ -1,13 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.db import init_db
+from app.config import OUTBOX_WORKER_ENABLED, REMINDER_SCHEDULER_ENABLED, STARTUP_WARMUP
 from app.routers import admin, users
-
-
-app = FastAPI(title="Alerting Platform MVP")
-
-
-# Initialize DB (creates sqlite file and tables if not present)
-init_db()
+from app.services.delivery.outbox import OutboxWorker
+from app.services.delivery.registry import queued_strategies
+from app.services.metrics import MetricsMiddleware
+from app.services.scheduler import reminder_scheduler
+from app.startup import shutdown, startup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # no DDL here: the schema is only checked; `python -m app.migrate` upgrades it
+    await startup(warm=STARTUP_WARMUP)
+    if REMINDER_SCHEDULER_ENABLED:
+        reminder_scheduler.start()
+    outbox_worker = OutboxWorker(queued_strategies()) if OUTBOX_WORKER_ENABLED else None
+    if outbox_worker:
+        outbox_worker.start()
+    yield
+    await reminder_scheduler.stop()
+    if outbox_worker:
+        await outbox_worker.stop()
+    await shutdown()
+
+
+app = FastAPI(title="Alerting Platform MVP", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
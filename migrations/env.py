@@ -0,0 +1,59 @@
+# migrations/env.py
+"""
+Alembic environment. Runs against app.config.DATABASE_URL, or against the connection passed in
+config.attributes["connection"] when invoked programmatically (see app/migrate.py).
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.config import DATABASE_URL
+from app.model import Base
+
+config = context.config
+connection = config.attributes.get("connection")
+
+# only configure logging when run from the alembic CLI; the app owns logging otherwise
+if config.config_file_name is not None and connection is None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        # SQLite cannot ALTER most constraints in place; batch mode recreates the table instead
+        render_as_batch=True,
+        compare_type=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline():
+    _configure(url=DATABASE_URL, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    if connection is not None:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    from app.db import make_engine
+
+    engine = make_engine(DATABASE_URL)
+    with engine.connect() as conn:
+        _configure(connection=conn)
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
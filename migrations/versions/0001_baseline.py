@@ -0,0 +1,67 @@
+"""baseline: schema as created by init_db() (create_all) before migrations existed
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "teams",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), unique=True),
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("team_id", sa.Integer(), sa.ForeignKey("teams.id"), nullable=True),
+        sa.Column("is_admin", sa.Boolean()),
+    )
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("severity", sa.Enum("info", "warning", "critical", name="severity")),
+        sa.Column("delivery_types", sa.JSON()),
+        sa.Column("start_at", sa.DateTime()),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("reminders_enabled", sa.Boolean()),
+        sa.Column("reminder_frequency_minutes", sa.Integer()),
+        sa.Column("visibility", sa.JSON()),
+        sa.Column("status", sa.String()),
+    )
+    op.create_table(
+        "notification_deliveries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("alert_id", sa.Integer(), sa.ForeignKey("alerts.id")),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("sent_at", sa.DateTime()),
+        sa.Column("channel", sa.String()),
+        sa.Column("delivered", sa.Boolean()),
+        sa.Column("read", sa.Boolean()),
+    )
+    op.create_table(
+        "user_alert_preferences",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("alert_id", sa.Integer(), sa.ForeignKey("alerts.id")),
+        sa.Column("snoozed_until", sa.Date(), nullable=True),
+        sa.Column("read", sa.Boolean()),
+    )
+
+
+def downgrade():
+    for table in ("user_alert_preferences", "notification_deliveries", "alerts", "users", "teams"):
+        op.drop_table(table)
+    sa.Enum(name="severity").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,29 @@
+"""alert audience: materialized (alert, user) visibility pairs with their reminder schedule
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "alert_audience",
+        sa.Column("alert_id", sa.Integer(), sa.ForeignKey("alerts.id"), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("next_due_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_alert_audience_user_alert", "alert_audience", ["user_id", "alert_id"])
+    op.create_index("ix_alert_audience_next_due_at", "alert_audience", ["next_due_at"])
+
+
+def downgrade():
+    op.drop_table("alert_audience")
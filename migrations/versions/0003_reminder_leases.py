@@ -0,0 +1,27 @@
+"""reminder leases: one row per reminder partition
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "reminder_leases",
+        sa.Column("partition", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("owner", sa.String(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("reminder_leases")
@@ -0,0 +1,36 @@
+"""delivery outbox: queued deliveries for external channels
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "delivery_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("delivery_id", sa.Integer(), sa.ForeignKey("notification_deliveries.id")),
+        sa.Column("alert_id", sa.Integer(), sa.ForeignKey("alerts.id")),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("channel", sa.String(), nullable=False),
+        sa.Column("status", sa.String()),
+        sa.Column("attempts", sa.Integer()),
+        sa.Column("next_attempt_at", sa.DateTime()),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_delivery_outbox_status_next_attempt", "delivery_outbox", ["status", "next_attempt_at"])
+
+
+def downgrade():
+    op.drop_table("delivery_outbox")
@@ -0,0 +1,37 @@
+"""analytics rollups: daily counters, and read_at on user_alert_preferences
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("user_alert_preferences", sa.Column("read_at", sa.DateTime(), nullable=True))
+    op.create_table(
+        "analytics_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("alert_id", sa.Integer(), sa.ForeignKey("alerts.id"), nullable=False),
+        sa.Column("severity", sa.String(), nullable=False),
+        sa.Column("channel", sa.String(), nullable=False),
+        sa.Column("deliveries", sa.Integer(), nullable=False),
+        sa.Column("reads", sa.Integer(), nullable=False),
+        sa.Column("snoozes", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("day", "alert_id", "severity", "channel", name="uq_analytics_rollups_key"),
+    )
+    op.create_index("ix_analytics_rollups_alert_day", "analytics_rollups", ["alert_id", "day"])
+
+
+def downgrade():
+    op.drop_table("analytics_rollups")
+    with op.batch_alter_table("user_alert_preferences") as batch:
+        batch.drop_column("read_at")
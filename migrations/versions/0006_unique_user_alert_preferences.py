@@ -0,0 +1,64 @@
+"""unique (user_id, alert_id) on user_alert_preferences, merging duplicate rows first
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+prefs = sa.table(
+    "user_alert_preferences",
+    sa.column("id", sa.Integer()),
+    sa.column("user_id", sa.Integer()),
+    sa.column("alert_id", sa.Integer()),
+    sa.column("snoozed_until", sa.Date()),
+    sa.column("read", sa.Boolean()),
+    sa.column("read_at", sa.DateTime()),
+)
+
+
+def _merge_duplicates():
+    """
+    Before the constraint, concurrent clicks could insert several rows per (user, alert). Keep the
+    oldest row of each pair, carrying over the latest state any duplicate recorded: read if any
+    row was, the latest snoozed_until and read_at. Then delete the rest.
+    """
+    dup = prefs.alias("dup")
+    same_pair = sa.and_(dup.c.user_id == prefs.c.user_id, dup.c.alert_id == prefs.c.alert_id)
+    keepers = (
+        sa.select(sa.func.min(prefs.c.id))
+        .group_by(prefs.c.user_id, prefs.c.alert_id)
+        .having(sa.func.count() > 1)
+    )
+    op.execute(
+        prefs.update()
+        .where(prefs.c.id.in_(keepers))
+        .values(
+            read=sa.exists().where(same_pair, dup.c.read == sa.true()),
+            snoozed_until=sa.select(sa.func.max(dup.c.snoozed_until)).where(same_pair).scalar_subquery(),
+            read_at=sa.select(sa.func.max(dup.c.read_at)).where(same_pair).scalar_subquery(),
+        )
+    )
+    op.execute(
+        prefs.delete().where(
+            prefs.c.id.not_in(sa.select(sa.func.min(prefs.c.id)).group_by(prefs.c.user_id, prefs.c.alert_id))
+        )
+    )
+
+
+def upgrade():
+    _merge_duplicates()
+    with op.batch_alter_table("user_alert_preferences") as batch:
+        batch.create_unique_constraint("uq_user_alert_preferences_user_alert", ["user_id", "alert_id"])
+
+
+def downgrade():
+    with op.batch_alter_table("user_alert_preferences") as batch:
+        batch.drop_constraint("uq_user_alert_preferences_user_alert", type_="unique")
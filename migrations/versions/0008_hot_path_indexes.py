@@ -0,0 +1,38 @@
+"""hot-path indexes: latest delivery per (alert, user), users by team, active alerts by expiry
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text("status = 'active'")
+
+
+def upgrade():
+    op.create_index(
+        "ix_notification_deliveries_alert_user_sent",
+        "notification_deliveries",
+        ["alert_id", "user_id", sa.text("sent_at DESC")],
+    )
+    op.create_index("ix_users_team_id", "users", ["team_id"])
+    op.create_index(
+        "ix_alerts_active_expires_at",
+        "alerts",
+        ["expires_at"],
+        sqlite_where=ACTIVE,
+        postgresql_where=ACTIVE,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_alerts_active_expires_at", table_name="alerts")
+    op.drop_index("ix_users_team_id", table_name="users")
+    op.drop_index("ix_notification_deliveries_alert_user_sent", table_name="notification_deliveries")
@@ -0,0 +1,23 @@
+"""delivery retention indexes: deliveries by (sent_at, id), outbox jobs by delivery
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_notification_deliveries_sent_at", "notification_deliveries", ["sent_at", "id"])
+    op.create_index("ix_delivery_outbox_delivery_id", "delivery_outbox", ["delivery_id"])
+
+
+def downgrade():
+    op.drop_index("ix_delivery_outbox_delivery_id", table_name="delivery_outbox")
+    op.drop_index("ix_notification_deliveries_sent_at", table_name="notification_deliveries")
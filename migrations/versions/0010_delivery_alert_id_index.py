@@ -0,0 +1,21 @@
+"""deliveries by (alert_id, id) for keyset admin listings and exports
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_notification_deliveries_alert_id", "notification_deliveries", ["alert_id", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_notification_deliveries_alert_id", table_name="notification_deliveries")
@@ -0,0 +1,25 @@
+"""outbox digests: alert_ids on delivery_outbox, jobs by (user_id, created_at)
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("delivery_outbox", sa.Column("alert_ids", sa.JSON(), nullable=True))
+    op.create_index("ix_delivery_outbox_user_created", "delivery_outbox", ["user_id", "created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_delivery_outbox_user_created", table_name="delivery_outbox")
+    with op.batch_alter_table("delivery_outbox") as batch:
+        batch.drop_column("alert_ids")
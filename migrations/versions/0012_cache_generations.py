@@ -0,0 +1,26 @@
+"""cache generations: counters that invalidate in-process caches (team membership)
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "cache_generations",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("generation", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("cache_generations")
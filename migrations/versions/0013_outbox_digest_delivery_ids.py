@@ -0,0 +1,58 @@
+"""outbox digest delivery ids: digest jobs list their deliveries instead of matching them by timestamp
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+jobs = sa.table(
+    "delivery_outbox",
+    sa.column("id", sa.Integer()),
+    sa.column("user_id", sa.Integer()),
+    sa.column("channel", sa.String()),
+    sa.column("created_at", sa.DateTime()),
+    sa.column("alert_ids", sa.JSON()),
+    sa.column("delivery_ids", sa.JSON()),
+)
+deliveries = sa.table(
+    "notification_deliveries",
+    sa.column("id", sa.Integer()),
+    sa.column("alert_id", sa.Integer()),
+    sa.column("user_id", sa.Integer()),
+    sa.column("channel", sa.String()),
+    sa.column("sent_at", sa.DateTime()),
+)
+
+
+def upgrade():
+    op.add_column("delivery_outbox", sa.Column("delivery_ids", sa.JSON(), nullable=True))
+    # existing digest jobs: their rows were written with sent_at == created_at
+    bind = op.get_bind()
+    for job in bind.execute(sa.select(jobs).where(jobs.c.alert_ids != None)).all():
+        ids = dict(bind.execute(
+            sa.select(deliveries.c.alert_id, deliveries.c.id).where(
+                deliveries.c.alert_id.in_(job.alert_ids),
+                deliveries.c.user_id == job.user_id,
+                deliveries.c.channel == job.channel,
+                deliveries.c.sent_at == job.created_at,
+            )
+        ).all())
+        bind.execute(
+            jobs.update().where(jobs.c.id == job.id)
+            .values(delivery_ids=[ids[alert_id] for alert_id in job.alert_ids if alert_id in ids])
+        )
+    op.drop_index("ix_delivery_outbox_user_created", table_name="delivery_outbox")
+
+
+def downgrade():
+    op.create_index("ix_delivery_outbox_user_created", "delivery_outbox", ["user_id", "created_at"])
+    with op.batch_alter_table("delivery_outbox") as batch:
+        batch.drop_column("delivery_ids")
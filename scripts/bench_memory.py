@@ -0,0 +1,96 @@
+"""
+Peak-memory benchmark for org-wide alerts.
+
+For each audience size, loads that many users into a throwaway SQLite database, creates one
+org-wide alert through AlertRepo (which builds its audience) and runs one reminder cycle.
+Reports the peak Python heap (tracemalloc) of the audience build and of the cycle; with
+streaming recipients both stay flat as the audience grows.
+
+    python -m scripts.bench_memory --users 10000 50000 200000 --chunk-size 1000
+Each size runs in a fresh interpreter so the measurements do not share caches.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--worker", type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def measure(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / 2 ** 20, elapsed
+
+
+def worker(users: int, chunk_size: int) -> dict:
+    """Runs inside a fresh interpreter with DATABASE_URL pointing at an empty database."""
+    sys.path.insert(0, ROOT)
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from app.db import SessionLocal, init_db
+    from app.model import User
+    from app.repositories.alert_repo import AlertRepo
+    from app.services.reminder_engine import ReminderEngine
+
+    init_db()
+    db = SessionLocal()
+    for start in range(0, users, 10_000):
+        db.execute(insert(User), [{"name": f"mem-{i}"} for i in range(start, min(start + 10_000, users))])
+    db.commit()
+
+    alert, sync_peak, sync_seconds = measure(lambda: AlertRepo(db).create(
+        title="org-wide", body="memory benchmark", severity="info", delivery_types=["inapp"],
+        start_at=datetime.utcnow() - timedelta(minutes=1), visibility={"org": True, "teams": [], "users": []},
+    ))
+    db.close()
+    stats, cycle_peak, cycle_seconds = measure(lambda: ReminderEngine(chunk_size=chunk_size).run_cycle())
+    return {
+        "users": users,
+        "sync_peak_mb": round(sync_peak, 1),
+        "sync_seconds": round(sync_seconds, 2),
+        "cycle_peak_mb": round(cycle_peak, 1),
+        "cycle_seconds": round(cycle_seconds, 2),
+        "sent": stats["sent_count"],
+    }
+
+
+def main():
+    args = parse_args()
+    if args.worker is not None:
+        print(json.dumps(worker(args.worker, args.chunk_size)))
+        return
+
+    print(f"chunk_size={args.chunk_size}")
+    print(f"{'users':>9} {'sync peak MB':>12} {'sync s':>7} {'cycle peak MB':>13} {'cycle s':>8} {'sent':>9}")
+    for users in args.users:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/bench_memory.db",
+                   REMINDER_SCHEDULER_ENABLED="false", OUTBOX_WORKER_ENABLED="false")
+        out = subprocess.run(
+            [sys.executable, "-m", "scripts.bench_memory", "--worker", str(users), "--chunk-size", str(args.chunk_size)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{r['users']:>9} {r['sync_peak_mb']:>12.1f} {r['sync_seconds']:>7.2f} {r['cycle_peak_mb']:>13.1f} "
+              f"{r['cycle_seconds']:>8.2f} {r['sent']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Load test for the real-time inbox stream.
+
+Seeds a throwaway SQLite database with N users, starts one uvicorn worker on it, opens a
+WebSocket to /user/{id}/stream for every user, then creates an org-wide alert and triggers a
+reminder cycle. Reports how many connections the worker held and the fan-out latency
+(trigger request sent -> payload received) across clients.
+
+    python -m scripts.bench_stream --connections 2000
+Requires the `websockets` package (already needed by uvicorn for WebSocket support).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    return parser.parse_args()
+
+
+def seed(db_url: str, users: int):
+    os.environ["DATABASE_URL"] = db_url
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import insert
+    from app.db import SessionLocal, init_db
+    from app.model import User
+
+    init_db()
+    db = SessionLocal()
+    db.execute(insert(User), [{"name": f"stream-{i}"} for i in range(users)])
+    db.commit()
+    db.close()
+
+
+def post(url: str, body: dict = None) -> dict:
+    data = json.dumps(body).encode() if body is not None else b""
+    req = urllib.request.Request(url, data=data, method="POST", headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        return json.loads(resp.read())
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def run(args, base: str):
+    import websockets
+
+    ws_base = base.replace("http://", "ws://")
+    connected = []
+    started = time.perf_counter()
+    for user_id in range(1, args.connections + 1):
+        connected.append(await websockets.connect(f"{ws_base}/user/{user_id}/stream", open_timeout=30, max_queue=None))
+    connect_seconds = time.perf_counter() - started
+
+    received = []
+    trigger_at = {}
+
+    async def wait_for_alert(ws):
+        await ws.recv()
+        received.append(time.perf_counter())
+
+    waiters = [asyncio.ensure_future(wait_for_alert(ws)) for ws in connected]
+    await asyncio.to_thread(post, f"{base}/admin/alerts?is_admin=true", {
+        "title": "stream bench", "body": "org-wide", "severity": "critical",
+        "start_at": "2000-01-01T00:00:00", "visibility": {"org": True},
+    })
+    trigger_at["t"] = time.perf_counter()
+    stats = await asyncio.to_thread(post, f"{base}/admin/trigger_reminders?is_admin=true")
+    await asyncio.wait(waiters, timeout=args.timeout)
+
+    latencies = [(t - trigger_at["t"]) * 1000 for t in received]
+    print(f"connections held: {len(connected)} (opened in {connect_seconds:.1f}s)")
+    print(f"reminders sent: {stats['stats']['sent_count']}, payloads received: {len(received)}")
+    if latencies:
+        print(f"fan-out latency ms: p50={percentile(latencies, 50):.1f} p95={percentile(latencies, 95):.1f} "
+              f"max={max(latencies):.1f} mean={statistics.mean(latencies):.1f}")
+    for ws in connected:
+        await ws.close()
+
+
+def main():
+    args = parse_args()
+    db_url = f"sqlite:///{tempfile.mkdtemp()}/bench_stream.db"
+    seed(db_url, args.connections)
+    env = dict(os.environ, DATABASE_URL=db_url)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning",
+         "--backlog", "4096"],
+        cwd=ROOT, env=env,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(base + "/", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.2)
+        asyncio.run(run(args, base))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
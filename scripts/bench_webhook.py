@@ -0,0 +1,88 @@
+"""
+Outbox / webhook throughput benchmark.
+
+Starts a local stand-in webhook server with configurable latency and failure rate,
+enqueues jobs through WebhookStrategy and drains them with OutboxWorker at several
+concurrency levels.
+
+    python -m scripts.bench_webhook --jobs 2000 --latency-ms 50 --concurrency 1 10 50 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--db", default=None, help="database URL (default: a throwaway SQLite file)")
+    return parser.parse_args()
+
+
+def start_server(latency_ms: float, fail_rate: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency_ms / 1000)
+            self.send_response(500 if random.random() < fail_rate else 204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    args = parse_args()
+    os.environ["DATABASE_URL"] = args.db or f"sqlite:///{tempfile.mkdtemp()}/bench_webhook.db"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from sqlalchemy import insert
+    from app.db import SessionLocal, init_db
+    from app.model import Alert, User
+    from app.services.delivery.outbox import OutboxWorker
+    from app.services.delivery.webhook import WebhookStrategy
+
+    init_db()
+    server = start_server(args.latency_ms, args.fail_rate)
+    url = f"http://127.0.0.1:{server.server_address[1]}/hook"
+
+    db = SessionLocal()
+    db.execute(insert(User), [{"name": f"bench-{i}"} for i in range(args.jobs)])
+    alert = Alert(title="bench", body="webhook benchmark", delivery_types=["webhook"])
+    db.add(alert)
+    db.commit()
+    users = db.query(User).order_by(User.id.desc()).limit(args.jobs).all()
+
+    print(f"jobs={args.jobs} latency={args.latency_ms}ms fail_rate={args.fail_rate}")
+    print(f"{'concurrency':>11} {'seconds':>8} {'jobs/s':>8} {'done':>6} {'retried':>7} {'dead':>5}")
+    for concurrency in args.concurrency:
+        strategy = WebhookStrategy(db, url=url, max_concurrency=concurrency)
+        strategy.send_batch(alert, users)
+        # no backoff, so retried jobs are attempted again within the same drain
+        worker = OutboxWorker({"webhook": strategy}, batch_size=max(concurrency * 4, 100), backoff_base=0)
+        started = time.perf_counter()
+        totals = asyncio.run(worker.drain())
+        elapsed = time.perf_counter() - started
+        print(f"{concurrency:>11} {elapsed:>8.2f} {totals['done'] / elapsed:>8.1f} "
+              f"{totals['done']:>6} {totals['retried']:>7} {totals['dead']:>5}")
+    db.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Benchmark harness for the hot paths.
+
+Measures latency (p50 / p95 / max) and SQL statements per call for
+  - ReminderEngine.run_cycle over a fixed set of due alerts
+  - GET /user/{id}/alerts (full render and If-None-Match revalidation)
+  - POST /user/{id}/alerts/{alert_id}/read | unread | snooze
+  - GET /admin/analytics
+  - worker startup: from spawning `uvicorn main:app` (imports included) to its first served
+    inbox request, with and without STARTUP_WARMUP
+and writes the results as JSON, so runs can be compared between commits.
+
+    python -m scripts.benchmark --output before.json               # generates a dataset first
+    python -m scripts.benchmark --db sqlite:////tmp/big.db --output after.json --compare before.json
+
+Without --db a throwaway SQLite database is generated with scripts.generate_data (sized by
+--users / --alerts / --deliveries). --compare exits 1 when a case got slower than
+--max-regression (relative p50) or issues more statements per call than the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=None, help="existing database URL (default: generate a throwaway SQLite one)")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--alerts", type=int, default=200)
+    parser.add_argument("--deliveries", type=int, default=200_000)
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls per HTTP case")
+    parser.add_argument("--cycles", type=int, default=5, help="timed reminder cycles")
+    parser.add_argument("--cycle-alerts", type=int, default=5, help="alerts made due before each reminder cycle")
+    parser.add_argument("--startup-runs", type=int, default=5, help="server starts timed per warm-up setting")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", default=None, help="baseline JSON file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed relative p50 increase")
+    return parser.parse_args()
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def summarize(latencies_ms, statements) -> dict:
+    return {
+        "calls": len(latencies_ms),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "max_ms": round(max(latencies_ms), 3),
+        "statements_p50": percentile(statements, 50),
+        "statements_max": max(statements),
+    }
+
+
+class StatementCounter:
+    """Counts SQL statements sent to the app's engines (sync and, when enabled, async)."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def measure(counter: StatementCounter, calls, warmup: int = 1) -> dict:
+    """Run each zero-argument callable in `calls`, timing it and counting its statements."""
+    for call in calls[:warmup]:
+        call()
+    latencies, statements = [], []
+    for call in calls[warmup:]:
+        before = counter.count
+        started = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started) * 1000)
+        statements.append(counter.count - before)
+    return summarize(latencies, statements)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_startup(runs: int, user_id: int, warmup: bool) -> dict:
+    """
+    Start a single uvicorn worker `runs` times and time each from spawn to the first inbox
+    response; "first_request_p50_ms" is that request alone. Statements are not counted here.
+    """
+    env = {**os.environ, "STARTUP_WARMUP": str(warmup).lower()}
+    totals, first_requests = [], []
+    for _ in range(runs):
+        port = free_port()
+        url = f"http://127.0.0.1:{port}/user/{user_id}/alerts"
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                                   "--log-level", "warning"], cwd=ROOT, env=env)
+        try:
+            while True:
+                if server.poll() is not None:
+                    sys.exit(f"server exited with {server.returncode} during startup")
+                request_started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(url, timeout=30) as response:
+                        response.read()
+                    break
+                except urllib.error.HTTPError as ex:
+                    sys.exit(f"first request failed with {ex.code}")
+                except (ConnectionError, urllib.error.URLError):
+                    time.sleep(0.002)
+            done = time.perf_counter()
+            totals.append((done - started) * 1000)
+            first_requests.append((done - request_started) * 1000)
+        finally:
+            server.terminate()
+            server.wait()
+    result = summarize(totals, [0] * runs)
+    result["first_request_p50_ms"] = round(percentile(first_requests, 50), 3)
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(args) -> dict:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import delete, func, update
+    from app.db import SessionLocal, async_engine, engine
+    from app.model import Alert, AlertAudience, DeliveryJob, NotificationDelivery, User
+    from app.services.reminder_engine import ReminderEngine
+    from main import app
+
+    rng = random.Random(args.seed)
+    counter = StatementCounter([engine] + ([async_engine.sync_engine] if async_engine is not None else []))
+    client = TestClient(app)
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        dataset = {
+            "users": db.query(func.count(User.id)).scalar(),
+            "alerts": db.query(func.count(Alert.id)).scalar(),
+            "audience": db.query(func.count()).select_from(AlertAudience).scalar(),
+            "deliveries": db.query(func.count(NotificationDelivery.id)).scalar(),
+        }
+        live = (Alert.status == "active") & (Alert.start_at <= now) & ((Alert.expires_at == None) | (Alert.expires_at > now))
+        pairs = (
+            db.query(AlertAudience.user_id, AlertAudience.alert_id)
+            .join(Alert, Alert.id == AlertAudience.alert_id)
+            .filter(live)
+            .order_by(func.random())
+            .limit(args.iterations * 3 + 3)
+            .all()
+        )
+        cycle_alerts = [
+            alert_id for (alert_id,) in
+            db.query(Alert.id).filter(live, Alert.reminders_enabled == True).order_by(Alert.id).limit(args.cycle_alerts)
+        ]
+    finally:
+        db.close()
+    if not pairs:
+        sys.exit("no visible (user, alert) pairs in the database; generate data first")
+
+    results = {}
+
+    # reminder cycle: before each timed cycle, make the same alerts due again and drop the previous cycle's sends
+    bench_started = datetime.utcnow()
+
+    def reset_due():
+        reset = SessionLocal()
+        try:
+            reset.execute(update(AlertAudience).where(AlertAudience.alert_id.in_(cycle_alerts))
+                          .values(next_due_at=datetime.utcnow()).execution_options(synchronize_session=False))
+            reset.execute(delete(DeliveryJob).where(DeliveryJob.created_at >= bench_started))
+            reset.execute(delete(NotificationDelivery).where(NotificationDelivery.sent_at >= bench_started))
+            reset.commit()
+        finally:
+            reset.close()
+
+    reminder_engine = ReminderEngine()
+    sent = []
+
+    def cycle():
+        reset_due()
+        before = counter.count
+        started = time.perf_counter()
+        stats = reminder_engine.run_cycle()
+        sent.append(stats["sent_count"])
+        return (time.perf_counter() - started) * 1000, counter.count - before
+
+    # untimed first cycle: also drains whatever the dataset already had due
+    cycle()
+    timings = [cycle() for _ in range(args.cycles)]
+    results["reminder_cycle"] = summarize([t for t, _ in timings], [s for _, s in timings])
+    results["reminder_cycle"]["sent_per_cycle"] = percentile(sent, 50)
+
+    def get(url, **kwargs):
+        def call():
+            response = client.get(url, **kwargs)
+            assert response.status_code in (200, 304), (url, response.status_code)
+            return response
+        return call
+
+    def post(url):
+        def call():
+            response = client.post(url)
+            assert response.status_code == 200, (url, response.status_code)
+        return call
+
+    users = [user_id for user_id, _ in pairs]
+    results["inbox"] = measure(counter, [get(f"/user/{u}/alerts") for u in users[:args.iterations + 1]])
+    etags = {u: client.get(f"/user/{u}/alerts").headers.get("etag") for u in users[:args.iterations + 1]}
+    results["inbox_revalidate"] = measure(counter, [
+        get(f"/user/{u}/alerts", headers={"If-None-Match": etags[u]}) for u in users[:args.iterations + 1]
+    ])
+    for action in ("read", "unread", "snooze"):
+        results[f"pref_{action}"] = measure(counter, [
+            post(f"/user/{u}/alerts/{a}/{action}") for u, a in rng.sample(pairs, min(len(pairs), args.iterations + 1))
+        ])
+    results["admin_analytics"] = measure(counter, [get("/admin/analytics?is_admin=true")] * (args.iterations + 1))
+    if args.startup_runs:
+        results["startup"] = measure_startup(args.startup_runs, users[0], warmup=False)
+        results["startup_warm"] = measure_startup(args.startup_runs, users[0], warmup=True)
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "dataset": dataset,
+            "iterations": args.iterations,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> int:
+    """
+    Print a side-by-side table; returns the number of regressions. Latency is judged on p50,
+    which is far less noisy than p95 over a few dozen calls; p95 is shown for context.
+    """
+    regressions = 0
+    print(f"{'case':<18} {'p50 base':>9} {'p50 now':>9} {'change':>8} {'p95 base':>9} {'p95 now':>9} "
+          f"{'stmts base':>10} {'stmts now':>9}")
+    for case, now in current["results"].items():
+        base = baseline.get("results", {}).get(case)
+        if base is None:
+            print(f"{case:<18} {'-':>9} {now['p50_ms']:>9.1f} {'new':>8} {'-':>9} {now['p95_ms']:>9.1f} "
+                  f"{'-':>10} {now['statements_p50']:>9}")
+            continue
+        change = (now["p50_ms"] - base["p50_ms"]) / base["p50_ms"] if base["p50_ms"] else 0.0
+        slower = change > max_regression
+        more_sql = now["statements_p50"] > base["statements_p50"]
+        regressions += slower or more_sql
+        flag = "  <-- regression" if slower or more_sql else ""
+        print(f"{case:<18} {base['p50_ms']:>9.1f} {now['p50_ms']:>9.1f} {change:>+8.0%} {base['p95_ms']:>9.1f} "
+              f"{now['p95_ms']:>9.1f} {base['statements_p50']:>10} {now['statements_p50']:>9}{flag}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    generated = args.db is None
+    os.environ["DATABASE_URL"] = args.db or f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+    # keep background loops from competing with the measured calls
+    os.environ["REMINDER_SCHEDULER_ENABLED"] = "false"
+    os.environ["OUTBOX_WORKER_ENABLED"] = "false"
+    sys.path.insert(0, ROOT)
+
+    if generated:
+        from app.db import SessionLocal, init_db
+        from scripts.generate_data import generate
+
+        init_db()
+        db = SessionLocal()
+        try:
+            generate(db, teams=max(args.users // 250, 1), users=args.users, alerts=args.alerts, months=3,
+                     deliveries=args.deliveries, seed=args.seed)
+        finally:
+            db.close()
+
+    report = run_benchmarks(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"{'case':<18} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'stmts':>6}")
+    for case, r in report["results"].items():
+        print(f"{case:<18} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['max_ms']:>8.1f} {r['statements_p50']:>6}")
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Synthetic data generator for production-scale testing.
+
+Bulk-loads N teams, M users and K alerts with a mix of org / team / user visibility,
+builds the alert audience, and backfills months of notification_deliveries history plus
+read / snooze preferences. Analytics rollups are rebuilt from the generated rows at the end.
+
+    python -m scripts.generate_data --teams 50 --users 20000 --alerts 500 --months 6
+    python -m scripts.generate_data --db sqlite:////tmp/big.db --deliveries 2000000
+
+The database must be empty (or pass --append). Generation is deterministic for a given --seed.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BATCH_SIZE = 10_000
+SEVERITIES = (("info", 0.6), ("warning", 0.3), ("critical", 0.1))
+# share of alerts per visibility kind; the rest target a handful of individual users
+ORG_SHARE = 0.1
+TEAM_SHARE = 0.6
+FREQUENCIES_MINUTES = (60, 120, 240, 1440)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=None, help="database URL (default: DATABASE_URL)")
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--alerts", type=int, default=200)
+    parser.add_argument("--months", type=int, default=3, help="length of the delivery history")
+    parser.add_argument("--deliveries", type=int, default=200_000, help="total history rows")
+    parser.add_argument("--read-rate", type=float, default=0.3, help="share of audience pairs marked read")
+    parser.add_argument("--snooze-rate", type=float, default=0.05, help="share of audience pairs snoozed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--append", action="store_true", help="allow loading into a non-empty database")
+    return parser.parse_args()
+
+
+def _chunks(rows, size=BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _severity(rng: random.Random) -> str:
+    return rng.choices([s for s, _ in SEVERITIES], weights=[w for _, w in SEVERITIES])[0]
+
+
+def _visibility(rng: random.Random, team_ids, user_ids) -> dict:
+    roll = rng.random()
+    if roll < ORG_SHARE:
+        return {"org": True, "teams": [], "users": []}
+    if roll < ORG_SHARE + TEAM_SHARE:
+        return {"org": False, "teams": rng.sample(team_ids, min(len(team_ids), rng.randint(1, 3))), "users": []}
+    return {"org": False, "teams": [], "users": rng.sample(user_ids, min(len(user_ids), rng.randint(1, 20)))}
+
+
+def generate(db, teams: int, users: int, alerts: int, months: int, deliveries: int,
+             read_rate: float = 0.3, snooze_rate: float = 0.05, seed: int = 42, log=print) -> dict:
+    """Load the dataset through `db` (a Session). Returns row counts per table."""
+    from sqlalchemy import func, insert
+    from app.model import Alert, AlertAudience, NotificationDelivery, Team, User, UserAlertPreference
+    from app.repositories.audience_repo import AudienceRepo
+    from app.services import membership
+    from app.services.analytics import rebuild_rollups
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    # history stops a day before now, so generated rows never throttle a reminder cycle
+    history_end = now - timedelta(days=1)
+    history_start = history_end - timedelta(days=30 * months)
+    started = time.perf_counter()
+
+    def step(message):
+        log(f"[{time.perf_counter() - started:7.1f}s] {message}")
+
+    first_team = (db.query(func.max(Team.id)).scalar() or 0) + 1
+    db.execute(insert(Team), [{"name": f"team-{first_team + i}"} for i in range(teams)])
+    team_ids = [tid for (tid,) in db.query(Team.id).filter(Team.id >= first_team)]
+    step(f"{len(team_ids)} teams")
+
+    first_user = (db.query(func.max(User.id)).scalar() or 0) + 1
+    rows = [
+        # about 5% of users belong to no team
+        {"name": f"user-{first_user + i}", "team_id": rng.choice(team_ids) if rng.random() > 0.05 else None,
+         "is_admin": rng.random() < 0.01}
+        for i in range(users)
+    ]
+    for chunk in _chunks(rows):
+        db.execute(insert(User), chunk)
+    membership.bump(db)
+    user_ids = [uid for (uid,) in db.query(User.id).filter(User.id >= first_user)]
+    step(f"{len(user_ids)} users")
+
+    rows = []
+    for i in range(alerts):
+        start_at = history_start + timedelta(seconds=rng.uniform(0, (now - history_start).total_seconds()))
+        expired = rng.random() < 0.3
+        rows.append({
+            "title": f"Generated alert {i}",
+            "body": f"Synthetic alert {i} for load testing.",
+            "severity": _severity(rng),
+            "delivery_types": ["inapp"],
+            "start_at": start_at,
+            "expires_at": (start_at + timedelta(days=rng.randint(1, 14))) if expired else None,
+            "reminders_enabled": rng.random() < 0.9,
+            "reminder_frequency_minutes": rng.choice(FREQUENCIES_MINUTES),
+            "visibility": _visibility(rng, team_ids, user_ids),
+            "status": "active" if rng.random() < 0.9 else "inactive",
+        })
+    db.execute(insert(Alert), rows)
+    db.commit()
+    step(f"{alerts} alerts")
+
+    AudienceRepo(db).rebuild_all()
+    pairs = db.query(AlertAudience.alert_id, AlertAudience.user_id).all()
+    step(f"{len(pairs)} audience rows")
+
+    if pairs:
+        span = (history_end - history_start).total_seconds()
+        for offset in range(0, deliveries, BATCH_SIZE):
+            db.execute(insert(NotificationDelivery), [
+                {"alert_id": alert_id, "user_id": user_id, "channel": "inapp", "delivered": True, "read": False,
+                 "sent_at": history_start + timedelta(seconds=rng.uniform(0, span))}
+                for alert_id, user_id in (rng.choice(pairs) for _ in range(min(BATCH_SIZE, deliveries - offset)))
+            ])
+            db.commit()
+        step(f"{deliveries} deliveries over {months} months")
+
+        today = date.today()
+        picked = rng.sample(pairs, int(len(pairs) * min(read_rate + snooze_rate, 1.0)))
+        prefs = []
+        for n, (alert_id, user_id) in enumerate(picked):
+            snoozed = n < len(picked) * snooze_rate / max(read_rate + snooze_rate, 1e-9)
+            read_at = history_end - timedelta(seconds=rng.uniform(0, 7 * 86400))
+            prefs.append({"alert_id": alert_id, "user_id": user_id, "read": not snoozed,
+                          "read_at": None if snoozed else read_at, "snoozed_until": today if snoozed else None})
+        for chunk in _chunks(prefs):
+            db.execute(insert(UserAlertPreference), chunk)
+        db.commit()
+        step(f"{len(prefs)} preferences")
+
+    rollups = rebuild_rollups(db)
+    step(f"{rollups} analytics rollup rows")
+    return {
+        "teams": len(team_ids),
+        "users": len(user_ids),
+        "alerts": alerts,
+        "audience": len(pairs),
+        "deliveries": deliveries if pairs else 0,
+        "rollups": rollups,
+    }
+
+
+def main():
+    args = parse_args()
+    if args.db:
+        os.environ["DATABASE_URL"] = args.db
+    sys.path.insert(0, ROOT)
+
+    from app.db import SessionLocal, init_db
+    from app.model import User
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if not args.append and db.query(User.id).first() is not None:
+            sys.exit("database is not empty; pass --append to load anyway")
+        counts = generate(db, args.teams, args.users, args.alerts, args.months, args.deliveries,
+                          args.read_rate, args.snooze_rate, args.seed)
+        print(", ".join(f"{table}={n}" for table, n in counts.items()))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
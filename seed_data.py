@@ -1,6 +1,8 @@
 # seed_data.py
 from app.db import init_db, SessionLocal
 from app.model import Team, User, Alert
+from app.repositories.audience_repo import AudienceRepo
+from app.services import membership
 from datetime import datetime, timedelta
 
 if __name__ == "__main__":
@@ -24,6 +26,7 @@ if __name__ == "__main__":
             carol = User(name="Carol", team_id=mkt.id)
             dave = User(name="Dave", team_id=None)
             db.add_all([alice, bob, carol, dave])
+            membership.bump(db)
             db.commit()
 
             # create alerts
@@ -54,6 +57,8 @@ if __name__ == "__main__":
                 visibility={"org": False, "teams": [], "users": [2]},
             )
             db.add_all([a1, a2, a3])
+            db.flush()
+            AudienceRepo(db).rebuild_all()
             db.commit()
             print("Seeded DB with teams, users, and alerts. Users: Alice(id=1,is_admin), Bob(id=2), Carol(id=3), Dave(id=4)")
     finally:
@@ -0,0 +1,70 @@
+# tests/conftest.py
+"""
+Tests run against a throwaway SQLite file (or TEST_DATABASE_URL, e.g. an empty PostgreSQL database)
+migrated to head. DATABASE_URL is set before anything from app is imported, because app.db builds
+its engines at import time.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/tests.db"
+os.environ["REMINDER_SCHEDULER_ENABLED"] = "false"
+os.environ["OUTBOX_WORKER_ENABLED"] = "false"
+
+import pytest
+from sqlalchemy import delete
+
+from app.db import SessionLocal, engine
+from app.migrate import upgrade
+from app.model import Base, CacheGeneration
+from app.services import membership
+
+
+@pytest.fixture(scope="session")
+def schema():
+    upgrade(engine)
+    yield engine
+    engine.dispose()
+
+
+def empty_database():
+    """
+    A session on an emptied database. The cache generation is bumped, not reset, so membership
+    cached by earlier tests stays unreachable.
+    """
+    session = SessionLocal()
+    for table in reversed(Base.metadata.sorted_tables):
+        if table is not CacheGeneration.__table__:
+            session.execute(delete(table))
+    membership.bump(session)
+    session.commit()
+    return session
+
+
+@pytest.fixture
+def db(schema):
+    session = empty_database()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(schema):
+    """HTTP client for the app; the lifespan (schema check, warm-up, workers) is not run."""
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def module_db(schema):
+    """Like db, but shared by the tests of one module, e.g. to seed once."""
+    session = empty_database()
+    yield session
+    session.close()
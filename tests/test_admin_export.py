@@ -0,0 +1,128 @@
+# tests/test_admin_export.py
+import asyncio
+import csv
+import functools
+import gc
+import io
+import json
+from datetime import datetime
+
+import main
+from app.db import SessionLocal
+from app.model import Alert, NotificationDelivery, User, UserAlertPreference
+from app.routers import admin
+from app.services import export
+
+
+def seed(db):
+    db.add_all([User(id=1, name="a"), User(id=2, name="b")])
+    db.add_all([
+        Alert(id=1, title="first", body="b", severity="info", start_at=datetime(2024, 3, 1, 9),
+              delivery_types=["email"], visibility={"org": True, "teams": [], "users": []}),
+        Alert(id=2, title="second, with comma", body="b", severity="critical", start_at=datetime(2024, 3, 2, 9),
+              delivery_types=["email"], visibility={"org": True, "teams": [], "users": []}),
+    ])
+    db.add_all([
+        NotificationDelivery(id=n, alert_id=1 + n % 2, user_id=1 + n // 3 % 2, channel="email",
+                             sent_at=datetime(2024, 3, 1 + n // 2, 12))
+        for n in range(1, 9)
+    ])
+    db.add(UserAlertPreference(id=1, user_id=1, alert_id=1, read=True, read_at=datetime(2024, 3, 3, 8)))
+    db.commit()
+
+
+def test_export_streams_ndjson_and_csv_in_id_order(db, client, monkeypatch):
+    seed(db)
+    # small batches, so the body is several flushed blocks
+    monkeypatch.setattr(export, "stream", functools.partial(export.stream, batch_size=3))
+    response = client.get("/admin/export/deliveries?is_admin=true")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == 'attachment; filename="deliveries.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["id"] for r in rows] == list(range(1, 9))
+    assert rows[0] == {"id": 1, "alert_id": 2, "user_id": 1, "sent_at": "2024-03-01T12:00:00",
+                       "channel": "email", "delivered": True, "read": False}
+
+    response = client.get("/admin/export/alerts?is_admin=true&format=csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["id"] for r in rows] == ["1", "2"]
+    assert rows[1]["title"] == "second, with comma"
+    assert json.loads(rows[0]["visibility"]) == {"org": True, "teams": [], "users": []}
+    assert rows[0]["start_at"] == "2024-03-01T09:00:00"
+
+    assert client.get("/admin/export/deliveries").status_code == 403
+    assert client.get("/admin/export/users?is_admin=true").status_code == 404
+    assert client.get("/admin/export/alerts?is_admin=true&format=xml").status_code == 422
+
+
+def test_export_filters(db, client):
+    seed(db)
+
+    def ids(query):
+        response = client.get(f"/admin/export/{query}&is_admin=true")
+        assert response.status_code == 200
+        return [json.loads(line)["id"] for line in response.text.splitlines()]
+
+    assert ids("deliveries?alert_id=1") == [2, 4, 6, 8]
+    assert ids("deliveries?user_id=2") == [3, 4, 5]
+    assert ids("deliveries?alert_id=1&user_id=1") == [2, 6, 8]
+    # since / until are inclusive days
+    assert ids("deliveries?since=2024-03-02&until=2024-03-03") == [2, 3, 4, 5]
+    assert ids("deliveries?until=2024-03-01") == [1]
+    assert ids("alerts?alert_id=2") == [2]
+    # user_id does not apply to alerts
+    assert ids("alerts?user_id=2") == [1, 2]
+    assert ids("alerts?since=2024-03-02") == [2]
+    assert ids("preferences?since=2024-03-03&user_id=1") == [1]
+    assert ids("preferences?until=2024-03-02") == []
+
+
+def test_export_closes_its_session_when_the_client_disconnects(db, monkeypatch):
+    seed(db)
+    sessions, closed = [], []
+
+    def session_factory():
+        session = SessionLocal()
+        close = session.close
+        session.close = lambda: (closed.append(session), close())
+        sessions.append(session)
+        return session
+
+    monkeypatch.setattr(admin, "SessionLocal", session_factory)
+    monkeypatch.setattr(export, "stream", functools.partial(export.stream, batch_size=1))
+
+    async def run():
+        sent, first_chunk = [], asyncio.Event()
+        requests = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+        async def receive():
+            message = next(requests, None)
+            if message:
+                return message
+            # the client goes away after the first line
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_chunk.set()
+
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                 "scheme": "http", "path": "/admin/export/deliveries", "raw_path": b"/admin/export/deliveries",
+                 "query_string": b"is_admin=true", "root_path": "", "headers": [], "client": ("test", 1),
+                 "server": ("test", 80)}
+        await main.app(scope, receive, send)
+        return sent
+
+    sent = asyncio.run(run())
+    gc.collect()
+    bodies = [m["body"] for m in sent if m["type"] == "http.response.body" and m.get("body")]
+    assert sent[0]["status"] == 200
+    # the stream stopped well short of the eight rows
+    assert 1 <= len(bodies) < 8
+    assert len(sessions) == 1
+    assert sessions[0] in closed
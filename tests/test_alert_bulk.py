@@ -0,0 +1,58 @@
+# tests/test_alert_bulk.py
+import json
+
+from sqlalchemy import select
+
+from app.model import Alert, AlertAudience, User
+from app.routers import admin
+from app.services import membership
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def alert(n: int, **fields) -> dict:
+    return {"title": f"bulk {n}", "body": "b", "severity": "info",
+            "visibility": {"org": False, "teams": [], "users": [1]}, **fields}
+
+
+def test_ndjson_items_get_their_own_ids_and_errors(db, client):
+    db.add(User(id=1, name="a"))
+    membership.bump(db)
+    db.commit()
+    lines = [
+        json.dumps(alert(0)),
+        json.dumps({"title": "no body or severity"}),
+        "{not json",
+        json.dumps(alert(3, severity="critical")),
+        "",
+        json.dumps(alert(5, severity="loud")),
+        json.dumps(alert(6)),
+    ]
+    response = client.post("/admin/alerts/bulk?is_admin=true", content="\n".join(lines).encode(), headers=NDJSON)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["failed"]) == (3, 3)
+    results = {r["index"]: r for r in body["results"]}
+    # blank lines are skipped, so the indexes count items, not lines
+    assert sorted(results) == [0, 1, 2, 3, 4, 5]
+    assert {loc for e in results[1]["errors"] for loc in e["loc"]} == {"body", "severity"}
+    assert results[2]["errors"][0]["msg"] == "invalid JSON"
+    assert results[4]["errors"][0]["loc"] == ["severity"]
+
+    titles = dict(db.execute(select(Alert.id, Alert.title)).all())
+    assert {index: titles[results[index]["alert_id"]] for index in (0, 3, 5)} == {0: "bulk 0", 3: "bulk 3", 5: "bulk 6"}
+    assert db.get(Alert, results[3]["alert_id"]).severity.value == "critical"
+    assert set(db.execute(select(AlertAudience.alert_id).where(AlertAudience.user_id == 1)).scalars()) == set(titles)
+
+
+def test_bulk_requests_over_the_cap_are_rejected(db, client, monkeypatch):
+    monkeypatch.setattr(admin, "ALERT_BULK_MAX_ITEMS", 3)
+    too_many = "\n".join(json.dumps(alert(n)) for n in range(5)).encode()
+    response = client.post("/admin/alerts/bulk?is_admin=true", content=too_many, headers=NDJSON)
+    assert response.status_code == 413
+    assert client.post("/admin/alerts/bulk?is_admin=true", json=[alert(n) for n in range(4)]).status_code == 413
+    assert db.execute(select(Alert.id)).first() is None
+
+    ok = client.post("/admin/alerts/bulk?is_admin=true", json=[alert(n) for n in range(3)])
+    assert ok.status_code == 200
+    assert ok.json()["created"] == 3
@@ -0,0 +1,50 @@
+# tests/test_alert_repo.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.model import AlertAudience, Team, User
+from app.repositories.alert_repo import AlertRepo
+from app.services import membership
+from app.services.reminder_engine import ReminderEngine
+
+
+def seed_users(db, count: int = 3):
+    db.add(Team(id=1, name="eng"))
+    db.add_all([User(id=uid, name=f"u{uid}", team_id=1) for uid in range(1, count + 1)])
+    membership.bump(db)
+    db.commit()
+
+
+def due_at(db, alert_id):
+    return dict(db.execute(
+        select(AlertAudience.user_id, AlertAudience.next_due_at).where(AlertAudience.alert_id == alert_id)
+    ).all())
+
+
+def test_lowering_the_frequency_reschedules_from_the_last_send(db):
+    seed_users(db)
+    repo = AlertRepo(db)
+    alert = repo.create(title="t", body="b", start_at=datetime.utcnow() - timedelta(hours=1),
+                        reminder_frequency_minutes=120, visibility={"org": False, "teams": [1], "users": []})
+    before_cycle = datetime.utcnow()
+    assert ReminderEngine(partitions=1).run_cycle()["sent_count"] == 3
+    sent = due_at(db, alert.id)
+    assert all(due >= before_cycle + timedelta(minutes=120) for due in sent.values())
+
+    repo.update(alert, reminder_frequency_minutes=5)
+    db.expire_all()
+    lowered = due_at(db, alert.id)
+    assert all(before_cycle + timedelta(minutes=5) <= due <= datetime.utcnow() + timedelta(minutes=5)
+               for due in lowered.values())
+
+    # a user who has not been sent the alert yet keeps the first schedule
+    db.add(User(id=4, name="u4", team_id=1))
+    membership.bump(db)
+    db.commit()
+    repo.update(alert, visibility={"org": False, "teams": [1], "users": []})
+    repo.update(alert, reminder_frequency_minutes=60)
+    db.expire_all()
+    raised = due_at(db, alert.id)
+    assert raised[4] == alert.start_at
+    assert all(due >= before_cycle + timedelta(minutes=60) for uid, due in raised.items() if uid != 4)
@@ -0,0 +1,74 @@
+# tests/test_analytics_rollups.py
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import update
+
+from app.model import Alert, AlertAudience, AnalyticsRollup, NotificationDelivery, Severity, User, UserAlertPreference
+from app.repositories.alert_repo import AlertRepo
+from app.services import analytics
+from app.services.preference_service import PreferenceService
+
+
+def seed(db, alerts: int = 2):
+    db.add(User(id=1, name="alice"))
+    for alert_id in range(1, alerts + 1):
+        db.add(Alert(id=alert_id, title=f"alert {alert_id}", body="rollups", start_at=datetime.utcnow(),
+                     visibility={"org": True, "teams": [], "users": []}))
+    db.flush()
+    db.add_all([AlertAudience(alert_id=alert_id, user_id=1) for alert_id in range(1, alerts + 1)])
+    db.commit()
+
+
+def snoozed_yesterday(db):
+    """Rewind today's snoozes to yesterday, as if the user had snoozed then."""
+    yesterday = date.today() - timedelta(days=1)
+    db.execute(update(UserAlertPreference).values(snoozed_until=yesterday))
+    db.execute(update(AnalyticsRollup).where(AnalyticsRollup.snoozes > 0).values(day=yesterday))
+    db.commit()
+
+
+def test_snoozing_again_on_a_later_day_matches_raw_counts(db):
+    seed(db)
+    prefs = PreferenceService()
+    prefs.snooze_for_today(1, 1)
+    snoozed_yesterday(db)
+    prefs.snooze_for_today(1, 1)
+
+    assert analytics.verify_rollups(db) == {}
+    assert analytics.summary(db)["totals"]["snoozes"] == 1
+
+
+def test_bulk_snooze_and_reads_match_raw_counts(db):
+    seed(db)
+    prefs = PreferenceService()
+    prefs.snooze_many_for_today(1)
+    snoozed_yesterday(db)
+    prefs.snooze_many_for_today(1)
+    prefs.mark_read_many(1)
+    prefs.mark_unread(1, 2)
+
+    assert analytics.verify_rollups(db) == {}
+    totals = analytics.summary(db)["totals"]
+    assert (totals["snoozes"], totals["reads"]) == (2, 1)
+
+
+def test_severity_change_moves_the_counters_with_the_alert(db):
+    seed(db)
+    alert = db.get(Alert, 1)
+    analytics.record_deliveries(db, alert, "inapp", 3)
+    analytics.record_deliveries(db, alert, "webhook", 2)
+    db.add_all([NotificationDelivery(alert_id=1, user_id=1, channel=c) for c in ("inapp",) * 3 + ("webhook",) * 2])
+    db.commit()
+    PreferenceService().mark_read(1, 1)
+    PreferenceService().snooze_for_today(1, 2)
+
+    AlertRepo(db).update(alert, severity=Severity.critical)
+    # deliveries recorded after the change land on the same rows
+    analytics.record_deliveries(db, alert, "inapp", 1)
+    db.add(NotificationDelivery(alert_id=1, user_id=1, channel="inapp"))
+    db.commit()
+
+    assert analytics.verify_rollups(db) == {}
+    by_severity = analytics.summary(db)["by_severity"]
+    assert by_severity["critical"] == {"deliveries": 6, "reads": 1, "snoozes": 0}
+    assert by_severity["info"] == {"deliveries": 0, "reads": 0, "snoozes": 1}
@@ -0,0 +1,40 @@
+# tests/test_audience_sync.py
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.model import Alert, AlertAudience, Team, User
+from app.repositories.audience_repo import AudienceRepo
+from app.services import membership
+
+
+def audience(db, alert_id):
+    return list(db.execute(
+        select(AlertAudience.user_id).where(AlertAudience.alert_id == alert_id).order_by(AlertAudience.user_id)
+    ).scalars())
+
+
+def test_sync_alert_walks_overlapping_targets_in_small_windows(db):
+    db.add_all([Team(id=1, name="eng"), Team(id=2, name="ops")])
+    db.add_all([User(id=uid, name=f"u{uid}", team_id=1 if uid % 2 else 2) for uid in range(1, 11)])
+    membership.bump(db)
+    db.add_all([
+        Alert(id=1, title="org", body="b", start_at=datetime.utcnow(), visibility={"org": True, "teams": [], "users": []}),
+        # user 3 is both listed and on team 1; user 99 does not exist
+        Alert(id=2, title="team", body="b", start_at=datetime.utcnow(),
+              visibility={"org": False, "teams": [1], "users": [3, 4, 99]}),
+    ])
+    db.commit()
+    repo = AudienceRepo(db)
+    assert repo.sync_alert(db.get(Alert, 1), chunk_size=3) == 10
+    assert repo.sync_alert(db.get(Alert, 2), chunk_size=2) == 6
+    db.commit()
+    assert audience(db, 1) == list(range(1, 11))
+    assert audience(db, 2) == [1, 3, 4, 5, 7, 9]
+    assert membership.membership_cache.get((membership.current_generation(db), 1)) is not None
+
+    alert = db.get(Alert, 2)
+    alert.visibility = {"org": False, "teams": [2], "users": [1]}
+    assert repo.sync_alert(alert, chunk_size=2) == 8
+    db.commit()
+    assert audience(db, 2) == [1, 2, 4, 6, 8, 10]
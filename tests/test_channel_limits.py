@@ -0,0 +1,128 @@
+# tests/test_channel_limits.py
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, update
+
+from app.config import CHANNEL_DEFER_SECONDS
+from app.model import Alert, AlertAudience, DeliveryJob, NotificationDelivery, User
+from app.repositories.audience_repo import AudienceRepo
+from app.services import membership
+from app.services.delivery import registry, webhook
+from app.services.delivery.limits import ChannelLimit, TokenBucket
+from app.services.reminder_engine import ReminderEngine
+
+USERS = 12
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def limited(channel: str, rate: float, burst: float, clock: Clock, max_in_flight=None) -> ChannelLimit:
+    limit = ChannelLimit(channel, max_in_flight=max_in_flight)
+    limit.bucket = TokenBucket(rate, burst, clock=clock)
+    return limit
+
+
+def seed(db, *alerts: dict):
+    db.execute(insert(User), [{"id": uid, "name": f"u{uid}"} for uid in range(1, USERS + 1)])
+    membership.bump(db)
+    start = datetime.utcnow() - timedelta(hours=1)
+    db.execute(insert(Alert), [
+        {"title": f"alert {n}", "body": "b", "start_at": start, "reminders_enabled": True, "reminder_frequency_minutes": 120,
+         "visibility": {"org": True, "teams": [], "users": []}, "status": "active", **fields}
+        for n, fields in enumerate(alerts)
+    ])
+    db.commit()
+    AudienceRepo(db).rebuild_all()
+    db.commit()
+
+
+def sent_per_alert(db) -> Counter:
+    return Counter(db.execute(select(NotificationDelivery.alert_id)).scalars())
+
+
+def test_recipients_over_the_bucket_are_deferred_to_retry_at_not_dropped(db):
+    seed(db, {"severity": "info"})
+    clock = Clock()
+    limits = {"inapp": limited("inapp", rate=1, burst=5, clock=clock)}
+    engine = ReminderEngine(partitions=1, chunk_size=4, limits=limits)
+
+    before = datetime.utcnow()
+    stats = engine.run_cycle()
+    after = datetime.utcnow()
+    assert stats["sent_count"] == 5
+    assert stats["deferred"] == USERS - 5
+    sent = set(db.execute(select(NotificationDelivery.user_id)).scalars())
+    due = dict(db.execute(select(AlertAudience.user_id, AlertAudience.next_due_at)).all())
+    assert len(due) == USERS
+    wait = timedelta(seconds=max(CHANNEL_DEFER_SECONDS, 1))
+    for user_id, next_due_at in due.items():
+        if user_id not in sent:
+            assert before + wait <= next_due_at <= after + wait
+
+    # once the deferral is due and the bucket has refilled, the rest go out
+    for expected in (5, USERS - 10):
+        clock.now += 60
+        sent = db.execute(select(NotificationDelivery.user_id)).scalars().all()
+        db.execute(update(AlertAudience).where(AlertAudience.user_id.not_in(sent)).values(next_due_at=before))
+        db.commit()
+        assert engine.run_cycle()["sent_count"] == expected
+    assert sent_per_alert(db) == {1: USERS}
+
+
+def test_critical_alerts_are_admitted_before_warning_and_info(db):
+    seed(db, {"severity": "info"}, {"severity": "critical"}, {"severity": "warning"})
+    limits = {"inapp": limited("inapp", rate=1, burst=USERS + 3, clock=Clock())}
+    stats = ReminderEngine(partitions=1, chunk_size=5, limits=limits).run_cycle()
+
+    assert sent_per_alert(db) == {2: USERS, 3: 3}
+    assert stats["deferred"] == 2 * USERS - 3
+
+
+def test_in_flight_cap_counts_unfinished_outbox_jobs(db, monkeypatch):
+    monkeypatch.setattr(registry, "WEBHOOK_URL", "http://127.0.0.1:9/")
+    monkeypatch.setattr(webhook, "WEBHOOK_URL", "http://127.0.0.1:9/")
+    seed(db, {"severity": "warning", "delivery_types": ["webhook"]})
+    now = datetime.utcnow()
+    # three unfinished jobs of an earlier cycle, and finished ones that do not count
+    db.execute(insert(DeliveryJob), [
+        {"alert_id": 1, "user_id": 1, "channel": "webhook", "status": status, "next_attempt_at": now, "created_at": now}
+        for status in ("pending", "pending", "in_flight", "done", "dead")
+    ])
+    db.commit()
+    limits = {"webhook": ChannelLimit("webhook", max_in_flight=8)}
+    stats = ReminderEngine(partitions=1, chunk_size=4, limits=limits).run_cycle()
+
+    assert stats["sent_count"] == 5
+    assert stats["deferred"] == USERS - 5
+    channel = stats["channels"]["webhook"]
+    assert channel["in_flight"] == 8
+    assert channel["deferred"] == USERS - 5
+    assert channel["queue_depth"] == 8 + USERS - 5
+    assert channel["tokens"] is None
+    pending = db.execute(select(DeliveryJob.id).where(DeliveryJob.status == "pending")).all()
+    assert len(pending) == 2 + 5
+
+
+def test_stats_report_deferred_and_queue_depth(db):
+    seed(db, {"severity": "info"})
+    limits = {"inapp": limited("inapp", rate=1, burst=3, clock=Clock())}
+    stats = ReminderEngine(partitions=1, chunk_size=10, limits=limits).run_cycle()
+
+    assert stats["deferred"] == USERS - 3
+    # in-app sends finish inside send, so nothing stays in flight
+    assert stats["channels"]["inapp"] == {"deferred": USERS - 3, "in_flight": 0, "tokens": 0, "queue_depth": USERS - 3}
+
+
+def test_run_parallel_splits_rate_and_burst_between_workers():
+    limit = ChannelLimit("webhook", rate=20, burst=200, max_in_flight=1000)
+    share = limit.split(4)
+    assert (share.bucket.rate, share.bucket.burst, share.max_in_flight) == (5, 50, 1000)
+    assert limit.split(500).bucket.burst == 1
+    assert ChannelLimit("email", max_in_flight=3).split(4).bucket is None
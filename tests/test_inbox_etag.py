@@ -0,0 +1,79 @@
+# tests/test_inbox_etag.py
+from datetime import datetime, timedelta
+
+from app.model import Alert, Team, User
+from app.repositories.alert_repo import AlertRepo
+from app.services import membership
+from app.services.delivery.inapp import InAppStrategy
+from app.services.visibilty import VisibilityResolver
+
+
+def seed(db):
+    db.add(Team(id=1, name="eng"))
+    db.add(User(id=1, name="a", team_id=1))
+    membership.bump(db)
+    db.commit()
+    repo = AlertRepo(db)
+    start = datetime.utcnow() - timedelta(minutes=5)
+    for n in (1, 2):
+        repo.create(title=f"alert {n}", body="b", start_at=start, visibility={"org": False, "teams": [1], "users": []})
+
+
+def etag(client):
+    response = client.get("/user/1/alerts")
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_conditional_get_answers_304_with_the_current_tag(db, client):
+    seed(db)
+    first = client.get("/user/1/alerts")
+    assert first.status_code == 200
+    tag = first.headers["ETag"]
+    assert len(first.json()["alerts"]) == 2
+
+    again = client.get("/user/1/alerts", headers={"If-None-Match": tag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == tag
+
+    # a list with a stale tag, or the strong form of the tag, still yields the current weak tag
+    for header in (f'W/"0-x-0-0", {tag}', tag[2:]):
+        listed = client.get("/user/1/alerts", headers={"If-None-Match": header})
+        assert listed.status_code == 304
+        assert listed.headers["ETag"] == tag
+    assert client.get("/user/1/alerts", headers={"If-None-Match": "*"}).status_code == 200
+    # other query parameters are another representation
+    assert client.get("/user/1/alerts?unread=true", headers={"If-None-Match": tag}).status_code == 200
+
+
+def test_unknown_user_is_404_even_with_a_matching_tag(db, client):
+    seed(db)
+    tag = etag(client)
+    assert client.get("/user/2/alerts").status_code == 404
+    # user 2 has no version row, so this tag would match its version 0
+    _, key, day, until = tag[3:-1].split("-")
+    forged = f'W/"0-{key}-{day}-{until}"'
+    assert client.get("/user/2/alerts", headers={"If-None-Match": forged}).status_code == 404
+
+
+def test_writes_change_the_tag(db, client):
+    seed(db)
+    tags = [etag(client)]
+
+    assert client.post("/user/1/alerts/1/read").status_code == 200
+    tags.append(etag(client))
+    assert client.post("/user/1/alerts/2/snooze").status_code == 200
+    tags.append(etag(client))
+
+    alert = db.get(Alert, 1)
+    InAppStrategy(db).send_batch(alert, list(VisibilityResolver.resolve(alert, db, 10))[0])
+    db.commit()
+    tags.append(etag(client))
+
+    assert client.put("/admin/alerts/2?is_admin=true", json={"title": "renamed"}).status_code == 200
+    tags.append(etag(client))
+
+    assert len(set(tags)) == len(tags)
+    assert client.get("/user/1/alerts", headers={"If-None-Match": tags[0]}).status_code == 200
+    assert client.get("/user/1/alerts", headers={"If-None-Match": tags[-1]}).status_code == 304
@@ -0,0 +1,111 @@
+# tests/test_inbox_pagination.py
+import base64
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.model import Alert, AlertAudience, User, UserAlertPreference
+from app.services import inbox, membership
+
+
+RANKS = {"critical": 3, "warning": 2, "info": 1}
+
+
+def sort_key(row) -> tuple:
+    return RANKS[row["severity"]], row["start_at"], row["id"]
+
+
+def cursor_of(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.fixture
+def inbox_alerts(db):
+    """25 alerts for user 1; most share severity and start_at, so only the id breaks ties."""
+    db.add(User(id=1, name="a"))
+    membership.bump(db)
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    rows = []
+    for alert_id in range(1, 26):
+        severity = "critical" if alert_id % 10 == 0 else "info"
+        rows.append({"id": alert_id, "title": f"alert {alert_id}", "body": "b", "severity": severity,
+                     "start_at": start - timedelta(minutes=alert_id % 2), "status": "active",
+                     "visibility": {"org": True}})
+    db.execute(insert(Alert), rows)
+    db.execute(insert(AlertAudience), [{"alert_id": r["id"], "user_id": 1} for r in rows])
+    db.execute(insert(UserAlertPreference), [
+        {"user_id": 1, "alert_id": alert_id, "read": True, "snoozed_until": date.today() if alert_id % 3 == 0 else None}
+        for alert_id in range(1, 26, 2)
+    ])
+    db.commit()
+    return rows
+
+
+def walk(client, limit: int, **params) -> list:
+    ids, cursor = [], None
+    while True:
+        response = client.get("/user/1/alerts", params={"limit": limit, **params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["alerts"]) <= limit
+        ids.extend(a["id"] for a in page["alerts"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def expected_order(rows) -> list:
+    return [r["id"] for r in sorted(rows, key=sort_key, reverse=True)]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 25, 200])
+def test_pages_cover_every_alert_once_in_order(client, inbox_alerts, limit):
+    ids = walk(client, limit)
+    assert ids == expected_order(inbox_alerts)
+    assert len(set(ids)) == len(inbox_alerts)
+
+
+def test_filters_apply_on_every_page(client, inbox_alerts):
+    read = {alert_id for alert_id in range(1, 26, 2)}
+    snoozed = {alert_id for alert_id in read if alert_id % 3 == 0}
+    ordered = expected_order(inbox_alerts)
+    assert walk(client, 4, unread="false") == [i for i in ordered if i in read]
+    assert walk(client, 4, unread="true") == [i for i in ordered if i not in read]
+    assert walk(client, 2, snoozed="true") == [i for i in ordered if i in snoozed]
+    assert walk(client, 4, snoozed="false", unread="false") == [i for i in ordered if i in read - snoozed]
+    assert walk(client, 1, severity="critical") == [20, 10]
+    assert walk(client, 3, severity="warning") == []
+
+
+@pytest.mark.parametrize("cursor", [
+    "garbage!",
+    "%%%",
+    cursor_of(b"not json"),
+    cursor_of(b"\xff\xfe"),
+    cursor_of(b"null"),
+    cursor_of(b'{"rank": 1}'),
+    cursor_of(b"[1, 2]"),
+    cursor_of(b'[1, "yesterday", 3]'),
+    cursor_of(b"[1, 5, 3]"),
+    cursor_of(b'["x", "2024-01-01T00:00:00", 3]'),
+    cursor_of(b'[Infinity, "2024-01-01T00:00:00", 3]'),
+    cursor_of(b'[1, "2024-01-01T00:00:00", NaN]'),
+    cursor_of(b'[1, "2024-01-01T00:00:00", 100000000000000000000000000]'),
+])
+def test_bad_cursors_are_400(client, inbox_alerts, cursor):
+    response = client.get("/user/1/alerts", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_hand_edited_cursor_is_just_another_position(client, inbox_alerts):
+    page = client.get("/user/1/alerts", params={"limit": 5}).json()
+    rank, start_at, alert_id = json.loads(base64.urlsafe_b64decode(page["next_cursor"] + "=="))
+    start_at = datetime.fromisoformat(start_at)
+    moved = inbox.encode_cursor(rank, start_at, alert_id - 1)
+    response = client.get("/user/1/alerts", params={"cursor": moved, "limit": 200})
+    assert response.status_code == 200
+
+    after = [r for r in inbox_alerts if sort_key(r) < (rank, start_at, alert_id - 1)]
+    assert [a["id"] for a in response.json()["alerts"]] == expected_order(after)
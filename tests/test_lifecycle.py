@@ -0,0 +1,65 @@
+# tests/test_lifecycle.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.model import Alert, AlertAudience, Team, User
+from app.repositories.alert_repo import AlertRepo
+from app.repositories.audience_repo import AudienceRepo
+from app.services import membership
+from app.services.lifecycle import sweep_expired
+
+
+def audience_alerts(db):
+    return set(db.execute(select(AlertAudience.alert_id).distinct()).scalars())
+
+
+def test_resync_after_sweep_keeps_expired_alerts_out_of_the_audience(db):
+    now = datetime.utcnow()
+    db.add(Team(id=1, name="eng"))
+    db.add_all([User(id=1, name="a", team_id=1), User(id=2, name="b", team_id=1)])
+    membership.bump(db)
+    db.add_all([
+        Alert(id=1, title="live", body="b", start_at=now, visibility={"org": True, "teams": [], "users": []}),
+        Alert(id=2, title="expiring", body="b", start_at=now - timedelta(hours=2), expires_at=now + timedelta(hours=1),
+              visibility={"org": False, "teams": [1], "users": []}),
+    ])
+    db.commit()
+    repo = AudienceRepo(db)
+    repo.rebuild_all()
+    db.commit()
+    assert audience_alerts(db) == {1, 2}
+    db.get(Alert, 2).expires_at = now - timedelta(minutes=1)
+    db.commit()
+
+    assert sweep_expired(db) == [2]
+    assert audience_alerts(db) == {1}
+
+    repo.sync_user(db.get(User, 1))
+    assert repo.rebuild_all() == 1
+    db.commit()
+    assert audience_alerts(db) == {1}
+    assert db.execute(select(func.count()).select_from(AlertAudience)).scalar() == 2
+
+
+def test_visibility_change_on_an_expired_alert_adds_no_audience(db):
+    now = datetime.utcnow()
+    db.add(Team(id=1, name="eng"))
+    db.add_all([User(id=1, name="a", team_id=1), User(id=2, name="b")])
+    membership.bump(db)
+    db.add(Alert(id=1, title="expiring", body="b", start_at=now - timedelta(hours=2), expires_at=now + timedelta(hours=1),
+                 visibility={"org": False, "teams": [1], "users": []}))
+    db.commit()
+    AudienceRepo(db).rebuild_all()
+    db.commit()
+    db.get(Alert, 1).expires_at = now - timedelta(minutes=1)
+    db.commit()
+    assert sweep_expired(db) == [1]
+
+    repo = AlertRepo(db)
+    repo.update(db.get(Alert, 1), visibility={"org": True, "teams": [], "users": []})
+    assert audience_alerts(db) == set()
+    # moving expires_at out revives it with the new visibility
+    repo.update(db.get(Alert, 1), expires_at=now + timedelta(hours=1))
+    assert db.get(Alert, 1).status == "active"
+    assert db.execute(select(func.count()).select_from(AlertAudience)).scalar() == 2
@@ -0,0 +1,57 @@
+# tests/test_migrations.py
+from datetime import date
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
+
+from app.migrate import alembic_config, current_revision, head_revision, upgrade
+from app.model import Base
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """A SQLite file holding the pre-migration create_all() schema (revision 0001), without a version table."""
+    bind = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with bind.begin() as conn:
+        command.upgrade(alembic_config(conn), "0001")
+        conn.exec_driver_sql("DROP TABLE alembic_version")
+        conn.exec_driver_sql("INSERT INTO users (id, name) VALUES (1, 'a'), (2, 'b')")
+        conn.exec_driver_sql("INSERT INTO alerts (id, title, body) VALUES (1, 't', 'b')")
+        conn.exec_driver_sql(
+            "INSERT INTO user_alert_preferences (user_id, alert_id, snoozed_until, read) VALUES "
+            "(1, 1, '2026-01-01', 0), (1, 1, '2026-01-03', 1), (1, 1, NULL, 0), (2, 1, NULL, 0)"
+        )
+    yield bind
+    bind.dispose()
+
+
+def test_legacy_database_upgrades_to_head_and_merges_duplicate_preferences(legacy_engine):
+    upgrade(legacy_engine)
+
+    assert current_revision(legacy_engine) == head_revision()
+    with legacy_engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn, opts={"compare_type": True}), Base.metadata) == []
+        rows = conn.execute(text("SELECT user_id, alert_id, snoozed_until, read FROM user_alert_preferences ORDER BY user_id")).all()
+    assert [(r.user_id, r.alert_id, r.snoozed_until, bool(r.read)) for r in rows] == [
+        (1, 1, date(2026, 1, 3).isoformat(), True),
+        (2, 1, None, False),
+    ]
+
+
+def test_failed_upgrade_leaves_the_database_untouched(legacy_engine):
+    with legacy_engine.begin() as conn:
+        # clashes with a later revision, after the stamp and several migrations have run
+        conn.exec_driver_sql("CREATE TABLE user_inbox_versions (x INTEGER)")
+    before = set(inspect(legacy_engine).get_table_names())
+
+    with pytest.raises(OperationalError):
+        upgrade(legacy_engine)
+
+    assert set(inspect(legacy_engine).get_table_names()) == before
+    assert "alembic_version" not in before
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM user_alert_preferences")).scalar() == 4
@@ -0,0 +1,84 @@
+# tests/test_outbox_digests.py
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.model import Alert, DeliveryJob, NotificationDelivery, User
+from app.services import retention
+from app.services.delivery import outbox
+from app.services.delivery.outbox import OutboxWorker, QueuedDeliveryStrategy
+
+SENT_AT = datetime(2026, 1, 1, 12, 0, 0)
+
+
+class FlakyStrategy(QueuedDeliveryStrategy):
+    """Delivers every digest except those containing a failing alert."""
+    channel = "flaky"
+
+    def __init__(self, db=None, failing=()):
+        super().__init__(db)
+        self.failing = set(failing)
+
+    async def deliver(self, alert, user_id: int):
+        if alert.id in self.failing:
+            raise RuntimeError("down")
+
+
+class FrozenClock(datetime):
+    @classmethod
+    def utcnow(cls):
+        return SENT_AT
+
+
+def seed(db):
+    db.add(User(id=1, name="a"))
+    db.add_all([Alert(id=i, title=f"alert {i}", body="b", visibility={"org": True}) for i in (1, 2, 3)])
+    db.commit()
+    return db.get(User, 1), [db.get(Alert, i) for i in (1, 2, 3)]
+
+
+def delivered(db):
+    return dict(db.execute(select(NotificationDelivery.id, NotificationDelivery.delivered)).all())
+
+
+def test_digests_enqueued_at_the_same_instant_settle_their_own_deliveries(db, monkeypatch):
+    monkeypatch.setattr(outbox, "datetime", FrozenClock)
+    user, (a1, a2, a3) = seed(db)
+    strategy = FlakyStrategy(db, failing={3})
+    # e.g. two overlapping cycles: both digests carry alert 1 and share user, channel and timestamp
+    strategy.send_digest([(user, [a1, a2])])
+    strategy.send_digest([(user, [a1, a3])])
+    first, second = db.execute(select(DeliveryJob.delivery_ids).order_by(DeliveryJob.id)).scalars().all()
+    assert len(first) == len(second) == 2
+
+    monkeypatch.undo()
+    worker = OutboxWorker({"flaky": strategy}, max_attempts=1)
+    assert asyncio.run(worker.drain()) == {"done": 1, "retried": 0, "dead": 1}
+
+    db.expire_all()
+    status = delivered(db)
+    assert [status[i] for i in first] == [True, True]
+    assert [status[i] for i in second] == [False, False]
+
+
+def test_retention_keeps_rows_of_unfinished_digest_jobs(db, monkeypatch):
+    monkeypatch.setattr(outbox, "datetime", FrozenClock)
+    user, (a1, a2, a3) = seed(db)
+    strategy = FlakyStrategy(db)
+    strategy.send_digest([(user, [a1])])
+    strategy.send_digest([(user, [a2])])
+    monkeypatch.undo()
+    done_job, pending_job = db.execute(select(DeliveryJob).order_by(DeliveryJob.id)).scalars().all()
+    done_job.status = "done"
+    # newer rows supersede both digest deliveries
+    db.add_all([NotificationDelivery(alert_id=a, user_id=1, channel="flaky", sent_at=datetime.utcnow()) for a in (1, 2)])
+    db.commit()
+
+    stats = retention.archive_deliveries(db, now=SENT_AT + timedelta(days=60), archive_dir=tempfile.mkdtemp())
+
+    assert stats["archived"] == 1
+    remaining = db.execute(select(NotificationDelivery.id)).scalars().all()
+    assert set(pending_job.delivery_ids) <= set(remaining)
+    assert not set(done_job.delivery_ids) & set(remaining)
@@ -0,0 +1,91 @@
+# tests/test_preferences.py
+import threading
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from app.model import Alert, AlertAudience, Team, User, UserAlertPreference
+from app.services import analytics, inbox_versions, membership
+from app.services.preference_service import PreferenceService
+
+
+def seed(db):
+    """User 1 is on team 1 and sees alerts 1 (team 1) and 3 (org); alert 2 targets team 2 only."""
+    db.add_all([Team(id=1, name="eng"), Team(id=2, name="ops")])
+    db.add_all([User(id=1, name="a", team_id=1), User(id=2, name="b", team_id=2)])
+    membership.bump(db)
+    for alert_id, visibility in ((1, {"org": False, "teams": [1]}), (2, {"org": False, "teams": [2]}), (3, {"org": True})):
+        db.add(Alert(id=alert_id, title=f"alert {alert_id}", body="b", start_at=datetime.utcnow(), visibility=visibility))
+    db.flush()
+    db.add_all([AlertAudience(alert_id=a, user_id=u) for a, u in ((1, 1), (2, 2), (3, 1), (3, 2))])
+    db.commit()
+
+
+def prefs(db, user_id: int = 1) -> dict:
+    return {r.alert_id: r for r in db.query(UserAlertPreference).filter_by(user_id=user_id)}
+
+
+def totals(db) -> dict:
+    return analytics.summary(db)["totals"]
+
+
+def test_concurrent_and_repeated_upserts_keep_one_row(db):
+    seed(db)
+    service = PreferenceService()
+    actions = [service.mark_read, service.snooze_for_today] * 4
+    barrier = threading.Barrier(len(actions))
+    errors = []
+
+    def run(action):
+        barrier.wait()
+        try:
+            action(1, 1)
+        except Exception as ex:
+            errors.append(ex)
+
+    threads = [threading.Thread(target=run, args=(action,)) for action in actions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert service.mark_read(1, 1) is None
+    service.snooze_for_today(1, 1)
+
+    rows = db.execute(
+        select(UserAlertPreference.user_id, UserAlertPreference.alert_id, func.count())
+        .group_by(UserAlertPreference.user_id, UserAlertPreference.alert_id)
+    ).all()
+    assert rows == [(1, 1, 1)]
+    pref = prefs(db)[1]
+    assert pref.read and pref.snoozed_until is not None
+    # each transition is counted and bumps the inbox once, however often it was requested
+    assert (totals(db)["reads"], totals(db)["snoozes"]) == (1, 1)
+    assert inbox_versions.current_version(db, 1) == 2
+    assert analytics.verify_rollups(db) == {}
+
+
+def test_bulk_actions_only_touch_the_users_audience(db, client):
+    seed(db)
+    read = client.post("/user/1/alerts/read", json={"alert_ids": [1, 2]})
+    assert read.json()["alert_ids"] == [1]
+    assert set(prefs(db)) == {1}
+    assert prefs(db, user_id=2) == {}
+    assert inbox_versions.current_version(db, 1) == 1
+    assert inbox_versions.current_version(db, 2) == 0
+
+    assert sorted(client.post("/user/1/alerts/read", json={"all": True}).json()["alert_ids"]) == [3]
+    assert sorted(client.post("/user/1/alerts/snooze", json={"all": True}).json()["alert_ids"]) == [1, 3]
+    assert client.post("/user/1/alerts/snooze", json={"alert_ids": [2, 3]}).json()["alert_ids"] == []
+    assert inbox_versions.current_version(db, 1) == 3
+    db.expire_all()
+    assert set(prefs(db)) == {1, 3}
+    assert (totals(db)["reads"], totals(db)["snoozes"]) == (2, 2)
+
+    assert client.post("/user/1/alerts/unread", json={"alert_ids": [2, 3]}).json()["alert_ids"] == [3]
+    assert client.post("/user/1/alerts/unread", json={"alert_ids": [3]}).json()["alert_ids"] == []
+    assert inbox_versions.current_version(db, 1) == 4
+    assert totals(db)["reads"] == 1
+    assert analytics.verify_rollups(db) == {}
+
+    assert client.post("/user/1/alerts/read", json={}).status_code == 400
@@ -0,0 +1,204 @@
+# tests/test_query_plans.py
+"""
+Query-plan regression suite for the hot paths.
+
+Seeds the database once, runs each hot path (inbox page, preference writes, reminder cycle,
+scheduler wake-up, outbox claim, visibility resolution, analytics range, admin listings,
+retention) while capturing every SQL statement it issues, then EXPLAINs each statement and
+fails if any of them reads a table with a full scan.
+
+SQLite: a plan line "SCAN <table>" is a full scan ("SEARCH" is an index lookup).
+PostgreSQL (TEST_DATABASE_URL): sequential scans are disabled for the session, so a "Seq Scan"
+node left in the plan means no usable index exists.
+"""
+import json
+import re
+import tempfile
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, update
+
+from app.db import SessionLocal, engine
+from app.model import Alert, AlertAudience, NotificationDelivery, Team, User, UserAlertPreference
+from app.repositories.alert_repo import AlertRepo
+from app.repositories.audience_repo import AudienceRepo
+from app.services import analytics, inbox, inbox_versions, membership, retention
+from app.services.delivery.outbox import OutboxWorker
+from app.services.delivery.webhook import WebhookStrategy
+from app.services.preference_service import PreferenceService
+from app.services.reminder_engine import ReminderEngine
+from app.services.scheduler import ReminderScheduler
+from app.services.visibilty import VisibilityResolver
+
+USERS = 2000
+ALERTS = 60
+# tables that are small by construction and may be scanned
+SCAN_ALLOWED = {"reminder_leases"}
+SKIPPED_PREFIXES = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "SET ", "SHOW ")
+
+
+@pytest.fixture(scope="module")
+def seeded(module_db):
+    """(user_id, alert_id) of a user with deliveries and an active alert."""
+    db = module_db
+    db.execute(insert(Team), [{"name": f"plan-team-{i}"} for i in range(20)])
+    team_ids = [t.id for t in db.query(Team.id)]
+    db.execute(insert(User), [{"name": f"plan-{i}", "team_id": team_ids[i % len(team_ids)]} for i in range(USERS)])
+    membership.bump(db)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(ALERTS):
+        visibility = {"org": i % 10 == 0, "teams": [team_ids[i % len(team_ids)]], "users": []}
+        rows.append({
+            "title": f"plan alert {i}", "body": "query plan check", "severity": ("info", "warning", "critical")[i % 3],
+            "delivery_types": ["inapp"], "start_at": now - timedelta(hours=1 + i % 5),
+            "expires_at": now + timedelta(days=1) if i % 4 else now - timedelta(minutes=5),
+            "reminders_enabled": True, "reminder_frequency_minutes": 120, "visibility": visibility,
+            "status": "active" if i % 7 else "inactive",
+        })
+    db.execute(insert(Alert), rows)
+    db.commit()
+    AudienceRepo(db).rebuild_all()
+    db.execute(update(AlertAudience).values(next_due_at=now - timedelta(minutes=1)))
+    pairs = db.query(AlertAudience.alert_id, AlertAudience.user_id).limit(USERS * 2).all()
+    db.execute(insert(NotificationDelivery), [
+        {"alert_id": a, "user_id": u, "sent_at": now - timedelta(hours=3), "channel": "inapp"} for a, u in pairs
+    ] + [
+        # superseded history for the retention pass
+        {"alert_id": a, "user_id": u, "sent_at": now - timedelta(days=40), "channel": "inapp"} for a, u in pairs[::4]
+    ])
+    db.execute(insert(UserAlertPreference), [
+        {"alert_id": a, "user_id": u, "snoozed_until": date.today() if n % 2 else None, "read": n % 3 == 0}
+        for n, (a, u) in enumerate(pairs[::5])
+    ])
+    db.commit()
+    alert_id = db.query(Alert.id).filter(Alert.status == "active").order_by(Alert.id).first()[0]
+    return pairs[0][1], alert_id
+
+
+def with_session(fn):
+    def run(user_id, alert_id):
+        db = SessionLocal()
+        try:
+            return fn(db, user_id, alert_id)
+        finally:
+            db.close()
+    return run
+
+
+@with_session
+def inbox_pages(db, user_id, alert_id):
+    page = inbox.fetch_page(db, user_id, limit=5)
+    inbox.fetch_page(db, user_id, limit=5, cursor=page["next_cursor"], unread=True)
+    inbox_versions.current_version(db, user_id)
+    inbox_versions.next_transition(db, user_id, datetime.utcnow())
+
+
+def preferences(user_id, alert_id):
+    prefs = PreferenceService()
+    prefs.mark_read(user_id, alert_id)
+    prefs.mark_unread(user_id, alert_id)
+    prefs.snooze_for_today(user_id, alert_id)
+    prefs.mark_read_many(user_id)
+
+
+@with_session
+def audience_sync(db, user_id, alert_id):
+    alert = db.get(Alert, alert_id)
+    AudienceRepo(db).sync_alert(alert)
+    VisibilityResolver.resolve_user_ids(alert.visibility, db)
+    db.rollback()
+
+
+@with_session
+def analytics_range(db, user_id, alert_id):
+    analytics.summary(db, since=date.today() - timedelta(days=7), alert_id=alert_id)
+
+
+@with_session
+def admin_listings(db, user_id, alert_id):
+    repo = AlertRepo(db)
+    page = repo.list_page({"status": "active"}, limit=10)
+    repo.list_page({"status": "active"}, limit=10, after_id=page[-1].id)
+    repo.deliveries_for(alert_id, limit=10)
+
+
+@with_session
+def retention_pass(db, user_id, alert_id):
+    retention.archive_deliveries(db, batch_size=100, archive_dir=tempfile.mkdtemp())
+
+
+HOT_PATHS = {
+    "inbox": inbox_pages,
+    "preferences": preferences,
+    "audience sync": audience_sync,
+    "reminder cycle": lambda user_id, alert_id: ReminderEngine(chunk_size=200).run_cycle(),
+    "scheduler wake-up": lambda user_id, alert_id: ReminderScheduler().next_due_at(),
+    "outbox claim": lambda user_id, alert_id: OutboxWorker({"webhook": WebhookStrategy(url="http://127.0.0.1:9/")})._claim(),
+    "analytics range": analytics_range,
+    "admin listings": admin_listings,
+    "retention": retention_pass,
+}
+
+
+def sqlite_full_scans(conn, statement, params):
+    plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params).fetchall()
+    lines = [row[-1] for row in plan]
+    scans = []
+    for line in lines:
+        match = re.match(r"SCAN (\w+)", line)
+        if match and match.group(1) not in SCAN_ALLOWED and match.group(1) != "CONSTANT":
+            scans.append(match.group(1))
+    return lines, scans
+
+
+def postgres_full_scans(conn, statement, params):
+    (plan,) = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, params).one()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    scans, lines = [], []
+
+    def walk(node, depth=0):
+        lines.append("  " * depth + f"{node['Node Type']} {node.get('Relation Name', '')} {node.get('Index Name', '')}".rstrip())
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") not in SCAN_ALLOWED:
+            scans.append(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(plan[0]["Plan"])
+    return lines, scans
+
+
+def captured_statements(run) -> list:
+    """Distinct (statement, parameters) issued on the engine while run() executes."""
+    captured = {}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(SKIPPED_PREFIXES):
+            captured.setdefault(statement, parameters[0] if executemany else parameters)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return list(captured.items())
+
+
+@pytest.mark.parametrize("name", list(HOT_PATHS))
+def test_hot_path_has_no_full_scans(seeded, name):
+    user_id, alert_id = seeded
+    statements = captured_statements(lambda: HOT_PATHS[name](user_id, alert_id))
+    assert statements, f"{name} issued no SQL"
+
+    explain = sqlite_full_scans if engine.dialect.name == "sqlite" else postgres_full_scans
+    failures = []
+    for statement, params in statements:
+        with engine.connect() as conn:
+            if engine.dialect.name == "postgresql":
+                conn.exec_driver_sql("SET enable_seqscan = off")
+            lines, scans = explain(conn, statement, params)
+            conn.rollback()
+        if scans:
+            failures.append(f"FULL SCAN {', '.join(scans)} | {' '.join(statement.split())[:160]}\n    " + "\n    ".join(lines))
+    assert not failures, "\n".join(failures)
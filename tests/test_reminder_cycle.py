@@ -0,0 +1,142 @@
+# tests/test_reminder_cycle.py
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, event, func, insert, select, update
+
+from app.db import SessionLocal, engine
+from app.model import Alert, AlertAudience, NotificationDelivery, User, UserAlertPreference
+from app.repositories.audience_repo import AudienceRepo
+from app.services import membership, metrics
+from app.services.delivery.inapp import InAppStrategy
+from app.services.reminder_engine import ReminderEngine
+
+
+class RecordingHub:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, user_ids, payload):
+        self.messages.extend((user_id, payload) for user_id in user_ids)
+
+
+def seed_alerts(db, alerts: int = 2):
+    start = datetime.utcnow() - timedelta(hours=1)
+    db.execute(insert(Alert), [
+        {"title": f"alert {i}", "body": "b", "start_at": start, "reminders_enabled": True,
+         "reminder_frequency_minutes": 60, "delivery_types": ["inapp"], "status": "active",
+         "visibility": {"org": True, "teams": [], "users": []}}
+        for i in range(alerts)
+    ])
+    db.commit()
+
+
+def grow_audience(db, users: int):
+    """Add users up to `users`, make every (alert, user) pair due again and forget past deliveries."""
+    have = db.scalar(select(func.count(User.id)))
+    db.execute(insert(User), [{"name": f"user-{i}"} for i in range(have, users)])
+    membership.bump(db)
+    db.commit()
+    AudienceRepo(db).rebuild_all()
+    db.execute(delete(NotificationDelivery))
+    db.execute(update(AlertAudience).values(next_due_at=datetime.utcnow() - timedelta(minutes=1)))
+    db.commit()
+    user_ids = list(db.execute(select(User.id).order_by(User.id).limit(2)).scalars())
+    alert_id = db.scalar(select(func.min(Alert.id)))
+    # one snoozed and one recently reminded pair, so both skip paths run
+    db.execute(delete(UserAlertPreference))
+    db.add(UserAlertPreference(user_id=user_ids[0], alert_id=alert_id, snoozed_until=date.today()))
+    db.add(NotificationDelivery(alert_id=alert_id, user_id=user_ids[1], channel="inapp",
+                                sent_at=datetime.utcnow() - timedelta(minutes=5)))
+    db.commit()
+
+
+def test_cycle_statement_count_does_not_grow_with_recipients(db):
+    seed_alerts(db)
+    # the first cycle creates the lease rows
+    ReminderEngine(partitions=1).run_cycle()
+    counts = {}
+    for users in (20, 200):
+        grow_audience(db, users)
+        # chunk_size above the audience, so both sizes are sent as one chunk per alert
+        engine = ReminderEngine(partitions=1, chunk_size=500, digest=False)
+        with metrics.track_queries() as queries:
+            stats = engine.run_cycle()
+        assert (stats["skipped_snoozed"], stats["skipped_recent"]) == (1, 1)
+        assert stats["sent_count"] == 2 * users - 2
+        counts[users] = queries.statements
+    assert counts[200] == counts[20]
+
+
+def test_each_chunk_is_written_in_one_insert_and_one_commit(db):
+    seed_alerts(db, alerts=1)
+    grow_audience(db, 201)
+    log = []
+
+    def statement(conn, cursor, sql, parameters, context, executemany):
+        log.append(" ".join(sql.split()[:3]))
+
+    def commit(conn):
+        log.append("COMMIT")
+
+    event.listen(engine, "before_cursor_execute", statement)
+    event.listen(engine, "commit", commit)
+    try:
+        stats = ReminderEngine(partitions=1, chunk_size=50, digest=False).run_cycle()
+    finally:
+        event.remove(engine, "before_cursor_execute", statement)
+        event.remove(engine, "commit", commit)
+
+    # 201 users less the snoozed and the recently reminded one
+    assert stats["sent_count"] == 199
+    # the snoozed user is deferred before the cycle reads any chunk; the recent one is throttled in the first
+    assert [(c["size"], c["sent"]) for c in stats["chunks"]] == [(49, 49), (50, 50), (50, 50), (50, 50)]
+    inserts = [i for i, entry in enumerate(log) if entry == "INSERT INTO notification_deliveries"]
+    assert len(inserts) == 4
+    for i in inserts:
+        # the deliveries, their rollup and the inbox versions, then one commit
+        assert log[i + 1:i + 4] == ["INSERT INTO analytics_rollups", "INSERT INTO user_inbox_versions", "COMMIT"]
+    assert stats["phases"]["send"]["statements"] == 4 * 3
+
+
+def test_digest_cycle_sends_each_user_one_message_and_advances_every_alert(db):
+    db.add_all([User(id=1, name="a"), User(id=2, name="b")])
+    membership.bump(db)
+    start = datetime.utcnow() - timedelta(hours=1)
+    db.add_all([
+        Alert(id=1, title="info", body="b", severity="info", start_at=start, reminder_frequency_minutes=60,
+              visibility={"org": False, "teams": [], "users": [1]}),
+        Alert(id=2, title="critical", body="b", severity="critical", start_at=start, reminder_frequency_minutes=30,
+              visibility={"org": False, "teams": [], "users": [1]}),
+        Alert(id=3, title="warning", body="b", severity="warning", start_at=start, reminder_frequency_minutes=60,
+              visibility={"org": True, "teams": [], "users": []}),
+    ])
+    db.commit()
+    AudienceRepo(db).rebuild_all()
+    db.execute(update(AlertAudience).values(next_due_at=start))
+    db.commit()
+
+    hub, strategy_db = RecordingHub(), SessionLocal()
+    try:
+        engine = ReminderEngine(strategies={"inapp": InAppStrategy(strategy_db, hub=hub)}, partitions=1, digest=True)
+        stats = engine.run_cycle()
+    finally:
+        strategy_db.close()
+
+    assert (stats["sent_count"], stats["messages_sent"], stats["messages_saved"]) == (4, 2, 2)
+    assert sorted(user_id for user_id, _ in hub.messages) == [1, 2]
+    digests = dict(hub.messages)
+    assert {payload["type"] for payload in digests.values()} == {"digest"}
+    # most severe first
+    assert [a["alert_id"] for a in digests[1]["alerts"]] == [2, 3, 1]
+    assert [a["alert_id"] for a in digests[2]["alerts"]] == [3]
+    # still one delivery row per alert
+    assert sorted(db.execute(select(NotificationDelivery.alert_id, NotificationDelivery.user_id)).all()) == [
+        (1, 1), (2, 1), (3, 1), (3, 2)]
+    now = datetime.fromisoformat(stats["now"])
+    due = dict(((a, u), d) for a, u, d in db.execute(
+        select(AlertAudience.alert_id, AlertAudience.user_id, AlertAudience.next_due_at)).all())
+    assert due == {(1, 1): now + timedelta(minutes=60), (2, 1): now + timedelta(minutes=30),
+                   (3, 1): now + timedelta(minutes=60), (3, 2): now + timedelta(minutes=60)}
+
+    # nothing is due until the shortest frequency has passed
+    assert engine.run_cycle()["sent_count"] == 0
@@ -0,0 +1,21 @@
+# tests/test_startup.py
+from app.model import Team, User
+from app.services import membership
+from app.startup import _warm_membership, _warm_reads
+
+
+def test_warm_up_loads_team_membership_and_reads_a_real_user(db):
+    db.add_all([Team(id=1, name="eng"), Team(id=2, name="ops")])
+    db.add_all([User(id=1, name="a", team_id=1), User(id=2, name="b", team_id=2)])
+    membership.bump(db)
+    db.commit()
+
+    assert _warm_membership(db) == 2
+    assert _warm_reads(db) is True
+    generation = membership.current_generation(db)
+    assert list(membership.membership_cache.get((generation, 2))) == [2]
+
+
+def test_warm_up_on_an_empty_database(db):
+    assert _warm_membership(db) == 0
+    assert _warm_reads(db) is False